@@ -0,0 +1,139 @@
+"""
+Throughput and latency benchmark for the generation path.
+
+Runs the real GenerationEngine (client pool, rate limiter, retries, atomic
+writes) against the local mock server, or any OpenAI-compatible endpoint, and
+reports requests/s and latency percentiles.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import (
+    CHALLENGES, DRY_RUN_CHALLENGE, DRY_RUN_PROMPT, MAX_CONCURRENT_REQUESTS, PROVIDER_RATE_LIMITS
+)
+from .engine import GenerationEngine, GenerationTask, GenerationOutcome
+from .generator import create_llms_with_temperature, find_challenge_and_prompt
+from .mock_server import MockServer, MockServerConfig
+from .telemetry import latency_summary
+
+
+def _plan_benchmark_tasks(requests: int, work_dir: Path, temperature: float) -> List[GenerationTask]:
+    challenge, prompt = find_challenge_and_prompt(DRY_RUN_CHALLENGE, DRY_RUN_PROMPT)
+    if not challenge or not prompt:
+        raise ValueError(f"Challenge '{DRY_RUN_CHALLENGE}' not found. Available: {[c.name for c in CHALLENGES]}")
+
+    llms = create_llms_with_temperature(temperature)
+    tasks = []
+    for i in range(requests):
+        iteration = i // len(llms) + 1
+        iteration_dir = work_dir / f"iteration_{iteration}"
+        iteration_dir.mkdir(parents=True, exist_ok=True)
+        tasks.append(GenerationTask(llms[i % len(llms)], prompt, challenge.name, iteration,
+                                    str(iteration_dir), str(iteration_dir)))
+    return tasks
+
+
+def summarize_outcomes(outcomes: List[GenerationOutcome], wall_time: float) -> Dict:
+    succeeded = [o for o in outcomes if o.success]
+    return {
+        "requests": len(outcomes),
+        "succeeded": len(succeeded),
+        "failed": len(outcomes) - len(succeeded),
+        "retries": sum(o.retries for o in outcomes),
+        "wall_time": round(wall_time, 4),
+        "throughput_rps": round(len(succeeded) / wall_time, 3) if wall_time > 0 else 0.0,
+        "request_latency": latency_summary([o.request_time for o in succeeded]),
+        "end_to_end_latency": latency_summary([o.generation_time for o in succeeded]),
+        "ttft": latency_summary([o.ttft for o in succeeded if o.ttft is not None]),
+        "completion_tokens": sum((o.usage or {}).get("completion_tokens") or 0 for o in succeeded),
+    }
+
+
+def run_generation_benchmark(requests: int = 60, max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                             stream: bool = False, rate_limit: Optional[float] = None,
+                             base_url: Optional[str] = None,
+                             server_config: Optional[MockServerConfig] = None,
+                             temperature: float = 1.0,
+                             output_file: Optional[str] = None) -> Dict:
+    """
+    Benchmark the generator against a mock or real endpoint.
+
+    Args:
+        requests: Number of generation requests, spread round-robin over the configured models
+        max_concurrency: Maximum in-flight requests
+        stream: Use streaming responses
+        rate_limit: Initial requests/s for every provider (defaults to config)
+        base_url: Existing endpoint to benchmark; a local mock server is started when omitted
+        server_config: Behaviour of the local mock server
+        temperature: Sampling temperature sent with each request
+        output_file: Optional path for the JSON report
+
+    Returns:
+        Dict with throughput, latency percentiles and failure counts
+    """
+    server = None
+    if base_url is None:
+        server = MockServer(server_config or MockServerConfig()).start()
+        base_url = server.base_url
+
+    rate_limits = None
+    if rate_limit is not None:
+        rate_limits = {provider: rate_limit for provider in PROVIDER_RATE_LIMITS}
+
+    print(f"🏎️  Benchmarking generation against {base_url}")
+    print(f"🔢 Requests: {requests}")
+    print(f"⚡ Concurrency: {max_concurrency}")
+    print(f"📡 Streaming: {stream}")
+    print("-" * 50)
+
+    saved_env = {key: os.environ.get(key) for key in ("OPENROUTER_API_URL", "OPENROUTER_API_KEY")}
+    os.environ["OPENROUTER_API_URL"] = base_url
+    if server or not saved_env["OPENROUTER_API_KEY"]:
+        os.environ["OPENROUTER_API_KEY"] = "mock"
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="generation_benchmark_") as work_dir:
+            tasks = _plan_benchmark_tasks(requests, Path(work_dir), temperature)
+            engine = GenerationEngine(max_concurrency, rate_limits=rate_limits, stream=stream)
+
+            start_time = time.time()
+            outcomes = engine.run(tasks)
+            wall_time = time.time() - start_time
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        if server:
+            server.stop()
+
+    report = summarize_outcomes(outcomes, wall_time)
+    report["config"] = {
+        "base_url": base_url,
+        "max_concurrency": max_concurrency,
+        "stream": stream,
+        "rate_limit": rate_limit,
+    }
+    if server:
+        report["server"] = dict(server.stats)
+
+    request_latency = report["request_latency"]
+    print(f"✅ {report['succeeded']}/{report['requests']} succeeded, {report['retries']} retries "
+          f"in {report['wall_time']:.2f}s")
+    print(f"🚀 Throughput: {report['throughput_rps']:.2f} req/s")
+    print(f"⏱️  Request latency p50/p95/p99: {request_latency['p50']:.3f}s / "
+          f"{request_latency['p95']:.3f}s / {request_latency['p99']:.3f}s")
+
+    if output_file:
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to: {output_file}")
+
+    return report
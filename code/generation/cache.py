@@ -0,0 +1,87 @@
+"""
+Content-addressed on-disk cache for LLM responses.
+
+Responses are keyed by a hash of (model, messages, temperature, top_p, top_k,
+iteration seed) and stored zlib-compressed in a single SQLite file, so re-runs
+of a sweep can replay completions from disk instead of calling the API.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+from openai.types.chat.chat_completion import ChatCompletion
+
+
+class ResponseCache:
+    """SQLite-backed response cache with an opt-in policy per temperature."""
+
+    def __init__(self, db_path: Path, temperatures: Optional[Iterable[float]] = None):
+        """
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            temperatures: Temperatures for which caching is enabled; None enables all
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.temperatures = None if temperatures is None else {float(t) for t in temperatures}
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, temperature REAL, payload BLOB)"
+        )
+        self._conn.commit()
+
+    def is_enabled_for(self, temperature: float) -> bool:
+        return self.temperatures is None or float(temperature) in self.temperatures
+
+    @staticmethod
+    def make_key(params: dict, seed: Optional[int] = None) -> str:
+        """Hash request parameters and iteration seed into a stable cache key."""
+        key_data = {
+            "model": params.get("model"),
+            "messages": params.get("messages"),
+            "temperature": params.get("temperature"),
+            "top_p": params.get("top_p"),
+            "top_k": params.get("extra_body", {}).get("top_k"),
+            "seed": seed,
+        }
+        canonical = json.dumps(key_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Check for a cached response without affecting hit/miss counters."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ChatCompletion.model_validate_json(zlib.decompress(row[0]))
+
+    def put(self, key: str, params: dict, completion: ChatCompletion) -> None:
+        payload = zlib.compress(completion.model_dump_json().encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, payload) VALUES (?, ?, ?, ?)",
+                (key, params.get("model"), params.get("temperature"), payload)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,81 @@
+"""
+Process-wide OpenAI clients backed by a shared, tuned httpx connection pool.
+
+All Llm instances reuse the same clients, so keep-alive connections, TLS
+sessions and (when the optional `h2` package is installed) HTTP/2 streams are
+shared across models, temperatures and commands.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool tuning
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+KEEPALIVE_EXPIRY = 120.0
+REQUEST_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+_lock = threading.Lock()
+_sync_client: Optional[OpenAI] = None
+_async_client: Optional[Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def get_client() -> OpenAI:
+    """Return the shared synchronous OpenAI client, creating it on first use."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = OpenAI(
+                base_url=os.getenv("OPENROUTER_API_URL"),
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                http_client=DefaultHttpxClient(
+                    limits=_pool_limits(), timeout=REQUEST_TIMEOUT, http2=HTTP2_AVAILABLE
+                ),
+            )
+        return _sync_client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client for the running event loop.
+
+    httpx async pools are bound to the loop that created them, so a new client
+    is built when a later `asyncio.run` starts a different loop.
+    """
+    global _async_client
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _async_client is None or _async_client[0] is not loop:
+            client = AsyncOpenAI(
+                base_url=os.getenv("OPENROUTER_API_URL"),
+                api_key=os.getenv("OPENROUTER_API_KEY"),
+                # Retries are handled by the generation engine's rate limiter
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=_pool_limits(), timeout=REQUEST_TIMEOUT, http2=HTTP2_AVAILABLE
+                ),
+            )
+            _async_client = (loop, client)
+        return _async_client[1]
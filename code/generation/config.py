@@ -112,3 +112,42 @@ DRY_RUN_CHALLENGE = "calculator"
 DRY_RUN_PROMPT = "5-role-zero_shot"
 DRY_RUN_ITERATIONS = 1
 DRY_RUN_OUTPUT_DIR = "dry_run_output"
+
+# Default temperature grid for the sweep command
+SWEEP_TEMPERATURES = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+# Concurrency limits for the async generation engine
+MAX_CONCURRENT_REQUESTS = 8
+MODEL_CONCURRENCY_LIMITS = {
+    "chatgpt": 4,
+    "claude": 4,
+    "gemini": 4,
+}
+
+# Initial per-provider request rates (requests/s); adapted at runtime on 429s
+PROVIDER_RATE_LIMITS = {
+    "openai": 2.0,
+    "anthropic": 1.0,
+    "google": 1.0,
+}
+DEFAULT_RATE_LIMIT = 1.0
+
+# Retry policy for transient API errors (rate limits, timeouts, 5xx)
+MAX_RETRIES = 6
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+# Stream responses to disk and extract code blocks as they arrive
+STREAM_RESPONSES = False
+
+# Capacity of the queues between the generate, test and similarity stages of `full`
+PIPELINE_QUEUE_SIZE = 8
+
+# Local mock server and generation benchmark defaults
+MOCK_SERVER_PORT = 8765
+BENCHMARK_REQUESTS = 60
+
+# Response cache: file location (relative to the output directory) and the
+# temperatures for which cached responses are replayed by default
+RESPONSE_CACHE_FILE = "cache/llm_responses.sqlite"
+RESPONSE_CACHE_TEMPERATURES = [0.0]
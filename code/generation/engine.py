@@ -0,0 +1,245 @@
+"""
+Asynchronous generation engine.
+
+Runs LLM queries concurrently with a global concurrency limit and optional
+per-model limits, writing results with the same layout as the sequential path.
+Requests pass through a per-provider adaptive rate limiter and transient errors
+are retried with jittered exponential backoff. In streaming mode responses are
+written to disk chunk by chunk and code blocks are reported as soon as they close.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import openai
+
+from .config import MAX_CONCURRENT_REQUESTS, MODEL_CONCURRENCY_LIMITS, MAX_RETRIES, STREAM_RESPONSES
+from .llm import Llm
+from .prompt import Prompt
+from .rate_limit import ProviderRateLimiter, RETRYABLE_ERRORS, backoff_delay, parse_retry_after
+from .telemetry import write_generation_telemetry
+from .utils import write_llm_output, StreamingResponseWriter, create_temp_folder_name
+
+
+@dataclass
+class GenerationTask:
+    """A single (model, iteration) unit of work."""
+    llm: Llm
+    prompt: Prompt
+    challenge: str
+    iteration: int
+    code_dir: str
+    response_dir: str
+
+
+@dataclass
+class GenerationOutcome:
+    """Result of a generation task; `error` is set when the query failed."""
+    task: GenerationTask
+    response_content: Optional[str] = None
+    generation_time: float = 0.0
+    error: Optional[str] = None
+    retries: int = 0
+    # Duration of the successful request alone, excluding queueing, rate limiting and retries
+    request_time: float = 0.0
+    # Time to the first streamed content chunk (streaming mode only)
+    ttft: Optional[float] = None
+    usage: Optional[Dict[str, int]] = None
+    cached: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    def telemetry_record(self) -> Dict:
+        """Per-call telemetry as stored in generation_telemetry.json."""
+        llm = self.task.llm
+        usage = self.usage or {}
+        return {
+            "model": llm.name,
+            "model_id": llm.model,
+            "temp_folder": create_temp_folder_name(llm.temperature, llm.top_k, llm.top_p),
+            "temperature": llm.temperature,
+            "top_k": llm.top_k,
+            "top_p": llm.top_p,
+            "iteration": self.task.iteration,
+            "status": "success" if self.success else "failed",
+            "cached": self.cached,
+            "ttft": round(self.ttft, 4) if self.ttft is not None else None,
+            "latency": round(self.request_time, 4) if self.success else None,
+            "generation_time": round(self.generation_time, 4),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+            "retries": self.retries,
+            "error": self.error,
+            "recorded_at": datetime.now().isoformat(),
+        }
+
+
+class GenerationEngine:
+    """Dispatch generation tasks concurrently using asyncio and AsyncOpenAI."""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                 model_limits: Optional[Dict[str, int]] = None, journal=None,
+                 rate_limits: Optional[Dict[str, float]] = None, max_retries: int = MAX_RETRIES,
+                 stream: bool = STREAM_RESPONSES,
+                 on_code_block: Optional[Callable[["GenerationTask", str], None]] = None):
+        """
+        Args:
+            max_concurrency: Maximum number of in-flight requests across all models
+            model_limits: Maximum in-flight requests per model name (defaults to config)
+            journal: Optional GenerationJournal; units are marked completed after their files are written
+            rate_limits: Initial requests/s per provider prefix (defaults to config)
+            max_retries: Retries for rate limits, timeouts and server errors before giving up
+            stream: Stream responses to disk instead of buffering whole completions
+            on_code_block: Called with (task, code) for each code block as soon as it is complete
+                (streaming mode only)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_limits = MODEL_CONCURRENCY_LIMITS if model_limits is None else model_limits
+        self.journal = journal
+        self.rate_limits = rate_limits
+        self.max_retries = max_retries
+        self.stream = stream
+        self.on_code_block = on_code_block
+
+    def run(self, tasks: List[GenerationTask],
+            on_complete: Optional[Callable[[GenerationOutcome], None]] = None) -> List[GenerationOutcome]:
+        """
+        Run all tasks and return outcomes in the same order as `tasks`.
+
+        `on_complete` is called for every outcome as it finishes; if it returns an
+        awaitable, the outcome's slot waits for it.
+        """
+        if not tasks:
+            return []
+        return asyncio.run(self.run_async(tasks, on_complete))
+
+    async def run_async(self, tasks: List[GenerationTask],
+                        on_complete: Optional[Callable[[GenerationOutcome], None]] = None) -> List[GenerationOutcome]:
+        """Async variant of `run` for callers that already own an event loop."""
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        rate_limiter = ProviderRateLimiter(self.rate_limits)
+        model_semaphores = {}
+        for task in tasks:
+            name = task.llm.name
+            if name not in model_semaphores:
+                limit = self.model_limits.get(name, self.max_concurrency)
+                model_semaphores[name] = asyncio.Semaphore(max(1, limit))
+
+        async def run_one(task: GenerationTask) -> GenerationOutcome:
+            outcome = await self._execute(task, rate_limiter, model_semaphores[task.llm.name], global_limit)
+            try:
+                write_generation_telemetry(task.code_dir, task.llm.name, outcome.telemetry_record())
+            except OSError as e:
+                print(f"⚠️  Could not write telemetry for {task.llm.name} iteration [{task.iteration}]: {e}")
+            if on_complete:
+                result = on_complete(outcome)
+                # Async callbacks can apply backpressure without blocking the event loop
+                if inspect.isawaitable(result):
+                    await result
+            return outcome
+
+        return await asyncio.gather(*(run_one(task) for task in tasks))
+
+    async def _execute(self, task: GenerationTask, rate_limiter: ProviderRateLimiter,
+                       model_limit: asyncio.Semaphore, global_limit: asyncio.Semaphore) -> GenerationOutcome:
+        start_time = time.time()
+        bucket = rate_limiter.bucket(task.llm.model)
+        # Cached replays never reach the API, so they bypass the rate limiter
+        cached = task.llm.has_cached_response(task.prompt.prompt, seed=task.iteration)
+        retries = 0
+        ttft = None
+
+        while True:
+            if not cached:
+                await bucket.acquire()
+            try:
+                # Concurrency slots are held only while a request is in flight, not during backoff
+                async with model_limit, global_limit:
+                    request_start = time.time()
+                    if self.stream:
+                        ttft, usage = await self._stream_response(task)
+                    else:
+                        answer = await task.llm.aquery(task.prompt.prompt, seed=task.iteration)
+                        usage = _usage_dict(answer)
+                    request_time = time.time() - request_start
+                if not cached:
+                    bucket.on_success()
+                break
+
+            except RETRYABLE_ERRORS as e:
+                retry_after = parse_retry_after(e)
+                if isinstance(e, openai.RateLimitError):
+                    bucket.on_rate_limited(retry_after)
+
+                if retries >= self.max_retries:
+                    return GenerationOutcome(task, generation_time=time.time() - start_time,
+                                             error=f"{e} (gave up after {retries} retries)", retries=retries,
+                                             cached=cached)
+
+                delay = backoff_delay(retries, retry_after)
+                retries += 1
+                print(f"⏳ {task.llm.name} iteration [{task.iteration}]: {type(e).__name__}, "
+                      f"retry {retries}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+            except Exception as e:
+                return GenerationOutcome(task, generation_time=time.time() - start_time,
+                                         error=str(e), retries=retries, cached=cached)
+
+        try:
+            if self.stream:
+                # Files were already written while streaming
+                response_content = None
+            else:
+                response_content = answer.choices[0].message.content
+                write_llm_output(task.code_dir, task.response_dir, task.llm.name, response_content)
+            generation_time = time.time() - start_time
+
+            if self.journal:
+                self.journal.mark_completed(task)
+
+            return GenerationOutcome(task, response_content, generation_time, retries=retries,
+                                     request_time=request_time, ttft=ttft, usage=usage, cached=cached)
+
+        except Exception as e:
+            return GenerationOutcome(task, generation_time=time.time() - start_time,
+                                     error=str(e), retries=retries, cached=cached)
+
+    async def _stream_response(self, task: GenerationTask) -> Tuple[Optional[float], Optional[Dict[str, int]]]:
+        """
+        Stream one response into its output files; partial output is discarded on failure.
+
+        Returns:
+            Time to the first content chunk and the token usage reported by the API
+        """
+        on_block = None
+        if self.on_code_block:
+            on_block = lambda code: self.on_code_block(task, code)
+
+        writer = StreamingResponseWriter(task.code_dir, task.response_dir, task.llm.name, on_block)
+        usage = {}
+        ttft = None
+        start_time = time.time()
+        try:
+            async for chunk in task.llm.astream(task.prompt.prompt, seed=task.iteration, usage=usage):
+                if ttft is None and chunk:
+                    ttft = time.time() - start_time
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.finish()
+        return ttft, usage or None
+
+
+def _usage_dict(completion) -> Optional[Dict[str, int]]:
+    if not getattr(completion, "usage", None):
+        return None
+    return completion.usage.model_dump(include={"prompt_tokens", "completion_tokens", "total_tokens"})
@@ -2,11 +2,15 @@ from pathlib import Path
 from typing import Optional, List
 import time
 
-from .config import CHALLENGES
+from .cache import ResponseCache
+from .config import CHALLENGES, MAX_CONCURRENT_REQUESTS, RESPONSE_CACHE_FILE, STREAM_RESPONSES
+from .engine import GenerationEngine, GenerationTask, GenerationOutcome
+from .journal import GenerationJournal, JOURNAL_FILE
 from .llm import Llm
+from .pipeline import run_pipeline
+from .telemetry import summarize_telemetry, print_telemetry_summary, write_telemetry_summary
 from .utils import (
-    create_temp_folder_name, get_iteration_range, create_output_directories,
-    write_generation_metadata, write_llm_output
+    create_temp_folder_name, create_output_directories, write_generation_metadata
 )
 
 
@@ -27,26 +31,116 @@ def find_challenge_and_prompt(challenge_name: str, prompt_name: str) -> tuple[Op
     return target_challenge, target_prompt
 
 
-def create_llms_with_temperature(temperature: float, top_k: int = None, top_p: float = None) -> list:
+def create_llms_with_temperature(temperature: float, top_k: int = None, top_p: float = None,
+                                 models: Optional[List[str]] = None,
+                                 cache: Optional[ResponseCache] = None) -> list:
     """Create LLM instances with specified temperature and sampling parameters."""
     from .config import LLMS
-    return [
+    llms = [
         Llm(llm.model, llm.name, temperature=temperature, top_k=top_k, top_p=top_p)
         for llm in LLMS
+        if models is None or llm.name in models
     ]
+    for llm in llms:
+        llm.cache = cache
+    return llms
+
+
+def open_response_cache(base_dir: str, temperatures: Optional[List[float]] = None) -> ResponseCache:
+    """Open the response cache stored inside the output directory."""
+    project_root = Path(__file__).parent.parent.parent
+    return ResponseCache(project_root / base_dir / RESPONSE_CACHE_FILE, temperatures)
+
+
+def plan_generation_tasks(base_dir: str, challenge, prompt, iteration_range: range,
+                          llms: list, temperature: float) -> List[GenerationTask]:
+    """Create output directories and metadata, returning tasks in model x iteration order."""
+    tasks = []
+    
+    for llm in llms:
+        for i in iteration_range:
+            code_dir, response_dir = create_output_directories(
+                base_dir, challenge.name, prompt.name, i, temperature, llm.top_k, llm.top_p
+            )
+            
+            # Write metadata on first model for this iteration
+            if llm == llms[0]:
+                write_generation_metadata(code_dir, llms, temperature, llm.top_k, llm.top_p)
+            
+            tasks.append(GenerationTask(llm, prompt, challenge.name, i, code_dir, response_dir))
+    
+    return tasks
+
+
+def open_generation_journal(base_dir: str) -> GenerationJournal:
+    """Open the generation journal stored inside the output directory."""
+    project_root = Path(__file__).parent.parent.parent
+    return GenerationJournal(project_root / base_dir / JOURNAL_FILE)
+
+
+def plan_resume_tasks(base_dir: str, pending: List[dict],
+                      cache: Optional[ResponseCache] = None) -> List[GenerationTask]:
+    """Rebuild tasks for journaled units that were planned but never completed."""
+    tasks = []
+    ordered = sorted(pending, key=lambda r: (r["challenge"], r["prompt"], r["temp_folder"], r["model"], r["iteration"]))
+    
+    for record in ordered:
+        challenge, prompt = find_challenge_and_prompt(record["challenge"], record["prompt"])
+        llms = create_llms_with_temperature(
+            record["temperature"], record["top_k"], record["top_p"], models=[record["model"]], cache=cache
+        )
+        if not challenge or not prompt or not llms:
+            print(f"⚠️  Skipping unknown journal unit: {record['unit']}")
+            continue
+        
+        code_dir, response_dir = create_output_directories(
+            base_dir, challenge.name, prompt.name, record["iteration"],
+            record["temperature"], record["top_k"], record["top_p"]
+        )
+        
+        # Metadata covers all models, so only write it if the crash happened before it existed
+        if not (Path(code_dir) / "generation_params.json").exists():
+            all_llms = create_llms_with_temperature(record["temperature"], record["top_k"], record["top_p"])
+            write_generation_metadata(code_dir, all_llms, record["temperature"], record["top_k"], record["top_p"])
+        
+        tasks.append(GenerationTask(llms[0], prompt, challenge.name, record["iteration"], code_dir, response_dir))
+    
+    return tasks
+
+
+def report_telemetry(outcomes: List[GenerationOutcome], base_dir: str) -> None:
+    """Print telemetry for this run and refresh the output directory's telemetry summary."""
+    print_telemetry_summary(summarize_telemetry([o.telemetry_record() for o in outcomes]))
+    summary_file = write_telemetry_summary(base_dir)
+    if summary_file:
+        print(f"📈 Telemetry summary saved to: {summary_file}")
+
+
+def _print_generation_outcome(outcome: GenerationOutcome) -> None:
+    """Progress callback used by the generation engine."""
+    task = outcome.task
+    if outcome.success:
+        print(f"✅ Generated: {task.challenge} - {task.prompt.name} - iteration [{task.iteration}] "
+              f"({task.llm.name}, took {outcome.generation_time:.2f}s)")
+    else:
+        print(f"❌ Error with {task.llm.name} iteration [{task.iteration}]: {outcome.error}")
 
 
 def generate_code_only(challenge_name: str, prompt_name: str, iterations: int = 1, 
                       temperature: float = 1.0, base_dir: str = "dry_run_output", 
-                      top_k: int = None, top_p: float = None) -> None:
+                      top_k: int = None, top_p: float = None,
+                      max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                      cache: Optional[ResponseCache] = None, resume: bool = False,
+                      stream: bool = STREAM_RESPONSES) -> None:
     """Generate code without running tests."""
-    llms = create_llms_with_temperature(temperature, top_k, top_p)
+    llms = create_llms_with_temperature(temperature, top_k, top_p, cache=cache)
     
     print(f"🚀 Generating code: {challenge_name} - {prompt_name}")
     print(f"📁 Output directory: {base_dir}")
     print(f"🔄 Iterations: {iterations}")
     print(f"🌡️  Temperature: {temperature}")
     print(f"🤖 LLMs: {', '.join(llm.name for llm in llms)}")
+    print(f"⚡ Concurrency: {max_concurrency}")
     print("-" * 50)
     
     challenge, prompt = find_challenge_and_prompt(challenge_name, prompt_name)
@@ -58,59 +152,62 @@ def generate_code_only(challenge_name: str, prompt_name: str, iterations: int =
         available_prompts = [p.name for p in challenge.prompts]
         raise ValueError(f"Prompt '{prompt_name}' not found in challenge '{challenge_name}'. Available: {available_prompts}")
     
-    # Calculate iteration range using auto-indexing
     project_root = Path(__file__).parent.parent.parent
     temp_folder = create_temp_folder_name(temperature, llms[0].top_k, llms[0].top_p)
-    temp_folder_path = project_root / base_dir / "code" / challenge.name / prompt.name / temp_folder
-    iteration_range = get_iteration_range(temp_folder_path, iterations)
+    journal = open_generation_journal(base_dir)
     
-    print(f"📝 Will create iterations: {list(iteration_range)}")
+    if resume:
+        pending = journal.pending_units(challenge.name, prompt.name, temp_folder)
+        tasks = plan_resume_tasks(base_dir, pending, cache)
+        print(f"♻️  Resuming {len(tasks)} unfinished units from journal")
+    else:
+        # Calculate iteration range using the journal (auto-indexing for cells it doesn't know)
+        temp_folder_path = project_root / base_dir / "code" / challenge.name / prompt.name / temp_folder
+        iteration_range = journal.iteration_range(temp_folder_path, challenge.name, prompt.name, temp_folder, iterations)
+        
+        print(f"📝 Will create iterations: {list(iteration_range)}")
+        
+        tasks = plan_generation_tasks(base_dir, challenge, prompt, iteration_range, llms, temperature)
     
-    for llm in llms:
-        for i in iteration_range:
-            code_dir, response_dir = create_output_directories(
-                base_dir, challenge.name, prompt.name, i, temperature, llm.top_k, llm.top_p
-            )
-            
-            # Write metadata on first model for this iteration
-            if llm == llms[0]:
-                write_generation_metadata(code_dir, llms, temperature, llm.top_k, llm.top_p)
-            
-            print(f"🔄 Generating: {challenge.name} - {prompt.name} - iteration [{i}] ({llm.name})")
-            
-            try:
-                start_time = time.time()
-                answer = llm.query(prompt.prompt)
-                response_content = answer.choices[0].message.content
-                generation_time = time.time() - start_time
-                
-                write_llm_output(code_dir, response_dir, llm.name, response_content)
-                
-                print(f"✅ Generated: {llm.name} (took {generation_time:.2f}s)")
-                
-            except Exception as e:
-                print(f"❌ Error with {llm.name}: {str(e)}")
-                continue
-    
-    print(f"\n🎉 Code generation completed!")
+    journal.plan(tasks)
+    start_time = time.time()
+    outcomes = GenerationEngine(max_concurrency, journal=journal, stream=stream).run(tasks, on_complete=_print_generation_outcome)
+    
+    failed = len([o for o in outcomes if not o.success])
+    print(f"\n🎉 Code generation completed in {time.time() - start_time:.2f}s "
+          f"({len(outcomes) - failed} succeeded, {failed} failed)")
+    if cache:
+        print(f"💾 Response cache: {cache.hits} hits, {cache.misses} misses")
+    report_telemetry(outcomes, base_dir)
 
 
 def dry_run_with_tests(challenge_name: str, prompt_name: str, iterations: int = 1, 
                       temperature: float = 1.0, test_groups: List[str] = None, 
                       top_k: int = None, top_p: float = None, 
-                      base_dir: str = "dry_run_output") -> None:
-    """Generate code and run tests in one command."""
+                      base_dir: str = "dry_run_output",
+                      max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                      cache: Optional[ResponseCache] = None,
+                      stream: bool = STREAM_RESPONSES, similarity: bool = True) -> None:
+    """
+    Generate code, run tests and compute similarity in one command.
+
+    The stages run as a pipeline: iterations are tested as soon as they are
+    generated, and each model's similarity analysis starts once all of its
+    iterations have been tested.
+    """
     from ..static_analysis.results.experiment_manager import ExperimentManager
     from ..static_analysis.results.data_models import ExperimentConfig, ModelInfo
     from ..static_analysis.execution.test_runner import TestRunner
+    from ..static_analysis.execution.compile_index import CompileIndex, COMPILE_INDEX_FILE
     
-    llms = create_llms_with_temperature(temperature, top_k, top_p)
+    llms = create_llms_with_temperature(temperature, top_k, top_p, cache=cache)
     
     print(f"🧪 Starting dry run: {challenge_name} - {prompt_name}")
     print(f"📁 Output directory: {base_dir}")
     print(f"🔄 Iterations: {iterations}")
     print(f"🌡️  Temperature: {temperature}")
     print(f"🤖 LLMs: {', '.join(llm.name for llm in llms)}")
+    print(f"⚡ Concurrency: {max_concurrency}")
     print("-" * 50)
     
     challenge, prompt = find_challenge_and_prompt(challenge_name, prompt_name)
@@ -124,7 +221,10 @@ def dry_run_with_tests(challenge_name: str, prompt_name: str, iterations: int =
     
     project_root = Path(__file__).parent.parent.parent
     experiment_manager = ExperimentManager(project_root / base_dir / "static_analysis")
-    test_runner = TestRunner(project_root / "code" / "static_analysis" / "test_definitions")
+    # Test and similarity stages share compile results, so each file is compiled once
+    compile_index = CompileIndex(project_root / base_dir / COMPILE_INDEX_FILE)
+    test_runner = TestRunner(project_root / "code" / "static_analysis" / "test_definitions",
+                             compile_index=compile_index)
     
     config = ExperimentConfig(
         models=[ModelInfo(
@@ -141,87 +241,108 @@ def dry_run_with_tests(challenge_name: str, prompt_name: str, iterations: int =
     metadata = experiment_manager.start_experiment(config)
     print(f"📋 Experiment ID: {metadata.experiment_id}")
     
-    # Calculate iteration range using auto-indexing
+    # Calculate iteration range using the journal (auto-indexing for cells it doesn't know)
     temp_folder = create_temp_folder_name(temperature, llms[0].top_k, llms[0].top_p)
     temp_folder_path = project_root / base_dir / "code" / challenge.name / prompt.name / temp_folder
-    iteration_range = get_iteration_range(temp_folder_path, iterations)
+    journal = open_generation_journal(base_dir)
+    iteration_range = journal.iteration_range(temp_folder_path, challenge.name, prompt.name, temp_folder, iterations)
     
     print(f"📝 Will create iterations: {list(iteration_range)}")
     
-    for llm in llms:
-        for i in iteration_range:
-            code_dir, response_dir = create_output_directories(
-                base_dir, challenge.name, prompt.name, i, temperature, llm.top_k, llm.top_p
+    tasks = plan_generation_tasks(base_dir, challenge, prompt, iteration_range, llms, temperature)
+    journal.plan(tasks)
+    # Dispatch iteration by iteration so the first iterations can be tested while later ones generate
+    tasks.sort(key=lambda task: task.iteration)
+    
+    def test_outcome(outcome: GenerationOutcome) -> None:
+        llm = outcome.task.llm
+        i = outcome.task.iteration
+        code_dir = outcome.task.code_dir
+        generation_time = outcome.generation_time
+        
+        try:
+            if not outcome.success:
+                raise RuntimeError(outcome.error)
+            
+            code_path = Path(code_dir) / f"{llm.name}.py"
+            
+            test_results = test_runner.run_all_tests_for_model(
+                llm.name, Path(code_dir), challenge.name, test_groups or ["legacy"]
             )
             
-            # Write metadata on first model for this iteration
-            if llm == llms[0]:
-                write_generation_metadata(code_dir, llms, temperature, llm.top_k, llm.top_p)
+            # Extract metrics based on test groups run
+            metrics_data = {}
+            
+            # Legacy test results (backward compatibility)
+            if "legacy" in (test_groups or ["legacy"]):
+                legacy_results = test_results.get("legacy", {})
+                metrics_data.update({
+                    "compilability": legacy_results.get("1_code_compilability", {}),
+                    "code_length": legacy_results.get("2_code_length_adaptive", {}),
+                    "modularity": legacy_results.get("3_modularity_adaptive", {}),
+                    "functional_completeness": legacy_results.get("4_functional_completeness_adaptive", {}),
+                    "functional_correctness": legacy_results.get("5_functional_correctness", {})
+                })
+            
+            # Advanced test results
+            if "quality" in (test_groups or []):
+                metrics_data["quality"] = test_results.get("quality", {})
             
-            print(f"🔄 Generating: {challenge.name} - {prompt.name} - iteration [{i}] ({llm.name})")
+            if "structure" in (test_groups or []):
+                metrics_data["structure"] = test_results.get("structure", {})
             
-            try:
-                start_time = time.time()
-                answer = llm.query(prompt.prompt)
-                response_content = answer.choices[0].message.content
-                generation_time = time.time() - start_time
-                
-                write_llm_output(code_dir, response_dir, llm.name, response_content)
-                
-                code_path = Path(code_dir) / f"{llm.name}.py"
-                
-                test_results = test_runner.run_all_tests_for_model(
-                    llm.name, Path(code_dir), challenge.name, test_groups or ["legacy"]
-                )
-                
-                # Extract metrics based on test groups run
-                metrics_data = {}
-                
-                # Legacy test results (backward compatibility)
-                if "legacy" in (test_groups or ["legacy"]):
-                    legacy_results = test_results.get("legacy", {})
-                    metrics_data.update({
-                        "compilability": legacy_results.get("1_code_compilability", {}),
-                        "code_length": legacy_results.get("2_code_length_adaptive", {}),
-                        "modularity": legacy_results.get("3_modularity_adaptive", {}),
-                        "functional_completeness": legacy_results.get("4_functional_completeness_adaptive", {}),
-                        "functional_correctness": legacy_results.get("5_functional_correctness", {})
-                    })
-                
-                # Advanced test results
-                if "quality" in (test_groups or []):
-                    metrics_data["quality"] = test_results.get("quality", {})
-                
-                if "structure" in (test_groups or []):
-                    metrics_data["structure"] = test_results.get("structure", {})
-                
-                experiment_manager.add_result(
-                    model=llm.name,
-                    challenge=challenge.name,
-                    prompt=prompt.name,
-                    iteration=i,
-                    metrics_data=metrics_data,
-                    code_path=str(code_path),
-                    execution_time=generation_time,
-                    status="success"
-                )
-                
-                print(f"✅ Completed: {llm.name}")
-                
-            except Exception as e:
-                print(f"❌ Error with {llm.name}: {str(e)}")
-                
-                experiment_manager.add_result(
-                    model=llm.name,
-                    challenge=challenge.name,
-                    prompt=prompt.name,
-                    iteration=i,
-                    metrics_data={},
-                    code_path="",
-                    execution_time=0,
-                    status="failed"
-                )
-                continue
+            if "performance" in (test_groups or []):
+                performance_results = test_results.get("performance", {})
+                metrics_data["time_behaviour"] = performance_results.get("6_time_behaviour", {})
+                metrics_data["memory_usage"] = performance_results.get("8_performance_efficiency-RAM", {})
+            
+            experiment_manager.add_result(
+                model=llm.name,
+                challenge=challenge.name,
+                prompt=prompt.name,
+                iteration=i,
+                metrics_data=metrics_data,
+                code_path=str(code_path),
+                execution_time=generation_time,
+                status="success"
+            )
+            
+            print(f"✅ Completed: {llm.name}")
+            
+        except Exception as e:
+            print(f"❌ Error with {llm.name}: {str(e)}")
+            
+            experiment_manager.add_result(
+                model=llm.name,
+                challenge=challenge.name,
+                prompt=prompt.name,
+                iteration=i,
+                metrics_data={},
+                code_path="",
+                execution_time=0,
+                status="failed"
+            )
     
+    similarity_stage = None
+    if similarity:
+        from ..similarity_analysis.similarity_storage import SimilarityStorage
+        storage = SimilarityStorage(str(project_root / base_dir), compile_index=compile_index)
+        
+        def similarity_stage(key) -> None:
+            model, series_challenge, series_prompt, temperature_folder = key
+            print(f"🔍 Similarity: {model}/{series_challenge}/{series_prompt}/{temperature_folder}")
+            storage.analyze_and_store_temperature(model, series_challenge, series_prompt, temperature_folder)
+    
+    try:
+        outcomes = run_pipeline(
+            tasks, GenerationEngine(max_concurrency, journal=journal, stream=stream),
+            test_stage=test_outcome, similarity_stage=similarity_stage,
+            on_generated=_print_generation_outcome
+        )
+    finally:
+        test_runner.close()
+        compile_index.close()
+    report_telemetry(outcomes, base_dir)
+
     results_path = experiment_manager.finish_experiment()
     print(f"\n🎉 Dry run completed! Results saved to: {results_path}")
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Write-ahead journal for generation runs.
+
+Every (challenge, prompt, temperature, iteration, model) unit is recorded as
+"planned" before it is dispatched and as "completed" once its output files have
+been written atomically. A restarted run can then resume exactly the missing
+units and pick the next iteration number without rescanning the output tree.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .engine import GenerationTask
+from .utils import create_temp_folder_name, find_next_iteration
+
+JOURNAL_FILE = "generation_journal.jsonl"
+
+
+def unit_key(challenge: str, prompt: str, temp_folder: str, iteration: int, model: str) -> str:
+    return f"{challenge}/{prompt}/{temp_folder}/iteration_{iteration}/{model}"
+
+
+def _task_record(task: GenerationTask) -> Dict:
+    llm = task.llm
+    temp_folder = create_temp_folder_name(llm.temperature, llm.top_k, llm.top_p)
+    return {
+        "unit": unit_key(task.challenge, task.prompt.name, temp_folder, task.iteration, llm.name),
+        "challenge": task.challenge,
+        "prompt": task.prompt.name,
+        "temp_folder": temp_folder,
+        "temperature": llm.temperature,
+        "top_k": llm.top_k,
+        "top_p": llm.top_p,
+        "iteration": task.iteration,
+        "model": llm.name,
+    }
+
+
+class GenerationJournal:
+    """Append-only JSONL journal of planned and completed generation units."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.planned: Dict[str, Dict] = {}
+        self.completed = set()
+        self._last_iteration: Dict[Tuple[str, str, str], int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash; everything before it is valid
+                    continue
+
+                if record.get("event") == "planned":
+                    self.planned[record["unit"]] = record
+                    cell = (record["challenge"], record["prompt"], record["temp_folder"])
+                    self._last_iteration[cell] = max(self._last_iteration.get(cell, 0), record["iteration"])
+                elif record.get("event") == "completed":
+                    self.completed.add(record["unit"])
+
+    def _append(self, records: List[Dict]) -> None:
+        if not records:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def iteration_range(self, temp_folder_path: Path, challenge: str, prompt: str,
+                        temp_folder: str, requested_iterations: int) -> range:
+        """Next iteration range for a cell, using the journal and scanning only unknown cells."""
+        last = self._last_iteration.get((challenge, prompt, temp_folder))
+        start = last + 1 if last is not None else find_next_iteration(temp_folder_path)
+        return range(start, start + requested_iterations)
+
+    def plan(self, tasks: List[GenerationTask]) -> None:
+        """Record tasks as planned before they are dispatched."""
+        records = []
+        for task in tasks:
+            record = _task_record(task)
+            if record["unit"] in self.planned:
+                continue
+            record["event"] = "planned"
+            self.planned[record["unit"]] = record
+            cell = (record["challenge"], record["prompt"], record["temp_folder"])
+            self._last_iteration[cell] = max(self._last_iteration.get(cell, 0), record["iteration"])
+            records.append(record)
+        self._append(records)
+
+    def mark_completed(self, task: GenerationTask) -> None:
+        key = _task_record(task)["unit"]
+        if key in self.completed:
+            return
+        self.completed.add(key)
+        self._append([{"event": "completed", "unit": key}])
+
+    def pending_units(self, challenge: Optional[str] = None, prompt: Optional[str] = None,
+                      temp_folder: Optional[str] = None) -> List[Dict]:
+        """Planned but not completed units, optionally restricted to one cell."""
+        pending = []
+        for key, record in self.planned.items():
+            if key in self.completed:
+                continue
+            if challenge is not None and record["challenge"] != challenge:
+                continue
+            if prompt is not None and record["prompt"] != prompt:
+                continue
+            if temp_folder is not None and record["temp_folder"] != temp_folder:
+                continue
+            pending.append(record)
+        return pending
@@ -1,26 +1,32 @@
-import os
-from typing import Optional
-from dotenv import load_dotenv
-from openai import OpenAI
+import time
+from typing import AsyncIterator, Optional
+from openai import OpenAI, AsyncOpenAI
 from openai.types.chat.chat_completion import ChatCompletion
 
-load_dotenv()
+from .client_pool import get_client, get_async_client
 
 
 class Llm:
-    def __init__(self, model: str, name: str, temperature: float = 0.7, 
+    def __init__(self, model: str, name: str, temperature: float = 0.7,
                  top_p: Optional[float] = None, top_k: Optional[int] = None):
         self.model = model
         self.name = name
         self.temperature = temperature
         self.top_p = top_p
         self.top_k = top_k
-        self.client = OpenAI(
-            base_url=os.getenv("OPENROUTER_API_URL"),
-            api_key=os.getenv("OPENROUTER_API_KEY"),
-        )
+        self.cache = None  # Optional ResponseCache, attached by the generator
+
+    @property
+    def client(self) -> OpenAI:
+        """Process-wide client shared by all Llm instances."""
+        return get_client()
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Process-wide async client for the running event loop."""
+        return get_async_client()
 
-    def query(self, question: str, system_prompt: str = "You are an AI assistant.") -> ChatCompletion:
+    def _build_params(self, question: str, system_prompt: str) -> dict:
         params = {
             "model": self.model,
             "messages": [
@@ -29,11 +35,105 @@ class Llm:
             ],
             "temperature": self.temperature,
         }
-        
+
         if self.top_p is not None:
             params["top_p"] = self.top_p
-            
+
         if self.top_k is not None:
             params["extra_body"] = {"top_k": self.top_k}
-        
-        return self.client.chat.completions.create(**params)
+
+        return params
+
+    def _cache_key(self, params: dict, seed: Optional[int]) -> Optional[str]:
+        if self.cache is None or not self.cache.is_enabled_for(self.temperature):
+            return None
+        return self.cache.make_key(params, seed)
+
+    def has_cached_response(self, question: str, system_prompt: str = "You are an AI assistant.",
+                            seed: Optional[int] = None) -> bool:
+        cache_key = self._cache_key(self._build_params(question, system_prompt), seed)
+        return cache_key is not None and self.cache.contains(cache_key)
+
+    def query(self, question: str, system_prompt: str = "You are an AI assistant.",
+              seed: Optional[int] = None) -> ChatCompletion:
+        params = self._build_params(question, system_prompt)
+        cache_key = self._cache_key(params, seed)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        completion = self.client.chat.completions.create(**params)
+        if cache_key:
+            self.cache.put(cache_key, params, completion)
+        return completion
+
+    async def aquery(self, question: str, system_prompt: str = "You are an AI assistant.",
+                     seed: Optional[int] = None) -> ChatCompletion:
+        params = self._build_params(question, system_prompt)
+        cache_key = self._cache_key(params, seed)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        completion = await self.async_client.chat.completions.create(**params)
+        if cache_key:
+            self.cache.put(cache_key, params, completion)
+        return completion
+
+    async def astream(self, question: str, system_prompt: str = "You are an AI assistant.",
+                      seed: Optional[int] = None, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Stream the response content chunk by chunk.
+
+        The full text is only held in memory when the response has to be stored
+        in the cache; a cache hit is replayed as a single chunk. If `usage` is
+        given, it is filled with the token counts reported at the end of the stream.
+        """
+        params = self._build_params(question, system_prompt)
+        cache_key = self._cache_key(params, seed)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if usage is not None and cached.usage:
+                    usage.update(cached.usage.model_dump(include={"prompt_tokens", "completion_tokens", "total_tokens"}))
+                yield cached.choices[0].message.content or ""
+                return
+
+        stream = await self.async_client.chat.completions.create(
+            **params, stream=True, stream_options={"include_usage": True}
+        )
+        parts = [] if cache_key else None
+        reported_usage = None
+        async for chunk in stream:
+            if chunk.usage:
+                reported_usage = chunk.usage.model_dump(include={"prompt_tokens", "completion_tokens", "total_tokens"})
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if parts is not None:
+                    parts.append(delta)
+                yield delta
+
+        if usage is not None and reported_usage:
+            usage.update(reported_usage)
+        if cache_key:
+            self.cache.put(cache_key, params, _completion_from_text(self.model, "".join(parts), reported_usage))
+
+
+def _completion_from_text(model: str, content: str, usage: Optional[dict] = None) -> ChatCompletion:
+    """Build a ChatCompletion for a streamed response so it can be cached."""
+    return ChatCompletion.model_validate({
+        "id": f"stream-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+        "usage": usage,
+    })
@@ -0,0 +1,254 @@
+"""
+Local OpenAI-compatible stand-in server for offline load testing.
+
+Replays stored responses from `<output dir>/response/` for POST requests to
+`.../chat/completions`, with configurable latency, server errors, 429s and SSE
+streaming. Point the generator at it with
+`OPENROUTER_API_URL=http://127.0.0.1:<port>/v1`.
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass
+class MockServerConfig:
+    """Behaviour of the mock server."""
+    response_dir: str = "dry_run_output/response"
+    latency: float = 0.5
+    latency_distribution: str = "lognormal"
+    latency_spread: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    stream_chunk_size: int = 64
+    stream_chunk_delay: float = 0.0
+    seed: Optional[int] = None
+
+
+class ResponseLibrary:
+    """Stored responses grouped by model name, replayed round-robin."""
+
+    def __init__(self, response_dir: Path, model_names: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            response_dir: Directory tree containing `<model>_response.txt` files
+            model_names: Mapping of API model ids to model names (defaults to config LLMS)
+        """
+        if model_names is None:
+            from .config import LLMS
+            model_names = {llm.model: llm.name for llm in LLMS}
+        self.model_names = model_names
+
+        self.responses: Dict[str, List[Path]] = {}
+        for path in sorted(Path(response_dir).rglob("*_response.txt")):
+            name = path.name[:-len("_response.txt")]
+            self.responses.setdefault(name, []).append(path)
+        if not self.responses:
+            raise ValueError(f"No stored responses found in {response_dir}")
+
+        all_paths = [path for paths in self.responses.values() for path in paths]
+        self._cycles = {name: itertools.cycle(paths) for name, paths in self.responses.items()}
+        self._fallback = itertools.cycle(all_paths)
+        self._lock = threading.Lock()
+
+    def next_response(self, model: str) -> str:
+        name = self.model_names.get(model, model)
+        with self._lock:
+            path = next(self._cycles.get(name, self._fallback))
+        return path.read_text(encoding="utf-8")
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough average for English text and code
+    return max(1, len(text) // 4)
+
+
+class MockServer:
+    """Threaded HTTP server speaking the subset of the chat completions API used by `Llm`."""
+
+    def __init__(self, config: MockServerConfig, host: str = "127.0.0.1", port: int = 0,
+                 library: Optional[ResponseLibrary] = None):
+        if config.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{config.latency_distribution}'. "
+                             f"Available: {list(LATENCY_DISTRIBUTIONS)}")
+
+        self.config = config
+        if library is None:
+            response_dir = Path(config.response_dir)
+            if not response_dir.is_absolute():
+                response_dir = Path(__file__).parent.parent.parent / response_dir
+            library = ResponseLibrary(response_dir)
+        self.library = library
+        self.random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+        self.stats = {"requests": 0, "completed": 0, "errors": 0, "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+
+        handler = type("MockHandler", (_MockHandler,), {"mock": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def sample_latency(self) -> float:
+        config = self.config
+        with self._random_lock:
+            if config.latency_distribution == "fixed":
+                return config.latency
+            if config.latency_distribution == "uniform":
+                spread = config.latency * config.latency_spread
+                return max(0.0, self.random.uniform(config.latency - spread, config.latency + spread))
+            # Log-normal with the configured median, giving a realistic long tail
+            return self.random.lognormvariate(0.0, config.latency_spread) * config.latency
+
+    def sample_failure(self) -> Optional[Tuple[int, str]]:
+        with self._random_lock:
+            roll = self.random.random()
+        if roll < self.config.rate_limit_rate:
+            return 429, "rate_limit_error"
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return 500, "server_error"
+        return None
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock: MockServer = None
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        mock = self.mock
+        mock.count("requests")
+        time.sleep(mock.sample_latency())
+
+        failure = mock.sample_failure()
+        if failure:
+            status, error_type = failure
+            headers = {}
+            if status == 429:
+                mock.count("rate_limited")
+                headers["Retry-After"] = f"{mock.config.retry_after:g}"
+            else:
+                mock.count("errors")
+            self._send_json(status, {"error": {"message": f"Mock {error_type}", "type": error_type, "code": status}},
+                            headers)
+            return
+
+        model = request.get("model", "unknown")
+        content = mock.library.next_response(model)
+        prompt_tokens = _estimate_tokens(json.dumps(request.get("messages", [])))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _estimate_tokens(content),
+            "total_tokens": prompt_tokens + _estimate_tokens(content),
+        }
+
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._send_stream(model, content, usage if include_usage else None)
+        else:
+            self._send_json(200, {
+                "id": f"chatcmpl-mock-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": usage,
+            })
+        mock.count("completed")
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, model: str, content: str, usage: Optional[dict]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def event(choices: list, extra: Optional[dict] = None) -> bytes:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": choices}
+            chunk.update(extra or {})
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        size = max(1, self.mock.config.stream_chunk_size)
+        self._write_chunk(event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]))
+        for start in range(0, len(content), size):
+            if self.mock.config.stream_chunk_delay:
+                time.sleep(self.mock.config.stream_chunk_delay)
+            piece = content[start:start + size]
+            self._write_chunk(event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+        self._write_chunk(event([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if usage:
+            self._write_chunk(event([], {"usage": usage}))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
@@ -0,0 +1,110 @@
+"""
+Staged generate -> test -> similarity pipeline for the `full` command.
+
+Generation runs on its own event loop in a background thread, tests run in the
+calling thread and similarity runs in a worker thread. Stages are connected by
+bounded queues, so tests of finished iterations overlap with generation of the
+next ones, and similarity for a model's temperature cell starts as soon as its
+last iteration has been tested.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import PIPELINE_QUEUE_SIZE
+from .engine import GenerationEngine, GenerationOutcome, GenerationTask
+from .utils import create_temp_folder_name
+
+# (model, challenge, prompt, temperature folder)
+SeriesKey = Tuple[str, str, str, str]
+
+_DONE = object()
+
+
+def series_key(task: GenerationTask) -> SeriesKey:
+    llm = task.llm
+    return llm.name, task.challenge, task.prompt.name, create_temp_folder_name(llm.temperature, llm.top_k, llm.top_p)
+
+
+def run_pipeline(tasks: List[GenerationTask], engine: GenerationEngine,
+                 test_stage: Callable[[GenerationOutcome], None],
+                 similarity_stage: Optional[Callable[[SeriesKey], None]] = None,
+                 on_generated: Optional[Callable[[GenerationOutcome], None]] = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE) -> List[GenerationOutcome]:
+    """
+    Run generation, testing and similarity as overlapping stages.
+
+    Args:
+        tasks: Generation tasks, best ordered iteration by iteration so tests can start early
+        engine: Engine used for the generation stage
+        test_stage: Called in the calling thread for every outcome, in completion order
+        similarity_stage: Called in a worker thread once per series whose tasks have all been tested
+        on_generated: Progress callback for finished generations (runs on the event loop)
+        queue_size: Capacity of the queues between stages
+
+    Returns:
+        Generation outcomes in the same order as `tasks`
+    """
+    test_queue = queue.Queue(maxsize=max(1, queue_size))
+    similarity_queue = queue.Queue(maxsize=max(1, queue_size))
+    generation_result: Dict[str, object] = {}
+
+    async def enqueue(outcome: GenerationOutcome) -> None:
+        if on_generated:
+            on_generated(outcome)
+        # Wait for queue space off the event loop so in-flight requests keep streaming
+        await asyncio.to_thread(test_queue.put, outcome)
+
+    def generate() -> None:
+        try:
+            generation_result["outcomes"] = asyncio.run(engine.run_async(tasks, on_complete=enqueue))
+        except BaseException as e:
+            generation_result["error"] = e
+        finally:
+            test_queue.put(_DONE)
+
+    def analyze() -> None:
+        while True:
+            key = similarity_queue.get()
+            if key is _DONE:
+                return
+            try:
+                similarity_stage(key)
+            except Exception as e:
+                print(f"❌ Similarity error for {'/'.join(key)}: {e}")
+
+    remaining: Dict[SeriesKey, int] = {}
+    for task in tasks:
+        key = series_key(task)
+        remaining[key] = remaining.get(key, 0) + 1
+
+    generator_thread = threading.Thread(target=generate, name="pipeline-generate", daemon=True)
+    similarity_thread = None
+    if similarity_stage:
+        similarity_thread = threading.Thread(target=analyze, name="pipeline-similarity", daemon=True)
+        similarity_thread.start()
+    generator_thread.start()
+
+    try:
+        while True:
+            outcome = test_queue.get()
+            if outcome is _DONE:
+                break
+
+            test_stage(outcome)
+
+            key = series_key(outcome.task)
+            remaining[key] -= 1
+            if remaining[key] == 0 and similarity_thread:
+                similarity_queue.put(key)
+    finally:
+        if similarity_thread:
+            similarity_queue.put(_DONE)
+            similarity_thread.join()
+
+    generator_thread.join()
+    if "error" in generation_result:
+        raise generation_result["error"]
+    return generation_result["outcomes"]
@@ -0,0 +1,135 @@
+"""
+Adaptive per-provider rate limiting and retry backoff for OpenRouter calls.
+
+Each provider prefix of `Llm.model` (openai/anthropic/google) gets its own token
+bucket. Successful calls slowly raise the refill rate, while 429 responses halve
+it and pause the bucket for the Retry-After interval (AIMD), so concurrent
+sweeps settle at the highest rate each provider sustains.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import openai
+
+from .config import PROVIDER_RATE_LIMITS, DEFAULT_RATE_LIMIT, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+
+# Errors that are worth retrying; anything else is a permanent failure
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def provider_of(model: str) -> str:
+    return model.split('/')[0] if '/' in model else "unknown"
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Extract a Retry-After delay in seconds from an API error, if present."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Jittered exponential backoff, never shorter than the server's Retry-After."""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """Async token bucket whose refill rate adapts to rate-limit feedback."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 min_rate: Optional[float] = None, max_rate: Optional[float] = None,
+                 decrease_cooldown: float = 2.0):
+        """
+        Args:
+            rate: Initial refill rate in requests per second
+            capacity: Maximum burst size (defaults to max(1, rate))
+            min_rate: Lower bound for the adaptive rate (defaults to 1/8 of the initial rate)
+            max_rate: Upper bound for the adaptive rate (defaults to 4x the initial rate)
+            decrease_cooldown: Seconds during which further 429s do not lower the rate again,
+                so a burst of concurrent rejections counts as a single congestion signal
+        """
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.decrease_cooldown = decrease_cooldown
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self) -> None:
+        # Additive increase of 5% of the initial rate per successful call
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 80)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+        # Multiplicative decrease, at most once per cooldown window
+        if now - self.last_decrease >= self.decrease_cooldown:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.last_decrease = now
+
+
+class ProviderRateLimiter:
+    """Token buckets keyed by provider prefix."""
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None):
+        self.limits = PROVIDER_RATE_LIMITS if limits is None else limits
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, model: str) -> TokenBucket:
+        provider = provider_of(model)
+        if provider not in self.buckets:
+            self.buckets[provider] = TokenBucket(self.limits.get(provider, DEFAULT_RATE_LIMIT))
+        return self.buckets[provider]
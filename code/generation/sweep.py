@@ -0,0 +1,181 @@
+"""
+Full-sweep scheduler for the temperature x model x challenge x prompt matrix.
+
+All cells are planned up front and dispatched through a single GenerationEngine
+run, so the whole experiment shares one work queue and one concurrency budget.
+"""
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import (
+    CHALLENGES, LLMS, SWEEP_TEMPERATURES, DRY_RUN_PROMPT, MAX_CONCURRENT_REQUESTS, STREAM_RESPONSES
+)
+from .cache import ResponseCache
+from .engine import GenerationEngine, GenerationTask, GenerationOutcome
+from .generator import (
+    find_challenge_and_prompt, create_llms_with_temperature, plan_generation_tasks,
+    open_generation_journal, plan_resume_tasks, report_telemetry
+)
+from .journal import GenerationJournal
+from .utils import create_temp_folder_name
+
+
+@dataclass
+class SweepSpec:
+    """Matrix specification for a sweep run."""
+    temperatures: List[float] = field(default_factory=lambda: list(SWEEP_TEMPERATURES))
+    models: List[str] = field(default_factory=lambda: [llm.name for llm in LLMS])
+    challenges: List[str] = field(default_factory=lambda: [c.name for c in CHALLENGES])
+    prompts: List[str] = field(default_factory=lambda: [DRY_RUN_PROMPT])
+    iterations: int = 1
+    top_k: Optional[int] = None
+    top_p: Optional[float] = None
+
+    def cells(self) -> List[Tuple[str, str, float]]:
+        """Return (challenge, prompt, temperature) cells in scheduling order."""
+        return [
+            (challenge, prompt, temperature)
+            for challenge in self.challenges
+            for prompt in self.prompts
+            for temperature in self.temperatures
+        ]
+
+
+class SweepProgress:
+    """Progress accounting across all cells of a sweep."""
+
+    def __init__(self, tasks: List[GenerationTask]):
+        self.total = len(tasks)
+        self.completed = 0
+        self.failed = 0
+        self.start_time = time.time()
+        self.cell_remaining: Dict[Tuple[str, str, str], int] = {}
+        for task in tasks:
+            key = self._cell_key(task)
+            self.cell_remaining[key] = self.cell_remaining.get(key, 0) + 1
+
+    @staticmethod
+    def _cell_key(task: GenerationTask) -> Tuple[str, str, str]:
+        return task.challenge, task.prompt.name, create_temp_folder_name(
+            task.llm.temperature, task.llm.top_k, task.llm.top_p
+        )
+
+    def __call__(self, outcome: GenerationOutcome) -> None:
+        task = outcome.task
+        self.completed += 1
+        if not outcome.success:
+            self.failed += 1
+
+        key = self._cell_key(task)
+        self.cell_remaining[key] -= 1
+
+        status = "✅" if outcome.success else "❌"
+        detail = f"{outcome.generation_time:.2f}s" if outcome.success else outcome.error
+        print(f"{status} [{self.completed}/{self.total}] {task.challenge} - {task.prompt.name} - "
+              f"{key[2]} - iteration [{task.iteration}] ({task.llm.name}, {detail})")
+
+        if self.cell_remaining[key] == 0:
+            print(f"🏁 Cell finished: {task.challenge}/{task.prompt.name}/{key[2]}")
+
+    def summary(self) -> str:
+        elapsed = time.time() - self.start_time
+        return (f"{self.completed - self.failed} succeeded, {self.failed} failed "
+                f"of {self.total} in {elapsed:.2f}s")
+
+
+def validate_sweep_spec(spec: SweepSpec) -> None:
+    """Raise ValueError if the spec references unknown models, challenges or prompts."""
+    available_models = [llm.name for llm in LLMS]
+    unknown_models = [m for m in spec.models if m not in available_models]
+    if unknown_models:
+        raise ValueError(f"Unknown models {unknown_models}. Available: {available_models}")
+
+    for challenge_name in spec.challenges:
+        for prompt_name in spec.prompts:
+            challenge, prompt = find_challenge_and_prompt(challenge_name, prompt_name)
+            if not challenge:
+                raise ValueError(f"Challenge '{challenge_name}' not found. Available: {[c.name for c in CHALLENGES]}")
+            if not prompt:
+                available_prompts = [p.name for p in challenge.prompts]
+                raise ValueError(f"Prompt '{prompt_name}' not found in challenge '{challenge_name}'. Available: {available_prompts}")
+
+    if spec.iterations < 1:
+        raise ValueError("Iterations must be at least 1")
+
+
+def plan_sweep(spec: SweepSpec, base_dir: str = "dry_run_output",
+               cache: Optional[ResponseCache] = None,
+               journal: Optional[GenerationJournal] = None) -> List[GenerationTask]:
+    """Plan generation tasks for every cell of the sweep matrix."""
+    project_root = Path(__file__).parent.parent.parent
+    journal = journal or open_generation_journal(base_dir)
+    tasks = []
+
+    for challenge_name, prompt_name, temperature in spec.cells():
+        challenge, prompt = find_challenge_and_prompt(challenge_name, prompt_name)
+        llms = create_llms_with_temperature(
+            temperature, spec.top_k, spec.top_p, models=spec.models, cache=cache
+        )
+
+        temp_folder = create_temp_folder_name(temperature, spec.top_k, spec.top_p)
+        temp_folder_path = project_root / base_dir / "code" / challenge.name / prompt.name / temp_folder
+        iteration_range = journal.iteration_range(
+            temp_folder_path, challenge.name, prompt.name, temp_folder, spec.iterations
+        )
+
+        tasks.extend(plan_generation_tasks(base_dir, challenge, prompt, iteration_range, llms, temperature))
+
+    return tasks
+
+
+def plan_sweep_resume(spec: SweepSpec, base_dir: str, journal: GenerationJournal,
+                      cache: Optional[ResponseCache] = None) -> List[GenerationTask]:
+    """Tasks for journaled units of the sweep matrix that never completed."""
+    pending = []
+    for challenge_name, prompt_name, temperature in spec.cells():
+        temp_folder = create_temp_folder_name(temperature, spec.top_k, spec.top_p)
+        pending.extend(
+            record for record in journal.pending_units(challenge_name, prompt_name, temp_folder)
+            if record["model"] in spec.models
+        )
+    return plan_resume_tasks(base_dir, pending, cache)
+
+
+def run_sweep(spec: SweepSpec, base_dir: str = "dry_run_output",
+              max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+              cache: Optional[ResponseCache] = None,
+              resume: bool = False, stream: bool = STREAM_RESPONSES) -> List[GenerationOutcome]:
+    """Generate code for the full sweep matrix through one shared work queue."""
+    validate_sweep_spec(spec)
+    cells = spec.cells()
+
+    print(f"🧮 Starting sweep: {len(cells)} cells")
+    print(f"📁 Output directory: {base_dir}")
+    print(f"🎯 Challenges: {', '.join(spec.challenges)}")
+    print(f"📝 Prompts: {', '.join(spec.prompts)}")
+    print(f"🌡️  Temperatures: {', '.join(str(t) for t in spec.temperatures)}")
+    print(f"🤖 LLMs: {', '.join(spec.models)}")
+    print(f"🔄 Iterations per cell: {spec.iterations}")
+    print(f"⚡ Concurrency: {max_concurrency}")
+    print("-" * 50)
+
+    journal = open_generation_journal(base_dir)
+    if resume:
+        tasks = plan_sweep_resume(spec, base_dir, journal, cache)
+        print(f"♻️  Resuming {len(tasks)} unfinished units from journal")
+    else:
+        tasks = plan_sweep(spec, base_dir, cache, journal)
+        print(f"📋 Planned {len(tasks)} generation requests")
+    journal.plan(tasks)
+
+    progress = SweepProgress(tasks)
+    outcomes = GenerationEngine(max_concurrency, journal=journal, stream=stream).run(tasks, on_complete=progress)
+
+    print(f"\n🎉 Sweep completed: {progress.summary()}")
+    if cache:
+        print(f"💾 Response cache: {cache.hits} hits, {cache.misses} misses")
+    report_telemetry(outcomes, base_dir)
+    return outcomes
@@ -0,0 +1,145 @@
+"""
+Per-call generation telemetry.
+
+Every generation call records time-to-first-token (streaming only), request
+latency, end-to-end time, token usage and retries in
+`generation_telemetry.json` next to `generation_params.json`. Records are
+aggregated per model and temperature folder to size concurrency and spot slow
+providers in large sweeps.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import atomic_write_text
+
+TELEMETRY_FILE = "generation_telemetry.json"
+TELEMETRY_SUMMARY_FILE = "telemetry_summary.json"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+
+def write_generation_telemetry(code_dir: str, llm_name: str, record: Dict) -> None:
+    """Add or replace one model's telemetry record in the iteration's telemetry file."""
+    telemetry_file = Path(code_dir) / TELEMETRY_FILE
+    telemetry = {"models": {}}
+    if telemetry_file.exists():
+        try:
+            with open(telemetry_file, "r", encoding="utf-8") as f:
+                telemetry = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            pass
+
+    telemetry.setdefault("models", {})[llm_name] = record
+    atomic_write_text(telemetry_file, json.dumps(telemetry, indent=2))
+
+
+def load_telemetry_records(base_dir: str) -> List[Dict]:
+    """Load all telemetry records stored under `<base_dir>/code`."""
+    project_root = Path(__file__).parent.parent.parent
+    code_base = project_root / base_dir / "code"
+    records = []
+
+    for telemetry_file in sorted(code_base.glob(f"*/*/*/iteration_*/{TELEMETRY_FILE}")):
+        try:
+            with open(telemetry_file, "r", encoding="utf-8") as f:
+                telemetry = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️  Skipping unreadable telemetry file {telemetry_file}: {e}")
+            continue
+
+        temp_folder = telemetry_file.parent.parent.name
+        for name, record in telemetry.get("models", {}).items():
+            records.append({"model": name, "temp_folder": temp_folder, **record})
+
+    return records
+
+
+def summarize_telemetry(records: List[Dict]) -> Dict[str, Dict]:
+    """
+    Aggregate telemetry records per model and temperature folder.
+
+    Latency, TTFT and throughput only count successful calls that reached the
+    API; cache replays are counted separately.
+
+    Returns:
+        Dict keyed by "<model>/<temp_folder>"
+    """
+    groups: Dict[str, List[Dict]] = {}
+    for record in records:
+        groups.setdefault(f"{record['model']}/{record['temp_folder']}", []).append(record)
+
+    summary = {}
+    for key in sorted(groups):
+        group = groups[key]
+        live = [r for r in group if r.get("status") == "success" and not r.get("cached")]
+        latencies = [r["latency"] for r in live if r.get("latency") is not None]
+        ttfts = [r["ttft"] for r in live if r.get("ttft") is not None]
+        completion_tokens = [r["completion_tokens"] for r in live if r.get("completion_tokens") is not None]
+        prompt_tokens = [r["prompt_tokens"] for r in live if r.get("prompt_tokens") is not None]
+
+        summary[key] = {
+            "model": group[0]["model"],
+            "temp_folder": group[0]["temp_folder"],
+            "calls": len(group),
+            "failed": len([r for r in group if r.get("status") != "success"]),
+            "cached": len([r for r in group if r.get("cached")]),
+            "retries": sum(r.get("retries") or 0 for r in group),
+            "latency": latency_summary(latencies),
+            "ttft": latency_summary(ttfts) if ttfts else None,
+            "prompt_tokens": sum(prompt_tokens),
+            "completion_tokens": sum(completion_tokens),
+            "mean_completion_tokens": round(sum(completion_tokens) / len(completion_tokens), 1) if completion_tokens else 0.0,
+            "completion_tokens_per_second": round(sum(completion_tokens) / sum(latencies), 2)
+            if completion_tokens and sum(latencies) > 0 else 0.0,
+        }
+
+    return summary
+
+
+def print_telemetry_summary(summary: Dict[str, Dict]) -> None:
+    if not summary:
+        return
+
+    print("\n📈 Generation telemetry (per model / temperature):")
+    for key, stats in summary.items():
+        latency = stats["latency"]
+        line = (f"   {key}: {stats['calls']} calls ({stats['failed']} failed, {stats['cached']} cached, "
+                f"{stats['retries']} retries), latency p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s")
+        if stats["ttft"]:
+            line += f", TTFT p50 {stats['ttft']['p50']:.2f}s"
+        if stats["completion_tokens"]:
+            line += (f", {stats['mean_completion_tokens']:.0f} tokens/call, "
+                     f"{stats['completion_tokens_per_second']:.1f} tokens/s")
+        print(line)
+
+
+def write_telemetry_summary(base_dir: str) -> Optional[Path]:
+    """Aggregate all telemetry in the output directory into `telemetry_summary.json`."""
+    records = load_telemetry_records(base_dir)
+    if not records:
+        return None
+
+    project_root = Path(__file__).parent.parent.parent
+    summary_file = project_root / base_dir / TELEMETRY_SUMMARY_FILE
+    atomic_write_text(summary_file, json.dumps(summarize_telemetry(records), indent=2))
+    return summary_file
@@ -1,9 +1,28 @@
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 import json
+import os
+import tempfile
 from datetime import datetime
 
 
+def atomic_write_text(path: Path, content: str) -> None:
+    """Write text to a temporary file in the same directory and rename it into place."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
 def create_temp_folder_name(temperature: float, top_k: int = None, top_p: float = None) -> str:
     """Create temperature folder name with optional top_k and top_p parameters."""
     folder_name = f"temp_{temperature}"
@@ -80,8 +99,7 @@ def write_generation_metadata(code_dir: str, llms: list, temperature: float, top
         }
     
     metadata_file = Path(code_dir) / "generation_params.json"
-    with open(metadata_file, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2)
+    atomic_write_text(metadata_file, json.dumps(metadata, indent=2))
 
 
 def write_llm_output(code_dir: str, response_dir: str, llm_name: str, response_content: str) -> None:
@@ -89,9 +107,51 @@ def write_llm_output(code_dir: str, response_dir: str, llm_name: str, response_c
     from ..utils.helpers import extract_python_code
     
     response_file = Path(response_dir) / f"{llm_name}_response.txt"
-    with open(response_file, "w", encoding="utf-8") as f:
-        f.write(response_content)
+    atomic_write_text(response_file, response_content)
     
     code_file = Path(code_dir) / f"{llm_name}.py"
-    with open(code_file, "w", encoding="utf-8") as f:
-        f.write(extract_python_code(response_content))
\ No newline at end of file
+    atomic_write_text(code_file, extract_python_code(response_content))
+
+
+class StreamingResponseWriter:
+    """
+    Write a streamed LLM response to disk as it arrives.
+
+    The raw response is appended to a temporary file next to the final response
+    file and code blocks are extracted incrementally, so memory use does not grow
+    with the length of the response. `finish` renames the response into place and
+    writes the code file, producing the same files as `write_llm_output`.
+    """
+
+    def __init__(self, code_dir: str, response_dir: str, llm_name: str,
+                 on_code_block: Optional[Callable[[str], None]] = None):
+        from ..utils.helpers import StreamingCodeExtractor
+        self.response_file = Path(response_dir) / f"{llm_name}_response.txt"
+        self.code_file = Path(code_dir) / f"{llm_name}.py"
+        self.extractor = StreamingCodeExtractor(on_code_block)
+        self.chars_written = 0
+
+        fd, self._tmp_path = tempfile.mkstemp(
+            dir=str(self.response_file.parent), prefix=f".{self.response_file.name}.", suffix=".tmp"
+        )
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write(self, chunk: str) -> None:
+        self._file.write(chunk)
+        self.extractor.feed(chunk)
+        self.chars_written += len(chunk)
+
+    def finish(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.chmod(self._tmp_path, 0o644)
+        os.replace(self._tmp_path, self.response_file)
+        atomic_write_text(self.code_file, self.extractor.code)
+
+    def abort(self) -> None:
+        """Discard a partially streamed response."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
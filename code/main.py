@@ -11,11 +11,22 @@ from code.generation.config import (
     DRY_RUN_CHALLENGE,
     DRY_RUN_PROMPT,
     DRY_RUN_ITERATIONS,
-    DRY_RUN_OUTPUT_DIR
+    DRY_RUN_OUTPUT_DIR,
+    MAX_CONCURRENT_REQUESTS,
+    LLMS,
+    SWEEP_TEMPERATURES,
+    RESPONSE_CACHE_TEMPERATURES,
+    STREAM_RESPONSES,
+    MOCK_SERVER_PORT,
+    BENCHMARK_REQUESTS
 )
-from code.generation.generator import generate_code_only, dry_run_with_tests
-from code.static_analysis.test_analyzer import test_existing_code
+from code.generation.generator import generate_code_only, dry_run_with_tests, open_response_cache
+from code.generation.sweep import SweepSpec, run_sweep
+from code.generation.mock_server import MockServer, MockServerConfig, LATENCY_DISTRIBUTIONS
+from code.generation.benchmark import run_generation_benchmark
+from code.static_analysis.test_analyzer import test_existing_code, DEFAULT_TEST_WORKERS
 from code.similarity_analysis.runner import run_similarity_analysis
+from code.similarity_analysis.similarity_storage import DEFAULT_SIMILARITY_WORKERS
 
 
 def require_sudo():
@@ -24,9 +35,116 @@ def require_sudo():
         print("❌ Error: This command requires sudo privileges")
         print("   Run with: sudo uv run python main.py generate ...")
         print("   Or:       sudo uv run python main.py full ...")
+        print("   Or:       sudo uv run python main.py sweep ...")
         sys.exit(1)
 
 
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add response cache options to a generation command parser."""
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Replay cached LLM responses from disk and store new ones"
+    )
+    parser.add_argument(
+        "--cache-temperatures",
+        type=float,
+        nargs="+",
+        default=RESPONSE_CACHE_TEMPERATURES,
+        help=f"Temperatures for which the cache is used (default: {' '.join(str(t) for t in RESPONSE_CACHE_TEMPERATURES)})"
+    )
+
+
+def add_stream_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the streaming option to a generation command parser."""
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=STREAM_RESPONSES,
+        help="Stream responses to disk and extract code blocks as they arrive"
+    )
+
+
+def add_mock_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add mock server behaviour options to a command parser."""
+    defaults = MockServerConfig()
+    parser.add_argument(
+        "--response-dir",
+        type=str,
+        default=defaults.response_dir,
+        help=f"Directory with stored responses to replay (default: {defaults.response_dir})"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=defaults.latency,
+        help=f"Median response latency in seconds (default: {defaults.latency})"
+    )
+    parser.add_argument(
+        "--latency-distribution",
+        choices=LATENCY_DISTRIBUTIONS,
+        default=defaults.latency_distribution,
+        help=f"Latency distribution (default: {defaults.latency_distribution})"
+    )
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=defaults.latency_spread,
+        help=f"Relative spread (uniform) or sigma (lognormal) of the latency (default: {defaults.latency_spread})"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=defaults.error_rate,
+        help="Fraction of requests answered with HTTP 500 (default: 0)"
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=defaults.rate_limit_rate,
+        help="Fraction of requests answered with HTTP 429 (default: 0)"
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=defaults.retry_after,
+        help=f"Retry-After seconds sent with 429 responses (default: {defaults.retry_after})"
+    )
+    parser.add_argument(
+        "--stream-chunk-size",
+        type=int,
+        default=defaults.stream_chunk_size,
+        help=f"Characters per streamed chunk (default: {defaults.stream_chunk_size})"
+    )
+    parser.add_argument(
+        "--stream-chunk-delay",
+        type=float,
+        default=defaults.stream_chunk_delay,
+        help="Delay in seconds between streamed chunks (default: 0)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed for latency and failure sampling (optional)"
+    )
+
+
+def mock_server_config_from_args(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        response_dir=args.response_dir,
+        latency=args.latency,
+        latency_distribution=args.latency_distribution,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        stream_chunk_size=args.stream_chunk_size,
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.seed
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Generate and test code using LLMs for quality comparison research",
@@ -80,6 +198,86 @@ def main() -> None:
         default=DRY_RUN_OUTPUT_DIR,
         help=f"Output directory (default: {DRY_RUN_OUTPUT_DIR})"
     )
+    gen_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"Maximum concurrent LLM requests (default: {MAX_CONCURRENT_REQUESTS})"
+    )
+    add_cache_arguments(gen_parser)
+    add_stream_argument(gen_parser)
+    gen_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Re-run only journaled units that were planned but never completed"
+    )
+    
+    # Sweep command (full generation matrix as one job)
+    sweep_parser = subparsers.add_parser('sweep', help='Generate code for a full temperature x model x challenge x prompt matrix')
+    sweep_parser.add_argument(
+        "--temperatures",
+        type=float,
+        nargs="+",
+        default=SWEEP_TEMPERATURES,
+        help=f"Temperatures to sweep (default: {' '.join(str(t) for t in SWEEP_TEMPERATURES)})"
+    )
+    sweep_parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=[llm.name for llm in LLMS],
+        default=[llm.name for llm in LLMS],
+        help="Models to include (default: all)"
+    )
+    sweep_parser.add_argument(
+        "--challenges",
+        nargs="+",
+        choices=[c.name for c in CHALLENGES],
+        default=[c.name for c in CHALLENGES],
+        help="Challenges to include (default: all)"
+    )
+    sweep_parser.add_argument(
+        "--prompts",
+        nargs="+",
+        default=[DRY_RUN_PROMPT],
+        help=f"Prompts to include (default: {DRY_RUN_PROMPT})"
+    )
+    sweep_parser.add_argument(
+        "--iterations",
+        type=int,
+        default=DRY_RUN_ITERATIONS,
+        help=f"Number of iterations per cell (default: {DRY_RUN_ITERATIONS})"
+    )
+    sweep_parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="Top-k sampling parameter (optional)"
+    )
+    sweep_parser.add_argument(
+        "--top-p",
+        type=float,
+        default=None,
+        help="Top-p (nucleus) sampling parameter (optional)"
+    )
+    sweep_parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=DRY_RUN_OUTPUT_DIR,
+        help=f"Output directory (default: {DRY_RUN_OUTPUT_DIR})"
+    )
+    sweep_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"Maximum concurrent LLM requests (default: {MAX_CONCURRENT_REQUESTS})"
+    )
+    add_cache_arguments(sweep_parser)
+    add_stream_argument(sweep_parser)
+    sweep_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Re-run only journaled units that were planned but never completed"
+    )
     
     # Comparison command
     comp_parser = subparsers.add_parser('compare', help='Run similarity comparison analysis')
@@ -99,6 +297,12 @@ def main() -> None:
         action="store_true",
         help="Export visualization data after analysis"
     )
+    comp_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_SIMILARITY_WORKERS,
+        help=f"Parallel comparison worker processes (default: {DEFAULT_SIMILARITY_WORKERS}, number of CPUs)"
+    )
     
     # Test command
     test_parser = subparsers.add_parser('test', help='Test existing generated code')
@@ -111,13 +315,25 @@ def main() -> None:
     test_parser.add_argument(
         "--test-groups",
         nargs="*",
-        choices=["legacy", "quality", "structure"],
+        choices=["legacy", "quality", "structure", "performance"],
         default=["legacy", "quality", "structure"],
-        help="Test groups to run (default: legacy, quality, structure). Options: legacy, quality, structure"
+        help="Test groups to run (default: legacy, quality, structure). Options: legacy, quality, structure, "
+             "performance (runtime benchmarks; run with --workers 1 for comparable timings)"
+    )
+    test_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_TEST_WORKERS,
+        help=f"Parallel test worker processes (default: {DEFAULT_TEST_WORKERS}, number of CPUs)"
+    )
+    test_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-run every test instead of reusing results of unchanged code files"
     )
     
     # Full command (generate + test)
-    full_parser = subparsers.add_parser('full', help='Generate code and run tests')
+    full_parser = subparsers.add_parser('full', help='Generate code, run tests and compute similarity as a pipeline')
     full_parser.add_argument(
         "--challenge",
         type=str,
@@ -158,31 +374,131 @@ def main() -> None:
     full_parser.add_argument(
         "--test-groups",
         nargs="*",
-        choices=["legacy", "quality", "structure"],
+        choices=["legacy", "quality", "structure", "performance"],
         default=["legacy", "quality", "structure"],
-        help="Test groups to run (default: legacy). Options: legacy, quality, structure"
+        help="Test groups to run (default: legacy). Options: legacy, quality, structure, performance"
     )
+    full_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"Maximum concurrent LLM requests (default: {MAX_CONCURRENT_REQUESTS})"
+    )
+    add_cache_arguments(full_parser)
+    add_stream_argument(full_parser)
+    full_parser.add_argument(
+        "--skip-similarity",
+        action="store_true",
+        help="Do not run similarity analysis as part of the pipeline"
+    )
+    
+    # Mock server command (offline OpenAI-compatible endpoint)
+    mock_parser = subparsers.add_parser('mock-server', help='Serve stored responses through a local OpenAI-compatible API')
+    mock_parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Host to bind (default: 127.0.0.1)"
+    )
+    mock_parser.add_argument(
+        "--port",
+        type=int,
+        default=MOCK_SERVER_PORT,
+        help=f"Port to listen on (default: {MOCK_SERVER_PORT})"
+    )
+    add_mock_server_arguments(mock_parser)
+    
+    # Benchmark command (generator throughput and latency)
+    bench_parser = subparsers.add_parser('benchmark', help='Measure generator throughput and latency against a mock server')
+    bench_parser.add_argument(
+        "--requests",
+        type=int,
+        default=BENCHMARK_REQUESTS,
+        help=f"Number of generation requests (default: {BENCHMARK_REQUESTS})"
+    )
+    bench_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help=f"Maximum concurrent LLM requests (default: {MAX_CONCURRENT_REQUESTS})"
+    )
+    bench_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Use streaming responses"
+    )
+    bench_parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Initial requests/s per provider for the rate limiter (default: from config)"
+    )
+    bench_parser.add_argument(
+        "--base-url",
+        type=str,
+        default=None,
+        help="Benchmark an already running endpoint instead of starting a local mock server"
+    )
+    bench_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Save the JSON report to this file (optional)"
+    )
+    add_mock_server_arguments(bench_parser)
     
     args = parser.parse_args()
     
     # Check sudo requirement for restricted commands
-    if args.command in ['generate', 'full']:
+    if args.command in ['generate', 'full', 'sweep']:
         require_sudo()
     
+    cache = None
+    if getattr(args, 'cache', False):
+        cache_dir = getattr(args, 'output_dir', DRY_RUN_OUTPUT_DIR)
+        cache = open_response_cache(cache_dir, args.cache_temperatures)
+    
     if args.command == 'generate':
         generate_code_only(args.challenge, args.prompt, args.iterations, args.temperature, args.output_dir, 
-                     getattr(args, 'top_k', None), getattr(args, 'top_p', None))
+                     getattr(args, 'top_k', None), getattr(args, 'top_p', None),
+                     max_concurrency=args.concurrency, cache=cache, resume=args.resume,
+                     stream=args.stream)
+    elif args.command == 'sweep':
+        spec = SweepSpec(
+            temperatures=args.temperatures,
+            models=args.models,
+            challenges=args.challenges,
+            prompts=args.prompts,
+            iterations=args.iterations,
+            top_k=args.top_k,
+            top_p=args.top_p
+        )
+        run_sweep(spec, args.output_dir, max_concurrency=args.concurrency, cache=cache,
+                  resume=args.resume, stream=args.stream)
     elif args.command == 'test':
-        test_existing_code(args.input_dir, getattr(args, 'test_groups', ['legacy']))
+        test_existing_code(args.input_dir, getattr(args, 'test_groups', ['legacy']), args.workers,
+                           use_cache=not args.no_cache)
     elif args.command == 'compare':
-        run_similarity_analysis(args.input_dir, args.force_recompute, args.export_viz)
+        run_similarity_analysis(args.input_dir, args.force_recompute, args.export_viz, args.workers)
     elif args.command == 'full':
         dry_run_with_tests(args.challenge, args.prompt, args.iterations, args.temperature, 
                           getattr(args, 'test_groups', ['legacy']), getattr(args, 'top_k', None), 
-                          getattr(args, 'top_p', None))
+                          getattr(args, 'top_p', None), max_concurrency=args.concurrency,
+                          cache=cache, stream=args.stream, similarity=not args.skip_similarity)
+    elif args.command == 'mock-server':
+        server = MockServer(mock_server_config_from_args(args), args.host, args.port)
+        print(f"🛰️  Mock server listening on {server.base_url}")
+        print(f"   Use: OPENROUTER_API_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n📊 Served {server.stats['requests']} requests")
+    elif args.command == 'benchmark':
+        run_generation_benchmark(args.requests, args.concurrency, args.stream, args.rate_limit,
+                                 args.base_url, mock_server_config_from_args(args), output_file=args.output)
     else:
         parser.print_help()
-        print("\n❌ Please specify a command: generate, test, compare, or full")
+        print("\n❌ Please specify a command: generate, sweep, test, compare, full, mock-server, or benchmark")
         sys.exit(1)
 
 
@@ -168,6 +168,7 @@ class ConsistencyAnalyzer:
             "semantic": [],
             "codebleu": [],
             "ast_edit_distance": [],
+            "ast_edit_distance_upper_bound": [],
             "jaccard_identifiers": []
         }
         
@@ -197,6 +198,12 @@ class ConsistencyAnalyzer:
                     similarity = 1.0 / (1.0 + edit_dist / 10.0)  # Normalize to similarity
                     all_similarities["ast_edit_distance"].append(similarity)
             
+            # Upper bound of the AST edit distance, kept apart from the exact distance
+            if "ast" in metrics and "ast_edit_distance_upper_bound" in metrics["ast"]:
+                edit_bound = metrics["ast"]["ast_edit_distance_upper_bound"]
+                if isinstance(edit_bound, (int, float)) and edit_bound != float('inf'):
+                    all_similarities["ast_edit_distance_upper_bound"].append(1.0 / (1.0 + edit_bound / 10.0))
+            
             # Jaccard identifiers
             if "jaccard" in metrics and "jaccard_identifiers" in metrics["jaccard"]:
                 jaccard_score = metrics["jaccard"]["jaccard_identifiers"]
@@ -143,7 +143,7 @@ class CleanVizExporter:
         for metric in all_metrics:
             values = []
             for pair_data in similarities.values():
-                if metric in pair_data:
+                if pair_data.get(metric) is not None:
                     values.append(pair_data[metric])
             
             if values:
@@ -214,7 +214,7 @@ class CleanVizExporter:
             # Calculate average metric value
             metric_values = []
             for pair_data in data["similarities"].values():
-                if metric in pair_data:
+                if pair_data.get(metric) is not None:
                     metric_values.append(pair_data[metric])
             
             if metric_values:
@@ -337,8 +337,10 @@ class CleanVizExporter:
             "codebleu": "Code-aware BLEU similarity (0-1, higher=more similar)",
             "codebleu_syntax": "CodeBLEU syntax component (0-1, higher=more similar)",
             "codebleu_dataflow": "CodeBLEU dataflow component (0-1, higher=more similar)",
-            "ast_edit_distance": "AST edit distance (lower=more similar)",
-            "tsed": "Tree Similarity Edit Distance (lower=more similar)",
+            "ast_edit_distance": "Exact AST edit distance, missing where too expensive (lower=more similar)",
+            "ast_edit_distance_upper_bound": "Upper bound of the AST edit distance (lower=more similar)",
+            "tsed": "Exact Tree Similarity Edit Distance, missing where too expensive (lower=more similar)",
+            "tsed_upper_bound": "Upper bound of the Tree Similarity Edit Distance (lower=more similar)",
             "node_histogram_distance": "AST node type distribution distance (0-1, lower=more similar)",
             "subtree_overlap_ratio": "Percentage of shared AST subtrees (0-1, higher=more similar)",
             "jaccard_identifiers": "Jaccard similarity of identifier names (0-1, higher=more similar)",
@@ -0,0 +1,149 @@
+"""
+Per-file feature extraction for pairwise similarity.
+
+Every file of a temperature cell is compared with every other one, so the
+metric calculators used to read and parse each file once per pair. Here each
+file is read, hashed, compile-checked and parsed once, and everything the
+pairwise metrics need is derived from that single parse. Features are memoized
+by content hash, so identical iterations (common at low temperatures) share
+one extraction.
+"""
+
+import ast
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from ..static_analysis.execution.compile_index import CompileIndex, CompileStatus
+from .metrics.ast_metrics import ASTMetricsCalculator, CompactAST
+from .metrics.codebleu_wrapper import CodeBLEUCalculator, CodeBLEUFeatures
+from .metrics.jaccard_calculator import JaccardCalculator
+
+# Extracted files kept in memory; a temperature cell compares up to 20 files with each other
+FEATURE_CACHE_SIZE = 32
+
+
+@dataclass
+class FileFeatures:
+    """
+    Everything the pairwise metrics read from one file.
+
+    `error` is set if the file couldn't be read or decoded, in which case none of
+    the source features are available; `ast_error`, `jaccard_error` and
+    `codebleu_error` are set if the respective features couldn't be extracted
+    from the source. CodeBLEU features are only extracted from code that parses.
+    """
+    source: Optional[str] = None
+    error: Optional[str] = None
+    # Parses with `ast.parse`; the AST itself is only kept in its encoded forms
+    parses: bool = False
+    compile_status: Optional[CompileStatus] = None
+    ast_encoding: Optional[CompactAST] = None
+    ast_error: Optional[str] = None
+    jaccard_features: Optional[Dict[str, Set[str]]] = None
+    jaccard_error: Optional[str] = None
+    codebleu_features: Optional[CodeBLEUFeatures] = None
+    codebleu_error: Optional[str] = None
+
+
+class FileFeatureCache:
+    """Extract `FileFeatures` once per file content and keep the most recently used ones."""
+
+    def __init__(self, ast_calc: ASTMetricsCalculator, jaccard_calc: JaccardCalculator,
+                 codebleu_calc: Optional[CodeBLEUCalculator] = None,
+                 compile_index: Optional[CompileIndex] = None, max_entries: int = FEATURE_CACHE_SIZE):
+        """
+        Args:
+            ast_calc: Calculator that encodes the ASTs; its encodings only compare with each other
+            jaccard_calc: Calculator that extracts the token sets
+            codebleu_calc: Calculator that tokenizes and parses for CodeBLEU (None to skip it)
+            compile_index: Shared compile results, looked up with the content that was read
+            max_entries: Number of distinct file contents kept in memory
+        """
+        self.ast_calc = ast_calc
+        self.jaccard_calc = jaccard_calc
+        self.codebleu_calc = codebleu_calc
+        self.compile_index = compile_index
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Content digest per (path, modification time, size), so unchanged files aren't read again
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        # Features per content digest, most recently used last
+        self._features: "OrderedDict[str, FileFeatures]" = OrderedDict()
+
+    def get(self, path: str) -> FileFeatures:
+        """Features of a file, extracted on first sight of its content."""
+        try:
+            stat = os.stat(path)
+            stat_key = (str(path), stat.st_mtime_ns, stat.st_size)
+            digest = self._digests.get(stat_key)
+            if digest is not None and digest in self._features:
+                return self._hit(digest)
+
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            return FileFeatures(error=str(e))
+
+        digest = hashlib.sha256(raw).hexdigest()
+        self._digests[stat_key] = digest
+        if digest in self._features:
+            return self._hit(digest)
+
+        self.misses += 1
+        features = self._extract(raw, Path(path).name)
+        self._features[digest] = features
+        if len(self._features) > self.max_entries:
+            self._features.popitem(last=False)
+        return features
+
+    def _hit(self, digest: str) -> FileFeatures:
+        self.hits += 1
+        self._features.move_to_end(digest)
+        return self._features[digest]
+
+    def _extract(self, raw: bytes, filename: str) -> FileFeatures:
+        features = FileFeatures()
+        if self.compile_index is not None:
+            # Looked up with the raw bytes, which also covers files that aren't valid UTF-8
+            features.compile_status = self.compile_index.check_bytes(raw, filename)
+
+        try:
+            # Decoded like `open(path, encoding="utf-8")` in text mode, as the calculators read files
+            source = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        except UnicodeDecodeError as e:
+            features.error = str(e)
+            return features
+        features.source = source
+
+        try:
+            tree = ast.parse(source)
+            features.parses = True
+        except Exception as e:
+            tree = None
+            features.ast_error = str(e)
+
+        if tree is not None:
+            try:
+                features.ast_encoding = self.ast_calc.encode_module(tree)
+            except Exception as e:
+                features.ast_error = str(e)
+
+        try:
+            # Code that doesn't parse is parsed again for the calculator's own fallback
+            features.jaccard_features = self.jaccard_calc.extract_features(source, tree)
+        except Exception as e:
+            features.jaccard_error = str(e)
+
+        if tree is not None and self.codebleu_calc is not None:
+            try:
+                features.codebleu_features = self.codebleu_calc.extract_features(source)
+            except Exception as e:
+                features.codebleu_error = str(e)
+
+        return features
@@ -5,33 +5,34 @@ Implements TED, TSED, Node Histogram Distance, and Subtree Overlap Ratio.
 
 import ast
 import hashlib
-from collections import defaultdict, Counter
+from collections import Counter
+from itertools import islice
 from typing import Dict, List, Tuple, Set, Any, Optional
 from pathlib import Path
 
+from .tree_edit_distance import PostorderTree, bounded_tree_edit_distance
 
-class ASTNode:
-    """Simplified AST node representation for tree edit distance calculations."""
+
+class CompactAST:
+    """
+    Flat encoding of a parsed file, built once and shared by all AST metrics.
     
-    def __init__(self, node_type: str, value: str = "", children: List['ASTNode'] = None):
-        self.node_type = node_type
-        self.value = value
-        self.children = children or []
-        self.hash = None
+    Nodes are stored in postorder as interned `(node type, value)` label IDs with
+    parent and leftmost leaf indices (see `PostorderTree`); the node type histogram
+    and the subtree hashes are derived from these arrays when the file is encoded.
+    """
     
-    def __eq__(self, other):
-        if not isinstance(other, ASTNode):
-            return False
-        return (self.node_type == other.node_type and 
-                self.value == other.value)
+    __slots__ = ("tree", "weighted_tree", "node_histogram", "subtree_hashes")
     
-    def __hash__(self):
-        if self.hash is None:
-            self.hash = hash((self.node_type, self.value))
-        return self.hash
+    def __init__(self, tree: PostorderTree, weighted_tree: PostorderTree,
+                 node_histogram: Counter, subtree_hashes: Set[bytes]):
+        self.tree = tree
+        self.weighted_tree = weighted_tree
+        self.node_histogram = node_histogram
+        self.subtree_hashes = subtree_hashes
     
-    def __str__(self):
-        return f"{self.node_type}({self.value})"
+    def __len__(self) -> int:
+        return len(self.tree)
 
 
 class ASTMetricsCalculator:
@@ -49,6 +50,26 @@ class ASTMetricsCalculator:
             'ImportFrom': 1,
             'Assign': 1
         }
+        # Label interning shared by every file this calculator encodes, so any two encodings compare
+        self._label_ids: Dict[Tuple[str, str], int] = {}
+        # (node type, value), TSED weight and interned node type of every label ID
+        self._labels: List[Tuple[str, str]] = []
+        self._label_weights: List[int] = []
+        self._label_kinds: List[int] = []
+        self._node_type_ids: Dict[str, int] = {}
+    
+    @staticmethod
+    def error_result(error: str) -> Dict[str, Any]:
+        """Worst-case scores with an error message, as reported for unreadable or unparseable code."""
+        return {
+            "ast_edit_distance": float('inf'),
+            "ast_edit_distance_upper_bound": float('inf'),
+            "tsed": float('inf'),
+            "tsed_upper_bound": float('inf'),
+            "node_histogram_distance": 1.0,
+            "subtree_overlap_ratio": 0.0,
+            "error": error
+        }
     
     def calculate_all_metrics(self, file1: str, file2: str) -> Dict[str, float]:
         """
@@ -70,13 +91,7 @@ class ASTMetricsCalculator:
             return self.calculate_all_metrics_from_strings(code1, code2)
             
         except Exception as e:
-            return {
-                "ast_edit_distance": float('inf'),
-                "tsed": float('inf'),
-                "node_histogram_distance": 1.0,
-                "subtree_overlap_ratio": 0.0,
-                "error": str(e)
-            }
+            return self.error_result(str(e))
     
     def calculate_all_metrics_from_strings(self, code1: str, code2: str) -> Dict[str, float]:
         """
@@ -90,38 +105,78 @@ class ASTMetricsCalculator:
             Dict with all AST similarity metrics
         """
         try:
-            # Parse ASTs
-            ast1 = ast.parse(code1)
-            ast2 = ast.parse(code2)
-            
-            # Convert to simplified representation
-            tree1 = self._ast_to_tree(ast1)
-            tree2 = self._ast_to_tree(ast2)
-            
-            # Calculate all metrics
-            ted = self._calculate_tree_edit_distance(tree1, tree2)
-            tsed = self._calculate_tsed(tree1, tree2)
-            node_hist_dist = self._calculate_node_histogram_distance(ast1, ast2)
-            subtree_overlap = self._calculate_subtree_overlap_ratio(tree1, tree2)
-            
-            return {
-                "ast_edit_distance": ted,
-                "tsed": tsed,
-                "node_histogram_distance": node_hist_dist,
-                "subtree_overlap_ratio": subtree_overlap
-            }
-            
+            return self.calculate_all_metrics_from_encodings(self.encode(code1), self.encode(code2))
         except Exception as e:
-            return {
-                "ast_edit_distance": float('inf'),
-                "tsed": float('inf'),
-                "node_histogram_distance": 1.0,
-                "subtree_overlap_ratio": 0.0,
-                "error": str(e)
-            }
+            return self.error_result(str(e))
     
-    def _ast_to_tree(self, node) -> ASTNode:
-        """Convert Python AST to simplified tree representation."""
+    def calculate_all_metrics_from_encodings(self, tree1: CompactAST, tree2: CompactAST) -> Dict[str, float]:
+        """
+        Calculate all AST metrics between two files encoded by this calculator.
+        
+        Args:
+            tree1: Encoding of the first file
+            tree2: Encoding of the second file
+            
+        Returns:
+            Dict with all AST similarity metrics; `ast_edit_distance` and `tsed` are exact and
+            None where that is too expensive, `*_upper_bound` are computed for every pair
+        """
+        edit_distance, edit_distance_bound = self._calculate_tree_edit_distance(tree1, tree2)
+        tsed, tsed_bound = self._calculate_tsed(tree1, tree2)
+        return {
+            "ast_edit_distance": edit_distance,
+            "ast_edit_distance_upper_bound": edit_distance_bound,
+            "tsed": tsed,
+            "tsed_upper_bound": tsed_bound,
+            "node_histogram_distance": self._calculate_node_histogram_distance(tree1, tree2),
+            "subtree_overlap_ratio": self._calculate_subtree_overlap_ratio(tree1, tree2)
+        }
+    
+    def encode(self, code: str) -> CompactAST:
+        """
+        Parse and encode Python code.
+        
+        Raises:
+            SyntaxError, ValueError: If the code doesn't parse
+        """
+        return self.encode_module(ast.parse(code))
+    
+    def encode_module(self, module: ast.AST) -> CompactAST:
+        """Flatten a parsed module; the AST itself isn't kept and may be shared with other readers."""
+        tree = PostorderTree.from_tree(module, lambda node: list(ast.iter_child_nodes(node)),
+                                       self._node_label, self._label_ids)
+        
+        # Label IDs are assigned in insertion order, so new labels are the tail of the table
+        for node_type, value in islice(self._label_ids, len(self._labels), None):
+            self._labels.append((node_type, value))
+            self._label_weights.append(self.node_type_weights.get(node_type, 1))
+            self._label_kinds.append(self._node_type_ids.setdefault(node_type, len(self._node_type_ids)))
+        
+        labels = self._labels
+        weighted_tree = tree.with_costs([self._label_weights[label] for label in tree.labels])
+        node_histogram = Counter(labels[label][0] for label in tree.labels)
+        
+        # Children precede their parent in postorder, so every child hash is known when
+        # its parent is reached; hashes match those of the former recursive implementation
+        child_hashes: List[List[str]] = [[] for _ in tree.labels]
+        subtree_hashes: Set[bytes] = set()
+        for node, (label, parent) in enumerate(zip(tree.labels, tree.parents)):
+            node_type, value = labels[label]
+            children = child_hashes[node]
+            # Sort child hashes for consistent ordering
+            children.sort()
+            subtree_repr = f"{node_type}:{value}:[{','.join(children)}]"
+            subtree_hash = hashlib.md5(subtree_repr.encode())
+            # Raw digests are half the size of the hex ones the parent's representation needs
+            subtree_hashes.add(subtree_hash.digest())
+            if parent >= 0:
+                child_hashes[parent].append(subtree_hash.hexdigest())
+        
+        return CompactAST(tree, weighted_tree, node_histogram, subtree_hashes)
+    
+    @staticmethod
+    def _node_label(node: ast.AST) -> Tuple[str, str]:
+        """Node type and the name, identifier, attribute or constant it carries; nodes are equal if both are."""
         node_type = type(node).__name__
         
         # Extract meaningful values from specific node types
@@ -134,136 +189,40 @@ class ASTMetricsCalculator:
             value = str(node.attr)
         elif isinstance(node, ast.Constant):
             value = str(node.value)
-        elif isinstance(node, (ast.Num, ast.Str)):  # For older Python versions
-            value = str(node.n if hasattr(node, 'n') else node.s)
         
-        # Recursively process children
-        children = []
-        for child in ast.iter_child_nodes(node):
-            children.append(self._ast_to_tree(child))
-        
-        return ASTNode(node_type, value, children)
+        return node_type, value
     
-    def _calculate_tree_edit_distance(self, tree1: ASTNode, tree2: ASTNode) -> int:
+    def _calculate_tree_edit_distance(self, tree1: CompactAST, tree2: CompactAST) -> Tuple[Optional[int], int]:
         """
         Calculate Tree Edit Distance (TED) between two trees.
-        Uses dynamic programming with memoization.
-        """
-        memo = {}
+        Unit-cost distance: every insertion, deletion and rename costs 1.
         
-        def ted_recursive(t1: Optional[ASTNode], t2: Optional[ASTNode]) -> int:
-            # Base cases
-            if t1 is None and t2 is None:
-                return 0
-            if t1 is None:
-                return 1 + sum(ted_recursive(None, child) for child in t2.children)
-            if t2 is None:
-                return 1 + sum(ted_recursive(child, None) for child in t1.children)
-            
-            # Create memo key
-            key = (id(t1), id(t2))
-            if key in memo:
-                return memo[key]
-            
-            # If nodes are equal, recurse on children
-            if t1 == t2:
-                cost = 0
-                # Align children optimally (simplified to sequential matching)
-                max_children = max(len(t1.children), len(t2.children))
-                for i in range(max_children):
-                    c1 = t1.children[i] if i < len(t1.children) else None
-                    c2 = t2.children[i] if i < len(t2.children) else None
-                    cost += ted_recursive(c1, c2)
-            else:
-                # Try substitution, insertion, deletion
-                # Substitution: replace t1 with t2, then align their children
-                substitute_cost = 1  # Cost of substituting the node
-                max_children = max(len(t1.children), len(t2.children))
-                for i in range(max_children):
-                    c1 = t1.children[i] if i < len(t1.children) else None
-                    c2 = t2.children[i] if i < len(t2.children) else None
-                    substitute_cost += ted_recursive(c1, c2)
-                
-                # Deletion: delete t1 and insert entire t2 subtree
-                delete_cost = 1 + ted_recursive(None, t2)
-                
-                # Insertion: insert t2 and delete entire t1 subtree  
-                insert_cost = 1 + ted_recursive(t1, None)
-                
-                cost = min(substitute_cost, delete_cost, insert_cost)
-            
-            memo[key] = cost
-            return cost
-        
-        return ted_recursive(tree1, tree2)
+        Returns:
+            (exact distance, or None where it is too expensive; upper bound of a top-down
+            edit script that maps nodes only onto nodes of the same type)
+        """
+        return bounded_tree_edit_distance(tree1.tree, tree2.tree, self._label_kinds)
     
-    def _calculate_tsed(self, tree1: ASTNode, tree2: ASTNode) -> float:
+    def _calculate_tsed(self, tree1: CompactAST, tree2: CompactAST) -> Tuple[Optional[float], float]:
         """
         Calculate Tree Similarity Edit Distance (TSED) - weighted version of TED.
-        Uses node type weights to emphasize structural differences.
-        """
-        memo = {}
-        
-        def tsed_recursive(t1: Optional[ASTNode], t2: Optional[ASTNode]) -> float:
-            if t1 is None and t2 is None:
-                return 0.0
-            if t1 is None:
-                weight = self.node_type_weights.get(t2.node_type, 1)
-                return weight + sum(tsed_recursive(None, child) for child in t2.children)
-            if t2 is None:
-                weight = self.node_type_weights.get(t1.node_type, 1)
-                return weight + sum(tsed_recursive(child, None) for child in t1.children)
-            
-            key = (id(t1), id(t2))
-            if key in memo:
-                return memo[key]
-            
-            if t1 == t2:
-                cost = 0.0
-                max_children = max(len(t1.children), len(t2.children))
-                for i in range(max_children):
-                    c1 = t1.children[i] if i < len(t1.children) else None
-                    c2 = t2.children[i] if i < len(t2.children) else None
-                    cost += tsed_recursive(c1, c2)
-            else:
-                # Get weights for both node types
-                weight = max(self.node_type_weights.get(t1.node_type, 1),
-                           self.node_type_weights.get(t2.node_type, 1))
-                
-                # Substitution: replace t1 with t2, then align their children
-                substitute_cost = weight  # Weighted cost of substituting the node
-                max_children = max(len(t1.children), len(t2.children))
-                for i in range(max_children):
-                    c1 = t1.children[i] if i < len(t1.children) else None
-                    c2 = t2.children[i] if i < len(t2.children) else None
-                    substitute_cost += tsed_recursive(c1, c2)
-                
-                # Deletion: delete t1 and insert entire t2 subtree
-                delete_cost = weight + tsed_recursive(None, t2)
-                
-                # Insertion: insert t2 and delete entire t1 subtree
-                insert_cost = weight + tsed_recursive(t1, None)
-                
-                cost = min(substitute_cost, delete_cost, insert_cost)
-            
-            memo[key] = cost
-            return cost
+        Uses node type weights to emphasize structural differences: inserting or
+        deleting a node costs its weight, renaming the larger of both weights.
         
-        return tsed_recursive(tree1, tree2)
+        Returns:
+            (exact distance or None, upper bound) like `_calculate_tree_edit_distance`
+        """
+        distance, upper_bound = bounded_tree_edit_distance(tree1.weighted_tree, tree2.weighted_tree,
+                                                           self._label_kinds)
+        return (float(distance) if distance is not None else None), float(upper_bound)
     
-    def _calculate_node_histogram_distance(self, ast1, ast2) -> float:
+    def _calculate_node_histogram_distance(self, tree1: CompactAST, tree2: CompactAST) -> float:
         """
         Calculate node histogram distance - compare frequency of node types.
         Returns normalized distance (0 = identical, 1 = completely different).
         """
-        def get_node_histogram(tree) -> Counter:
-            histogram = Counter()
-            for node in ast.walk(tree):
-                histogram[type(node).__name__] += 1
-            return histogram
-        
-        hist1 = get_node_histogram(ast1)
-        hist2 = get_node_histogram(ast2)
+        hist1 = tree1.node_histogram
+        hist2 = tree2.node_histogram
         
         # Get all unique node types
         all_types = set(hist1.keys()) | set(hist2.keys())
@@ -283,35 +242,13 @@ class ASTMetricsCalculator:
         # Normalize by total nodes
         return distance / total_nodes if total_nodes > 0 else 0.0
     
-    def _calculate_subtree_overlap_ratio(self, tree1: ASTNode, tree2: ASTNode) -> float:
+    def _calculate_subtree_overlap_ratio(self, tree1: CompactAST, tree2: CompactAST) -> float:
         """
         Calculate subtree overlap ratio - percentage of subtrees shared between trees.
         Returns ratio (0 = no overlap, 1 = identical).
         """
-        def get_subtree_hashes(tree: ASTNode) -> Set[str]:
-            """Get hashes of all subtrees rooted at each node."""
-            hashes = set()
-            
-            def hash_subtree(node: ASTNode) -> str:
-                # Create hash from node type, value, and children hashes
-                child_hashes = []
-                for child in node.children:
-                    child_hash = hash_subtree(child)
-                    child_hashes.append(child_hash)
-                    hashes.add(child_hash)
-                
-                # Sort child hashes for consistent ordering
-                child_hashes.sort()
-                subtree_repr = f"{node.node_type}:{node.value}:[{','.join(child_hashes)}]"
-                subtree_hash = hashlib.md5(subtree_repr.encode()).hexdigest()
-                hashes.add(subtree_hash)
-                return subtree_hash
-            
-            hash_subtree(tree)
-            return hashes
-        
-        subtrees1 = get_subtree_hashes(tree1)
-        subtrees2 = get_subtree_hashes(tree2)
+        subtrees1 = tree1.subtree_hashes
+        subtrees2 = tree2.subtree_hashes
         
         if not subtrees1 and not subtrees2:
             return 1.0
@@ -1,21 +1,64 @@
 """
 CodeBLEU wrapper for measuring code-aware similarity between Python files.
 Provides a simple interface to the codebleu library for temperature research.
+
+`calc_codebleu` tokenizes, parses and extracts the data flow of both files for
+every pair it scores. Here the same steps run once per file (`extract_features`),
+and the pairwise scores are computed from those artifacts with the library's own
+formulas, in the same order of operations, so the results are bit-identical to
+`calc_codebleu(references=[code1], predictions=[code2], lang="python")`.
 """
 
 import ast
+import math
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import tempfile
 import os
 
 try:
-    from codebleu import calc_codebleu
+    from codebleu import bleu, weighted_ngram_match
+    from codebleu.codebleu import PACKAGE_DIR
+    from codebleu.dataflow_match import dfg_function, get_data_flow, normalize_dataflow
+    from codebleu.parser import remove_comments_and_docstrings
+    from codebleu.utils import get_tree_sitter_language, ngrams
+    from tree_sitter import Parser
     CODEBLEU_AVAILABLE = True
 except ImportError:
     CODEBLEU_AVAILABLE = False
     print("Warning: codebleu not installed. Install with: pip install codebleu")
 
+INVALID_SYNTAX_ERROR = "Invalid Python syntax"
+
+LANG = "python"
+# Weights of the n-gram orders within both BLEU variants, and of the four CodeBLEU components
+NGRAM_WEIGHTS = (0.25, 0.25, 0.25, 0.25)
+COMPONENT_WEIGHTS = (0.25, 0.25, 0.25, 0.25)
+
+
+@dataclass
+class CodeBLEUFeatures:
+    """
+    Artifacts of one file for every CodeBLEU component.
+    
+    The same features serve a file as reference and as prediction.
+    """
+    tokens: List[str]
+    # Counter of the n-grams of every order, starting with unigrams, and their totals
+    ngram_counts: List[Counter]
+    ngram_totals: List[int]
+    # Weight of every token as a reference (keywords count more), and the weighted unigram total
+    token_weights: Dict[str, float]
+    weighted_unigram_total: float
+    # S-expressions of all tree-sitter subtrees with children, and how many there are
+    subtrees: Counter
+    subtree_count: int
+    # Normalized data-flow edges, made hashable, and how many there are
+    dataflow: Counter
+    dataflow_count: int
+
 
 class CodeBLEUCalculator:
     """Calculate CodeBLEU similarity between two Python code files."""
@@ -23,14 +66,33 @@ class CodeBLEUCalculator:
     def __init__(self):
         if not CODEBLEU_AVAILABLE:
             raise ImportError("codebleu library not available. Install with: pip install codebleu")
+        
+        with open(PACKAGE_DIR / "keywords" / f"{LANG}.txt", "r", encoding="utf-8") as f:
+            self.keywords = {x.strip() for x in f.readlines()}
+        # Created on first use, so a broken grammar install is reported per file like other errors
+        self._parser: Optional[Parser] = None
+    
+    @staticmethod
+    def error_result(error: str) -> Dict[str, Any]:
+        """Zero scores with an error message, as reported for unreadable or invalid code."""
+        return {
+            "codebleu": 0.0,
+            "bleu": 0.0,
+            "weighted_ngram_match": 0.0,
+            "syntax_match": 0.0,
+            "dataflow_match": 0.0,
+            "error": error
+        }
     
-    def calculate_similarity(self, code1_path: str, code2_path: str) -> Dict[str, float]:
+    def calculate_similarity(self, code1_path: str, code2_path: str,
+                             syntax_checked: bool = False) -> Dict[str, float]:
         """
         Calculate CodeBLEU similarity between two Python files.
         
         Args:
             code1_path: Path to first Python file
             code2_path: Path to second Python file
+            syntax_checked: Both files are already known to parse (e.g. from the compile index)
             
         Returns:
             Dict with CodeBLEU scores and components
@@ -42,65 +104,160 @@ class CodeBLEUCalculator:
             with open(code2_path, 'r', encoding='utf-8') as f:
                 code2 = f.read()
             
-            return self.calculate_similarity_from_strings(code1, code2)
+            return self.calculate_similarity_from_strings(code1, code2, syntax_checked)
             
         except Exception as e:
-            return {
-                "codebleu": 0.0,
-                "bleu": 0.0,
-                "weighted_ngram_match": 0.0,
-                "syntax_match": 0.0,
-                "dataflow_match": 0.0,
-                "error": str(e)
-            }
+            return self.error_result(str(e))
     
-    def calculate_similarity_from_strings(self, code1: str, code2: str) -> Dict[str, float]:
+    def calculate_similarity_from_strings(self, code1: str, code2: str,
+                                          syntax_checked: bool = False) -> Dict[str, float]:
         """
         Calculate CodeBLEU similarity between two code strings.
         
         Args:
             code1: First Python code string
             code2: Second Python code string
+            syntax_checked: Skip the syntax validation because both strings are known to parse
             
         Returns:
             Dict with CodeBLEU scores and components
         """
         try:
             # Validate that both are valid Python
-            if not self._is_valid_python(code1) or not self._is_valid_python(code2):
-                return {
-                    "codebleu": 0.0,
-                    "bleu": 0.0,
-                    "weighted_ngram_match": 0.0,
-                    "syntax_match": 0.0,
-                    "dataflow_match": 0.0,
-                    "error": "Invalid Python syntax"
-                }
+            if not syntax_checked and (not self._is_valid_python(code1) or not self._is_valid_python(code2)):
+                return self.error_result(INVALID_SYNTAX_ERROR)
             
-            # Calculate CodeBLEU - pass code strings directly
-            result = calc_codebleu(
-                references=[code1],  # Reference code string
-                predictions=[code2], # Prediction code string
-                lang="python"
-            )
-
-            return {
-                "codebleu": result.get("codebleu", 0.0),
-                "bleu": result.get("ngram_match_score", 0.0),
-                "weighted_ngram_match": result.get("weighted_ngram_match_score", 0.0),
-                "syntax_match": result.get("syntax_match_score", 0.0),
-                "dataflow_match": result.get("dataflow_match_score", 0.0)
-            }
+            # code1 is the reference, code2 the prediction
+            return self.calculate_similarity_from_features(self.extract_features(code1),
+                                                           self.extract_features(code2))
                         
         except Exception as e:
-            return {
-                "codebleu": 0.0,
-                "bleu": 0.0,
-                "weighted_ngram_match": 0.0,
-                "syntax_match": 0.0,
-                "dataflow_match": 0.0,
-                "error": str(e)
-            }
+            return self.error_result(str(e))
+    
+    def extract_features(self, code: str) -> CodeBLEUFeatures:
+        """
+        Tokenize, parse and extract the data flow of one code string.
+        
+        Args:
+            code: Python code string (not validated; call on code that parses)
+            
+        Returns:
+            CodeBLEUFeatures usable for any pair the code is part of
+        """
+        code = code.strip()
+        
+        # N-gram matches: whitespace tokens
+        tokens = code.split()
+        ngram_counts = [Counter(ngrams(tokens, n)) if len(tokens) >= n else Counter()
+                        for n in range(1, len(NGRAM_WEIGHTS) + 1)]
+        token_weights = {token: 1 if token in self.keywords else 0.2 for token in tokens}
+        
+        # Syntax and data-flow matches work on the code without comments and docstrings
+        try:
+            code = remove_comments_and_docstrings(code, LANG)
+        except Exception:
+            pass
+        parser = self._get_parser()
+        
+        root = parser.parse(bytes(code, "utf8")).root_node
+        subtrees = Counter()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            subtrees[str(node)] += 1
+            stack.extend(child for child in node.children if len(child.children) != 0)
+        
+        dataflow = Counter(
+            (var_name, relationship, tuple(parent_names))
+            for var_name, relationship, parent_names in normalize_dataflow(get_data_flow(code, [parser, dfg_function[LANG]]))
+        )
+        
+        return CodeBLEUFeatures(
+            tokens=tokens,
+            ngram_counts=ngram_counts,
+            ngram_totals=[sum(counts.values()) for counts in ngram_counts],
+            token_weights=token_weights,
+            weighted_unigram_total=max(1, _weighted_sum(token_weights, ngram_counts[0])),
+            subtrees=subtrees,
+            subtree_count=sum(subtrees.values()),
+            dataflow=dataflow,
+            dataflow_count=sum(dataflow.values())
+        )
+    
+    def calculate_similarity_from_features(self, reference: CodeBLEUFeatures,
+                                           prediction: CodeBLEUFeatures) -> Dict[str, float]:
+        """
+        Calculate CodeBLEU between two files from their extracted features.
+        
+        Args:
+            reference: Features of the first (reference) file
+            prediction: Features of the second (predicted) file
+            
+        Returns:
+            Dict with CodeBLEU scores and components
+        """
+        hyp_len = len(prediction.tokens)
+        
+        # N-gram match: modified precision of the prediction's n-grams
+        numerators, denominators = Counter(), Counter()
+        for n, (counts, reference_counts) in enumerate(zip(prediction.ngram_counts, reference.ngram_counts), start=1):
+            numerators[n] += _clipped_total(counts, reference_counts)
+            denominators[n] += max(1, prediction.ngram_totals[n - 1])
+        ngram_match = _corpus_score(bleu, numerators, denominators,
+                                    bleu.closest_ref_length([reference.tokens], hyp_len), hyp_len)
+        
+        # Weighted n-gram match: modified recall of the reference's n-grams, unigrams weighted
+        numerators, denominators = Counter(), Counter()
+        for n, (counts, reference_counts) in enumerate(zip(prediction.ngram_counts, reference.ngram_counts), start=1):
+            if n == 1 and len(reference.token_weights) == len(reference_counts):
+                # A float sum, so the reference order is kept; unmatched n-grams would only add zeros
+                clipped_counts = {ngram: min(count, counts[ngram]) for ngram, count in reference_counts.items()
+                                  if ngram in counts}
+                numerators[n] += _weighted_sum(reference.token_weights, clipped_counts)
+                denominators[n] += reference.weighted_unigram_total
+            else:
+                numerators[n] += _clipped_total(reference_counts, counts)
+                denominators[n] += max(1, reference.ngram_totals[n - 1])
+        # The library measures the reference as its [tokens, weights] pair; kept for identical scores
+        weighted_ngram_match_score = _corpus_score(
+            weighted_ngram_match, numerators, denominators,
+            weighted_ngram_match.closest_ref_length([[reference.tokens, reference.token_weights]], hyp_len), hyp_len
+        )
+        
+        # Syntax match: share of the reference's subtrees that occur in the prediction
+        match_count = sum(count for subtree, count in reference.subtrees.items() if subtree in prediction.subtrees)
+        syntax_match_score = match_count / reference.subtree_count
+        
+        # Data-flow match: reference edges matched one-to-one by prediction edges
+        if reference.dataflow_count > 0:
+            match_count = sum(min(count, prediction.dataflow[edge]) for edge, count in reference.dataflow.items())
+            dataflow_match_score = match_count / reference.dataflow_count
+        else:
+            # Degenerates to 0 like in the library, and then doesn't count against the total
+            dataflow_match_score = 0
+        
+        alpha, beta, gamma, theta = COMPONENT_WEIGHTS
+        code_bleu_score = (
+            alpha * ngram_match
+            + beta * weighted_ngram_match_score
+            + gamma * syntax_match_score
+            + theta * (dataflow_match_score or 1)
+        )
+        
+        return {
+            "codebleu": code_bleu_score,
+            "bleu": ngram_match,
+            "weighted_ngram_match": weighted_ngram_match_score,
+            "syntax_match": syntax_match_score,
+            "dataflow_match": dataflow_match_score
+        }
+    
+    def _get_parser(self) -> "Parser":
+        if self._parser is None:
+            parser = Parser()
+            parser.language = get_tree_sitter_language(LANG)
+            self._parser = parser
+        return self._parser
     
     def _is_valid_python(self, code: str) -> bool:
         """Check if code string is valid Python syntax."""
@@ -111,6 +268,35 @@ class CodeBLEUCalculator:
             return False
 
 
+def _weighted_sum(weights: Dict[str, float], counts: Dict[Tuple[str, ...], int]) -> float:
+    """Unigram counts weighted by token, summed in the library's order."""
+    sum_counts = 0
+    for ngram, count in counts.items():
+        sum_counts += count * (weights[ngram[0]] if ngram[0] in weights else 1)
+    return sum_counts
+
+
+def _clipped_total(counts: Counter, reference_counts: Counter) -> int:
+    """Sum of `counts` clipped to `reference_counts`; the minimum is symmetric, so the smaller side is scanned."""
+    if len(counts) > len(reference_counts):
+        counts, reference_counts = reference_counts, counts
+    return sum(min(count, reference_counts[ngram]) for ngram, count in counts.items() if ngram in reference_counts)
+
+
+def _corpus_score(module, numerators: Counter, denominators: Counter, ref_len: int, hyp_len: int) -> float:
+    """BLEU from n-gram match counts, as the final steps of `module.corpus_bleu` compute it."""
+    bp = module.brevity_penalty(ref_len, hyp_len)
+    p_n = [(numerators[i], denominators[i]) for i, _ in enumerate(NGRAM_WEIGHTS, start=1)]
+    
+    # No matching unigrams means no matches of any order
+    if numerators[1] == 0:
+        return 0
+    
+    p_n = module.SmoothingFunction().method1(p_n)
+    s = (w_i * math.log(p_i[0] / p_i[1]) for w_i, p_i in zip(NGRAM_WEIGHTS, p_n))
+    return bp * math.exp(math.fsum(s))
+
+
 def calculate_codebleu_similarity(file1: str, file2: str) -> Dict[str, float]:
     """
     Convenience function to calculate CodeBLEU similarity between two files.
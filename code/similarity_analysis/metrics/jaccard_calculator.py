@@ -6,7 +6,7 @@ Provides multiple tokenization strategies for different levels of analysis.
 import re
 import ast
 import keyword
-from typing import Set, List, Dict, Any
+from typing import Set, List, Dict, Any, Optional
 from pathlib import Path
 
 
@@ -19,6 +19,18 @@ class JaccardCalculator:
                          'and', 'or', 'not', 'is', 'in', '&', '|', '^', '~', '<<', '>>', '+=', '-=', 
                          '*=', '/=', '//=', '%=', '**=', '&=', '|=', '^=', '<<=', '>>='}
     
+    @staticmethod
+    def error_result(error: str) -> Dict[str, Any]:
+        """Zero similarities with an error message, as reported for unreadable or unusable code."""
+        return {
+            "jaccard_tokens": 0.0,
+            "jaccard_words": 0.0,
+            "jaccard_identifiers": 0.0,
+            "jaccard_keywords": 0.0,
+            "jaccard_ast_names": 0.0,
+            "error": error
+        }
+    
     def calculate_similarity(self, file1: str, file2: str) -> Dict[str, float]:
         """
         Calculate Jaccard similarity between two Python files using multiple tokenization strategies.
@@ -39,14 +51,7 @@ class JaccardCalculator:
             return self.calculate_similarity_from_strings(code1, code2)
             
         except Exception as e:
-            return {
-                "jaccard_tokens": 0.0,
-                "jaccard_words": 0.0,
-                "jaccard_identifiers": 0.0,
-                "jaccard_keywords": 0.0,
-                "jaccard_ast_names": 0.0,
-                "error": str(e)
-            }
+            return self.error_result(str(e))
     
     def calculate_similarity_from_strings(self, code1: str, code2: str) -> Dict[str, float]:
         """
@@ -60,44 +65,59 @@ class JaccardCalculator:
             Dict with Jaccard similarities for different tokenization methods
         """
         try:
-            results = {}
-            
-            # Token-level Jaccard (split by whitespace and punctuation)
-            tokens1 = self._tokenize_basic(code1)
-            tokens2 = self._tokenize_basic(code2)
-            results["jaccard_tokens"] = self._jaccard_similarity(tokens1, tokens2)
-            
-            # Word-level Jaccard (alphanumeric words only)
-            words1 = self._extract_words(code1)
-            words2 = self._extract_words(code2)
-            results["jaccard_words"] = self._jaccard_similarity(words1, words2)
-            
-            # Identifier-level Jaccard (variable/function names)
-            identifiers1 = self._extract_identifiers(code1)
-            identifiers2 = self._extract_identifiers(code2)
-            results["jaccard_identifiers"] = self._jaccard_similarity(identifiers1, identifiers2)
-            
-            # Keyword-level Jaccard (Python keywords only)
-            keywords1 = self._extract_keywords(code1)
-            keywords2 = self._extract_keywords(code2)
-            results["jaccard_keywords"] = self._jaccard_similarity(keywords1, keywords2)
+            return self.calculate_similarity_from_features(self.extract_features(code1),
+                                                           self.extract_features(code2))
+        except Exception as e:
+            return self.error_result(str(e))
+    
+    def calculate_similarity_from_features(self, features1: Dict[str, Set[str]],
+                                           features2: Dict[str, Set[str]]) -> Dict[str, float]:
+        """
+        Calculate Jaccard similarity between two files from their extracted token sets.
+        
+        Args:
+            features1: Result of `extract_features` for the first file
+            features2: Result of `extract_features` for the second file
             
-            # AST-based name extraction
-            ast_names1 = self._extract_ast_names(code1)
-            ast_names2 = self._extract_ast_names(code2)
-            results["jaccard_ast_names"] = self._jaccard_similarity(ast_names1, ast_names2)
+        Returns:
+            Dict with Jaccard similarities for different tokenization methods
+        """
+        return {name: self._jaccard_similarity(tokens, features2[name]) for name, tokens in features1.items()}
+    
+    def extract_features(self, code: str, tree: Optional[ast.AST] = None) -> Dict[str, Set[str]]:
+        """
+        Extract the token sets of every tokenization method from one code string.
+        
+        Args:
+            code: Python code string
+            tree: `ast.parse(code)` if the caller already parsed it
             
-            return results
+        Returns:
+            Dict mapping each similarity name to the token set it compares
             
-        except Exception as e:
-            return {
-                "jaccard_tokens": 0.0,
-                "jaccard_words": 0.0,
-                "jaccard_identifiers": 0.0,
-                "jaccard_keywords": 0.0,
-                "jaccard_ast_names": 0.0,
-                "error": str(e)
-            }
+        Raises:
+            ValueError: If the code can't be parsed for reasons other than its syntax (e.g. null bytes)
+        """
+        if tree is None:
+            try:
+                tree = ast.parse(code)
+            except SyntaxError:
+                pass
+        
+        code_no_comments = self._remove_comments_and_strings(code, parses=tree is not None)
+        words = self._extract_words(code_no_comments)
+        return {
+            # Token-level (split by whitespace and punctuation)
+            "jaccard_tokens": self._tokenize_basic(code_no_comments),
+            # Word-level (alphanumeric words only)
+            "jaccard_words": words,
+            # Identifier-level (variable/function names)
+            "jaccard_identifiers": self._extract_identifiers(words),
+            # Keyword-level (Python keywords only)
+            "jaccard_keywords": self._extract_keywords(words),
+            # AST-based name extraction, falling back to words for code that doesn't parse
+            "jaccard_ast_names": self._extract_ast_names(tree) if tree is not None else words
+        }
     
     def _jaccard_similarity(self, set1: Set[str], set2: Set[str]) -> float:
         """Calculate Jaccard similarity coefficient between two sets."""
@@ -109,73 +129,49 @@ class JaccardCalculator:
         
         return intersection / union if union > 0 else 0.0
     
-    def _tokenize_basic(self, code: str) -> Set[str]:
+    def _tokenize_basic(self, code_no_comments: str) -> Set[str]:
         """Basic tokenization: split by whitespace and punctuation."""
-        # Remove comments and strings to focus on code structure
-        code_no_comments = self._remove_comments_and_strings(code)
-        
         # Split by whitespace and common punctuation
         tokens = re.findall(r'\w+|[^\w\s]', code_no_comments)
         
         # Filter out empty tokens and normalize
         return {token.strip().lower() for token in tokens if token.strip()}
     
-    def _extract_words(self, code: str) -> Set[str]:
+    def _extract_words(self, code_no_comments: str) -> Set[str]:
         """Extract alphanumeric words (identifiers, keywords, etc.)."""
-        code_no_comments = self._remove_comments_and_strings(code)
         words = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', code_no_comments)
         return {word.lower() for word in words}
     
-    def _extract_identifiers(self, code: str) -> Set[str]:
+    def _extract_identifiers(self, words: Set[str]) -> Set[str]:
         """Extract user-defined identifiers (excluding keywords and builtins)."""
-        words = self._extract_words(code)
         # Filter out Python keywords and common builtins
         builtins = {'int', 'str', 'list', 'dict', 'set', 'tuple', 'bool', 'float', 
                    'len', 'range', 'print', 'input', 'open', 'file', 'type', 'object'}
         return words - self.python_keywords - builtins
     
-    def _extract_keywords(self, code: str) -> Set[str]:
+    def _extract_keywords(self, words: Set[str]) -> Set[str]:
         """Extract Python keywords from code."""
-        words = self._extract_words(code)
         return words & self.python_keywords
     
-    def _extract_ast_names(self, code: str) -> Set[str]:
+    def _extract_ast_names(self, tree: ast.AST) -> Set[str]:
         """Extract names using AST parsing (more accurate than regex)."""
-        try:
-            tree = ast.parse(code)
-            names = set()
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Name):
-                    names.add(node.id.lower())
-                elif isinstance(node, ast.FunctionDef):
-                    names.add(node.name.lower())
-                elif isinstance(node, ast.ClassDef):
-                    names.add(node.name.lower())
-                elif isinstance(node, ast.Attribute):
-                    names.add(node.attr.lower())
-            
-            return names
-            
-        except SyntaxError:
-            # Fallback to word extraction if AST parsing fails
-            return self._extract_words(code)
+        names = set()
+        
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                names.add(node.id.lower())
+            elif isinstance(node, ast.FunctionDef):
+                names.add(node.name.lower())
+            elif isinstance(node, ast.ClassDef):
+                names.add(node.name.lower())
+            elif isinstance(node, ast.Attribute):
+                names.add(node.attr.lower())
+        
+        return names
     
-    def _remove_comments_and_strings(self, code: str) -> str:
+    def _remove_comments_and_strings(self, code: str, parses: bool) -> str:
         """Remove comments and string literals to focus on code structure."""
-        try:
-            tree = ast.parse(code)
-            
-            # Get all string literal positions to remove them
-            string_positions = []
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Constant) and isinstance(node.value, str):
-                    if hasattr(node, 'lineno') and hasattr(node, 'col_offset'):
-                        string_positions.append((node.lineno, node.col_offset))
-                elif isinstance(node, ast.Str):  # For older Python versions
-                    if hasattr(node, 'lineno') and hasattr(node, 'col_offset'):
-                        string_positions.append((node.lineno, node.col_offset))
-            
+        if parses:
             # Simple approach: remove lines starting with # and triple-quoted strings
             lines = code.split('\n')
             filtered_lines = []
@@ -192,15 +188,14 @@ class JaccardCalculator:
                     filtered_lines.append(line)
             
             return '\n'.join(filtered_lines)
-            
-        except SyntaxError:
-            # Fallback: simple regex-based removal
-            # Remove single-line comments
-            code = re.sub(r'#.*$', '', code, flags=re.MULTILINE)
-            # Remove triple-quoted strings (simplified)
-            code = re.sub(r'""".*?"""', '', code, flags=re.DOTALL)
-            code = re.sub(r"'''.*?'''", '', code, flags=re.DOTALL)
-            return code
+        
+        # Fallback: simple regex-based removal
+        # Remove single-line comments
+        code = re.sub(r'#.*$', '', code, flags=re.MULTILINE)
+        # Remove triple-quoted strings (simplified)
+        code = re.sub(r'""".*?"""', '', code, flags=re.DOTALL)
+        code = re.sub(r"'''.*?'''", '', code, flags=re.DOTALL)
+        return code
     
     def calculate_weighted_jaccard(self, file1: str, file2: str, weights: Dict[str, float] = None) -> float:
         """
@@ -0,0 +1,457 @@
+"""
+Exact tree edit distance (Zhang-Shasha) over postorder-encoded trees.
+
+Trees are flat arrays in postorder: an interned integer label, the parent,
+the leftmost leaf descendant and an insert/delete cost per node. The distance
+is computed iteratively from the keyroots (the highest node of every leftmost
+path), so deep trees can't hit the recursion limit, and the tables are
+allocated once per pair instead of once per subproblem.
+
+Renaming a node costs nothing if the labels match and the larger of the two
+node costs otherwise; with unit costs this is the classic unit-cost TED.
+
+Two things keep the pure Python implementation affordable without giving up
+exactness:
+
+- Zhang-Shasha works equally well on mirrored trees (rightmost instead of
+  leftmost paths). The mirror with fewer subproblems is used; for Python ASTs
+  that is usually the mirror, with roughly half the work.
+- Matched nodes can only sit as many postorder positions apart as there are
+  deleted (or inserted) nodes before them, and a mapping costing `d` deletes
+  at most `(d + size difference) / 2` nodes. Filling only the band of the
+  tables within `k` positions of the diagonal always yields the cost of a real
+  edit script, and that cost is exact once it is small enough for `k`; one
+  more pass with a band derived from it is always exact. Similar trees, the
+  common case at low temperatures, take a fraction of the full computation.
+
+Even so, two dissimilar files of a few hundred lines take seconds to tens of
+seconds. `bounded_tree_edit_distance` therefore computes the exact distance
+only while it stays cheap: for small trees, and for trees whose band, derived
+from an upper bound, is narrow. The upper bound is computed for every pair:
+the cost of a top-down edit script, where roots are mapped onto each other and
+the children of every mapped pair are aligned like sequences
+(`top_down_distance`). It takes milliseconds, but it is a different quantity
+(1.1-1.8x the exact distance on real files) and must not stand in for it.
+"""
+
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Larger than any real distance; adding costs to it keeps it out of every minimum
+_UNREACHABLE = 1 << 60
+# Band of the first attempt; most pairs of similar files are within it
+INITIAL_BAND = 64
+# bounded_tree_edit_distance computes the exact distance for trees of at most this many
+# node pairs (two 100-node trees, tens of milliseconds)...
+EXACT_MAX_NODE_PAIRS = 100 * 100
+# ...or for a band of at most this many positions (about 0.2 s for two 1000-node trees)
+EXACT_MAX_BAND = 16
+
+
+class PostorderTree:
+    """Tree as postorder arrays, built once per tree and reused for every distance."""
+
+    __slots__ = ("labels", "parents", "leftmost", "costs", "keyroots", "_mirror", "_children")
+
+    def __init__(self, labels: List[int], parents: List[int], costs: Optional[List[int]] = None):
+        """
+        Args:
+            labels: Interned label of every node, in postorder
+            parents: Postorder index of the parent of every node (-1 for the root)
+            costs: Insert/delete cost of every node (defaults to 1)
+        """
+        self.labels = labels
+        self.parents = parents
+        self.costs = costs if costs is not None else [1] * len(labels)
+        self.leftmost = _leftmost_leaves(parents)
+        self.keyroots = keyroots(self.leftmost)
+        self._mirror: Optional["PostorderTree"] = None
+        self._children: Optional[List[List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def from_tree(cls, root, children: Callable[[object], Sequence], label: Callable[[object], Hashable],
+                  label_ids: Dict[Hashable, int], cost: Optional[Callable[[object], int]] = None) -> "PostorderTree":
+        """
+        Encode an arbitrary tree without recursion.
+
+        Args:
+            root: Root node
+            children: Returns the children of a node, in order
+            label: Returns the label of a node; equal labels cost nothing to rename
+            label_ids: Label interning table, shared by all trees that are compared
+            cost: Returns the insert/delete cost of a node (defaults to 1)
+        """
+        labels: List[int] = []
+        costs: List[int] = []
+        # Postorder index of every node's parent, patched in once the parent is emitted
+        parents: List[int] = []
+        pending_children: List[List[int]] = [[]]
+
+        # (node, whether its children have been visited)
+        stack: List[Tuple[object, bool]] = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children(node)))
+                pending_children.append([])
+                continue
+
+            index = len(labels)
+            for child in pending_children.pop():
+                parents[child] = index
+            pending_children[-1].append(index)
+
+            node_label = label(node)
+            label_id = label_ids.get(node_label)
+            if label_id is None:
+                label_id = label_ids[node_label] = len(label_ids)
+            labels.append(label_id)
+            parents.append(-1)
+            costs.append(cost(node) if cost is not None else 1)
+
+        return cls(labels, parents, costs)
+
+    def with_costs(self, costs: List[int]) -> "PostorderTree":
+        """The same tree with other insert/delete costs, sharing the label and structure arrays."""
+        tree = PostorderTree.__new__(PostorderTree)
+        tree.labels, tree.parents, tree.leftmost, tree.keyroots = self.labels, self.parents, self.leftmost, self.keyroots
+        tree.costs = costs
+        tree._mirror = None
+        tree._children = self._children
+        return tree
+
+    def children(self) -> List[List[int]]:
+        """Postorder indices of the children of every node, in order."""
+        if self._children is None:
+            self._children = [[] for _ in self.labels]
+            for node, parent in enumerate(self.parents):
+                if parent >= 0:
+                    self._children[parent].append(node)
+        return self._children
+
+    def subtree_costs(self) -> List[int]:
+        """Total cost of the subtree rooted at every node, i.e. of deleting or inserting it whole."""
+        prefix = [0]
+        for cost in self.costs:
+            prefix.append(prefix[-1] + cost)
+        return [prefix[node + 1] - prefix[left] for node, left in enumerate(self.leftmost)]
+
+    def mirrored(self) -> "PostorderTree":
+        """The same tree with the children of every node reversed."""
+        if self._mirror is None:
+            size = len(self.labels)
+            children = self.children()
+
+            # Postorder of the mirror is the reverse of the preorder of the original
+            order: List[int] = []
+            stack = [size - 1] if size else []
+            while stack:
+                node = stack.pop()
+                order.append(node)
+                stack.extend(children[node])
+            order.reverse()
+
+            position = {node: index for index, node in enumerate(order)}
+            self._mirror = PostorderTree(
+                [self.labels[node] for node in order],
+                [position[self.parents[node]] if self.parents[node] >= 0 else -1 for node in order],
+                [self.costs[node] for node in order],
+            )
+            self._mirror._mirror = self
+        return self._mirror
+
+    def subproblems(self) -> int:
+        """Rows Zhang-Shasha processes for this tree; the work of a pair is the product for both trees."""
+        leftmost = self.leftmost
+        return sum(root - leftmost[root] + 1 for root in self.keyroots)
+
+
+def _leftmost_leaves(parents: List[int]) -> List[int]:
+    # In postorder a subtree is contiguous and starts with its leftmost leaf; the first
+    # child of a parent is reached before the parent, so scanning in order suffices
+    leftmost = list(range(len(parents)))
+    for node, parent in enumerate(parents):
+        if parent >= 0 and leftmost[parent] == parent:
+            leftmost[parent] = leftmost[node]
+    return leftmost
+
+
+def keyroots(leftmost: List[int]) -> List[int]:
+    """Postorder indices of the highest node on every leftmost path, in increasing order."""
+    highest: Dict[int, int] = {}
+    for index, leaf in enumerate(leftmost):
+        highest[leaf] = index
+    return sorted(highest.values())
+
+
+def tree_edit_distance(tree1: PostorderTree, tree2: PostorderTree, upper_bound: Optional[int] = None) -> int:
+    """
+    Minimum total cost of node deletions, insertions and renames turning `tree1` into `tree2`.
+
+    Both trees must use labels from the same interning table, and every node cost must be at least 1.
+    A known `upper_bound` of the distance narrows the band so that the first pass is exact.
+    """
+    size1, size2 = len(tree1), len(tree2)
+    if size1 == 0 or size2 == 0:
+        return sum(tree1.costs) + sum(tree2.costs)
+
+    if tree1.labels == tree2.labels and tree1.parents == tree2.parents and tree1.costs == tree2.costs:
+        return 0
+
+    mirror1, mirror2 = tree1.mirrored(), tree2.mirrored()
+    if mirror1.subproblems() * mirror2.subproblems() < tree1.subproblems() * tree2.subproblems():
+        tree1, tree2 = mirror1, mirror2
+
+    # Every unmatched node costs at least 1, so a mapping costing `d` deletes or inserts at most
+    # (d + size_gap) / 2 nodes of either tree, which bounds how far apart matched nodes can be
+    size_gap = abs(size1 - size2)
+    if upper_bound is None:
+        band = max(INITIAL_BAND, size_gap)
+    else:
+        band = _band_for(upper_bound, size_gap)
+    while band < max(size1, size2):
+        distance = _zhang_shasha(tree1, tree2, band)
+        if distance + size_gap <= 2 * band:
+            return distance
+        if distance >= _UNREACHABLE:
+            band *= 2
+        else:
+            # The result is the cost of a real edit script, so the optimum fits into this band
+            band = _band_for(distance, size_gap)
+
+    # Wide enough to cover every pair of nodes
+    return _zhang_shasha(tree1, tree2, None)
+
+
+def _band_for(upper_bound: int, size_gap: int) -> int:
+    # Smallest band that holds every mapping costing at most `upper_bound`
+    return (upper_bound + size_gap + 1) // 2
+
+
+def bounded_tree_edit_distance(tree1: PostorderTree, tree2: PostorderTree,
+                               label_kinds: Optional[Sequence[int]] = None) -> Tuple[Optional[int], int]:
+    """
+    Tree edit distance if it is cheap to compute, and the top-down upper bound of it.
+
+    Args:
+        tree1, tree2: Trees with labels from the same interning table and node costs of at least 1
+        label_kinds: Kind of every label, see `top_down_distance`
+
+    Returns:
+        (exact distance, or None if it is too expensive; `top_down_distance`)
+    """
+    if tree1.labels == tree2.labels and tree1.parents == tree2.parents and tree1.costs == tree2.costs:
+        return 0, 0
+
+    upper_bound = top_down_distance(tree1, tree2, label_kinds)
+    if (len(tree1) * len(tree2) <= EXACT_MAX_NODE_PAIRS
+            or _band_for(upper_bound, abs(len(tree1) - len(tree2))) <= EXACT_MAX_BAND):
+        return tree_edit_distance(tree1, tree2, upper_bound), upper_bound
+    return None, upper_bound
+
+
+def top_down_distance(tree1: PostorderTree, tree2: PostorderTree,
+                      label_kinds: Optional[Sequence[int]] = None) -> int:
+    """
+    Cost of the cheapest top-down edit script turning `tree1` into `tree2`, an upper bound of the tree edit distance.
+
+    The roots are mapped onto each other. Under every mapped pair of nodes, the child subtrees are
+    aligned like two sequences: a child subtree is deleted or inserted whole, or mapped onto one of
+    the same kind on the other side, in order. Identical subtrees cost nothing without being visited.
+
+    Args:
+        tree1, tree2: Trees with labels from the same interning table
+        label_kinds: Kind of every label; only subtrees whose roots have the same kind are mapped
+            onto each other (by default, only those with the same label)
+    """
+    size1, size2 = len(tree1), len(tree2)
+    if size1 == 0 or size2 == 0:
+        return sum(tree1.costs) + sum(tree2.costs)
+
+    # Identical subtrees of both trees get the same signature
+    signature_ids: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+    signatures1 = _subtree_signatures(tree1, signature_ids)
+    signatures2 = _subtree_signatures(tree2, signature_ids)
+    root1, root2 = size1 - 1, size2 - 1
+    if signatures1[root1] == signatures2[root2]:
+        return 0
+
+    labels1, labels2 = tree1.labels, tree2.labels
+    kinds1 = labels1 if label_kinds is None else [label_kinds[label] for label in labels1]
+    kinds2 = labels2 if label_kinds is None else [label_kinds[label] for label in labels2]
+    children1, children2 = tree1.children(), tree2.children()
+    weights1, weights2 = tree1.subtree_costs(), tree2.subtree_costs()
+
+    # Distances of the differing subtree pairs that can be mapped, filled children first
+    distances: Dict[Tuple[int, int], int] = {}
+    stack = [(root1, root2)]
+    while stack:
+        node1, node2 = stack[-1]
+        if (node1, node2) in distances:
+            stack.pop()
+            continue
+
+        by_kind: Dict[int, List[int]] = {}
+        for child2 in children2[node2]:
+            by_kind.setdefault(kinds2[child2], []).append(child2)
+        pending = [(child1, child2) for child1 in children1[node1] for child2 in by_kind.get(kinds1[child1], ())
+                   if signatures1[child1] != signatures2[child2] and (child1, child2) not in distances]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+
+        # Sequence alignment of the children; previous[y] aligns the children so far with the first y on the right
+        right = children2[node2]
+        previous = [0] * (len(right) + 1)
+        for y, child2 in enumerate(right):
+            previous[y + 1] = previous[y] + weights2[child2]
+        for child1 in children1[node1]:
+            delete, kind1, signature1 = weights1[child1], kinds1[child1], signatures1[child1]
+            row = [previous[0] + delete]
+            for y, child2 in enumerate(right):
+                best = previous[y + 1] + delete
+                candidate = row[y] + weights2[child2]
+                if candidate < best:
+                    best = candidate
+                if kinds2[child2] == kind1:
+                    if signatures2[child2] == signature1:
+                        candidate = previous[y]
+                    else:
+                        candidate = previous[y] + distances[(child1, child2)]
+                    if candidate < best:
+                        best = candidate
+                row.append(best)
+            previous = row
+
+        rename = 0 if labels1[node1] == labels2[node2] else max(tree1.costs[node1], tree2.costs[node2])
+        distances[(node1, node2)] = rename + previous[-1]
+
+    return distances[(root1, root2)]
+
+
+def _subtree_signatures(tree: PostorderTree, signature_ids: Dict[Tuple[int, Tuple[int, ...]], int]) -> List[int]:
+    # Interned (label, child signatures); children precede their parent in postorder
+    signatures: List[int] = []
+    for label, children in zip(tree.labels, tree.children()):
+        key = (label, tuple(signatures[child] for child in children))
+        signature = signature_ids.get(key)
+        if signature is None:
+            signature = signature_ids[key] = len(signature_ids)
+        signatures.append(signature)
+    return signatures
+
+
+def _zhang_shasha(tree1: PostorderTree, tree2: PostorderTree, band: Optional[int]) -> int:
+    """Distance over mappings whose matched nodes are at most `band` postorder positions apart."""
+    size1, size2 = len(tree1), len(tree2)
+    if band is None:
+        band = max(size1, size2)
+
+    # Tree distances between subtree pairs, filled keyroot pair by keyroot pair;
+    # pairs outside the band are never computed and stay unreachable
+    tree_dist = [[_UNREACHABLE] * size2 for _ in range(size1)]
+    # Forest distances of the current keyroot pair, offset by one for the empty forest
+    forest = [[_UNREACHABLE] * (size2 + 2) for _ in range(size1 + 1)]
+    unreachable_row = [_UNREACHABLE] * (size2 + 2)
+
+    leftmost1, leftmost2 = tree1.leftmost, tree2.leftmost
+    columns = [_KeyrootColumns(tree2, j) for j in tree2.keyroots]
+    for i in tree1.keyroots:
+        left1 = leftmost1[i]
+        for keyroot2 in columns:
+            # The nodes left of two matched nodes differ in number by no more than the band either
+            if abs(left1 - keyroot2.left) > band:
+                continue
+            _forest_distances(left1, i, keyroot2, tree1, tree2, band, forest, tree_dist, unreachable_row)
+
+    return tree_dist[size1 - 1][size2 - 1]
+
+
+class _KeyrootColumns:
+    """Per-column data of the forest table of a keyroot in the second tree, shared by all rows."""
+
+    __slots__ = ("left", "width", "subtree_columns", "insert_costs", "insert_sums")
+
+    def __init__(self, tree: PostorderTree, keyroot: int):
+        left = tree.leftmost[keyroot]
+        self.left = left
+        self.width = keyroot - left + 2
+        # Column of the forest left of the subtree ending at every column (index 0 unused)
+        self.subtree_columns = [0] + [tree.leftmost[node] - left for node in range(left, keyroot + 1)]
+        self.insert_costs = [0] + tree.costs[left:keyroot + 1]
+        # Cost of inserting the first y nodes of the forest
+        self.insert_sums = [0] * self.width
+        for y in range(1, self.width):
+            self.insert_sums[y] = self.insert_sums[y - 1] + tree.costs[left + y - 1]
+
+
+def _forest_distances(left1: int, i: int, keyroot2: _KeyrootColumns, tree1: PostorderTree,
+                      tree2: PostorderTree, band: int, forest: List[List[int]],
+                      tree_dist: List[List[int]], unreachable_row: List[int]) -> None:
+    # forest[x][y]: distance between nodes left1..left1+x-1 of tree 1 and left2..left2+y-1 of tree 2.
+    # Only cells with |(left1 + x) - (left2 + y)| <= band are computed; the rest of every row is
+    # reset to unreachable, so no row ever exposes values left over from another keyroot pair
+    labels1, leftmost1, costs1 = tree1.labels, tree1.leftmost, tree1.costs
+    labels2, leftmost2 = tree2.labels, tree2.leftmost
+    left2, width = keyroot2.left, keyroot2.width
+    subtree_columns, insert_costs, insert_sums = keyroot2.subtree_columns, keyroot2.insert_costs, keyroot2.insert_sums
+    shift = left1 - left2
+
+    row = forest[0]
+    high = min(width - 1, shift + band)
+    row[:high + 1] = insert_sums[:high + 1]
+    row[high + 1:width + 1] = unreachable_row[high + 1:width + 1]
+
+    previous = row
+    for x in range(1, i - left1 + 2):
+        node1 = left1 + x - 1
+        delete = costs1[node1]
+        subtree_row = forest[leftmost1[node1] - left1]
+        dist_row = tree_dist[node1]
+
+        low = max(0, x + shift - band)
+        high = min(width - 1, x + shift + band)
+        if low > high:
+            break
+
+        row = forest[x]
+        if low > 0:
+            row[:low] = unreachable_row[:low]
+        if high < width - 1:
+            row[high + 1:width + 1] = unreachable_row[high + 1:width + 1]
+        if low == 0:
+            row[0] = current = previous[0] + delete
+            low = 1
+        else:
+            current = _UNREACHABLE
+
+        label1 = labels1[node1]
+        on_path1 = leftmost1[node1] == left1
+        for y in range(low, high + 1):
+            node2 = left2 + y - 1
+            insert = insert_costs[y]
+            best = previous[y] + delete
+            candidate = current + insert
+            if candidate < best:
+                best = candidate
+
+            if on_path1 and leftmost2[node2] == left2:
+                # Both forests are whole trees: record their distance
+                if labels2[node2] == label1:
+                    candidate = previous[y - 1]
+                else:
+                    candidate = previous[y - 1] + (delete if delete > insert else insert)
+                if candidate < best:
+                    best = candidate
+                dist_row[node2] = best
+            else:
+                candidate = subtree_row[subtree_columns[y]] + dist_row[node2]
+                if candidate < best:
+                    best = candidate
+
+            row[y] = current = best
+        previous = row
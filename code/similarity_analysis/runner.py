@@ -1,12 +1,12 @@
 from pathlib import Path
 from typing import Optional
 
-from .similarity_storage import SimilarityStorage
+from .similarity_storage import SimilarityStorage, DEFAULT_SIMILARITY_WORKERS
 from .data_exporter import CleanVizExporter
 
 
 def run_similarity_analysis(input_dir: str = "dry_run_output", force_recompute: bool = False, 
-                          export_viz: bool = False) -> None:
+                          export_viz: bool = False, workers: int = DEFAULT_SIMILARITY_WORKERS) -> None:
     """
     Run similarity analysis on generated code.
     
@@ -14,10 +14,12 @@ def run_similarity_analysis(input_dir: str = "dry_run_output", force_recompute:
         input_dir: Directory containing generated code
         force_recompute: Whether to recompute existing analyses
         export_viz: Whether to export visualization data
+        workers: Number of worker processes comparing pairs in parallel
     """
     print(f"🔍 Running similarity analysis on: {input_dir}")
     print(f"🔄 Force recompute: {force_recompute}")
     print(f"📊 Export visualization: {export_viz}")
+    print(f"⚡ Workers: {workers}")
     print("-" * 50)
     
     try:
@@ -28,7 +30,10 @@ def run_similarity_analysis(input_dir: str = "dry_run_output", force_recompute:
         
         # Run batch analysis
         print("🚀 Starting clean similarity analysis...")
-        results = storage.batch_analyze_all(force_recompute=force_recompute)
+        try:
+            results = storage.batch_analyze_all(force_recompute=force_recompute, workers=workers)
+        finally:
+            storage.close()
         
         # Report results
         files_created = len(results.get("files_created", []))
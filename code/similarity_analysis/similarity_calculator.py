@@ -8,22 +8,27 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 import json
 
-from .metrics.codebleu_wrapper import CodeBLEUCalculator, CODEBLEU_AVAILABLE
+from ..static_analysis.execution.compile_index import CompileIndex
+from .metrics.codebleu_wrapper import CodeBLEUCalculator, CODEBLEU_AVAILABLE, INVALID_SYNTAX_ERROR
 from .metrics.ast_metrics import ASTMetricsCalculator
 from .metrics.jaccard_calculator import JaccardCalculator
+from .file_features import FileFeatureCache, FileFeatures
 
 
 class SimilarityCalculator:
     """Main orchestrator for calculating all code similarity metrics."""
     
-    def __init__(self, enable_codebleu: bool = True):
+    def __init__(self, enable_codebleu: bool = True, compile_index: Optional[CompileIndex] = None):
         """
         Initialize similarity calculator with optional components.
         
         Args:
             enable_codebleu: Whether to use CodeBLEU (requires external library)
+            compile_index: Shared compile results; pairs with a file that doesn't parse get
+                the CodeBLEU and AST error results without running the parser-based metrics
         """
         self.enable_codebleu = enable_codebleu and CODEBLEU_AVAILABLE
+        self.compile_index = compile_index
         
         # Initialize component calculators
         if self.enable_codebleu:
@@ -37,6 +42,8 @@ class SimilarityCalculator:
             
         self.ast_calc = ASTMetricsCalculator()
         self.jaccard_calc = JaccardCalculator()
+        # Every file is read and parsed once, however many pairs it is part of
+        self.features = FileFeatureCache(self.ast_calc, self.jaccard_calc, self.codebleu_calc, compile_index)
     
     def calculate_all_similarities(self, file1: str, file2: str) -> Dict[str, Any]:
         """
@@ -60,10 +67,28 @@ class SimilarityCalculator:
             "calculation_time": 0.0
         }
         
+        features1 = self.features.get(file1)
+        features2 = self.features.get(file2)
+        read_error = features1.error or features2.error
+        syntax_checked, syntax_error = self._check_syntax(features1, features2)
+        
         # Calculate CodeBLEU metrics
         if self.enable_codebleu and self.codebleu_calc:
             try:
-                codebleu_metrics = self.codebleu_calc.calculate_similarity(file1, file2)
+                if syntax_error:
+                    codebleu_metrics = self.codebleu_calc.error_result(INVALID_SYNTAX_ERROR)
+                elif read_error:
+                    codebleu_metrics = self.codebleu_calc.error_result(read_error)
+                elif not (features1.parses and features2.parses):
+                    # Reported exactly like the string-based calculation reports code that doesn't parse
+                    codebleu_metrics = self.codebleu_calc.calculate_similarity_from_strings(
+                        features1.source, features2.source, syntax_checked)
+                elif features1.codebleu_error or features2.codebleu_error:
+                    codebleu_metrics = self.codebleu_calc.error_result(
+                        features1.codebleu_error or features2.codebleu_error)
+                else:
+                    codebleu_metrics = self.codebleu_calc.calculate_similarity_from_features(
+                        features1.codebleu_features, features2.codebleu_features)
                 result["metrics"]["codebleu"] = codebleu_metrics
                 
                 if "error" in codebleu_metrics:
@@ -77,7 +102,12 @@ class SimilarityCalculator:
         
         # Calculate AST metrics
         try:
-            ast_metrics = self.ast_calc.calculate_all_metrics(file1, file2)
+            ast_error = syntax_error or read_error or features1.ast_error or features2.ast_error
+            if ast_error:
+                ast_metrics = self.ast_calc.error_result(ast_error)
+            else:
+                ast_metrics = self.ast_calc.calculate_all_metrics_from_encodings(
+                    features1.ast_encoding, features2.ast_encoding)
             result["metrics"]["ast"] = ast_metrics
             
             if "error" in ast_metrics:
@@ -89,7 +119,12 @@ class SimilarityCalculator:
         
         # Calculate Jaccard metrics
         try:
-            jaccard_metrics = self.jaccard_calc.calculate_similarity(file1, file2)
+            jaccard_error = read_error or features1.jaccard_error or features2.jaccard_error
+            if jaccard_error:
+                jaccard_metrics = self.jaccard_calc.error_result(jaccard_error)
+            else:
+                jaccard_metrics = self.jaccard_calc.calculate_similarity_from_features(
+                    features1.jaccard_features, features2.jaccard_features)
             result["metrics"]["jaccard"] = jaccard_metrics
             
             if "error" in jaccard_metrics:
@@ -105,6 +140,21 @@ class SimilarityCalculator:
         result["calculation_time"] = time.time() - start_time
         return result
     
+    def _check_syntax(self, features1: FileFeatures, features2: FileFeatures) -> Tuple[bool, Optional[str]]:
+        """
+        Look both files up in the compile index.
+        
+        Returns:
+            (both files are known to parse, first parse error); (False, None) without an
+            index or for unreadable files, which are reported as read errors instead
+        """
+        statuses = [features1.compile_status, features2.compile_status]
+        if None in statuses:
+            return False, None
+        
+        errors = [status.error for status in statuses if not status.parses]
+        return not errors, errors[0] if errors else None
+    
     def _calculate_composite_scores(self, metrics: Dict[str, Any]) -> Dict[str, float]:
         """Calculate composite similarity scores from individual metrics."""
         composite = {}
@@ -123,7 +173,8 @@ class SimilarityCalculator:
             # AST similarity (inverse of normalized edit distance)
             if "ast" in metrics:
                 ast_data = metrics["ast"]
-                if "ast_edit_distance" in ast_data and not isinstance(ast_data["ast_edit_distance"], str):
+                # Only the exact distance; it is None where it was too expensive to compute
+                if isinstance(ast_data.get("ast_edit_distance"), (int, float)):
                     # Normalize edit distance to similarity (simple approach)
                     if ast_data["ast_edit_distance"] != float('inf'):
                         ast_sim = 1.0 / (1.0 + ast_data["ast_edit_distance"] / 10.0)
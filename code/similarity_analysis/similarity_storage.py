@@ -4,22 +4,59 @@ Stores only essential data without statistical bloat.
 """
 
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+from tqdm import tqdm
+
+from ..static_analysis.execution.compile_index import CompileIndex, COMPILE_INDEX_FILE
 from .similarity_calculator import SimilarityCalculator
 
+# Parallel workers for batch_analyze_all; the cells are spread over them
+DEFAULT_SIMILARITY_WORKERS = os.cpu_count() or 1
+
+# Stored in the metadata of every file; bump when a stored metric changes its meaning.
+# Files without it (version 1) computed TED/TSED with a positional child alignment,
+# version 2 stored upper bounds under the exact metric names for most pairs.
+SIMILARITY_FORMAT_VERSION = 3
+
+# How the edit distances of this format version are computed, stored with every file
+METRIC_NOTES = {
+    "ast_edit_distance": "Exact unit-cost tree edit distance (Zhang-Shasha); null where it was too "
+                         "expensive to compute",
+    "ast_edit_distance_upper_bound": "Cost of a top-down edit script, an upper bound of "
+                                     "ast_edit_distance; stored for every pair",
+    "tsed": "Exact node type weighted tree edit distance; null where it was too expensive to compute",
+    "tsed_upper_bound": "Upper bound of tsed like ast_edit_distance_upper_bound; stored for every pair",
+}
+
 
 class SimilarityStorage:
     """Store and manage raw similarity metrics data."""
     
-    def __init__(self, base_dir: str = "dry_run_output"):
+    def __init__(self, base_dir: str = "dry_run_output", compile_index: Optional[CompileIndex] = None):
+        """
+        Args:
+            base_dir: Output directory containing the `code` tree
+            compile_index: Compile results shared with the test stage (defaults to
+                `<base_dir>/cache/compile_index.sqlite`)
+        """
         self.base_dir = Path(base_dir)
         # New hierarchical structure
         self.similarity_dir = self.base_dir / "similarity_analysis" / "pairwise_within_temperature"
         self.similarity_dir.mkdir(parents=True, exist_ok=True)
 
-        self.similarity_calc = SimilarityCalculator(enable_codebleu=True)
+        self._owns_compile_index = compile_index is None
+        self.compile_index = compile_index or CompileIndex(self.base_dir / COMPILE_INDEX_FILE)
+        self.similarity_calc = SimilarityCalculator(enable_codebleu=True, compile_index=self.compile_index)
+    
+    def close(self) -> None:
+        """Close the compile index if this storage opened it."""
+        if self._owns_compile_index:
+            self.compile_index.close()
     
     def analyze_and_store_temperature(self, model: str, challenge: str, prompt: str, 
                                     temperature_folder: str) -> str:
@@ -35,12 +72,45 @@ class SimilarityStorage:
         Returns:
             Path to stored file
         """
+        pairs, error = self._find_pairs(model, challenge, prompt, temperature_folder)
+        if error:
+            return self._store_error(model, challenge, prompt, temperature_folder, error)
+        
+        # Calculate pairwise similarities
+        pairwise_data = []
+
+        for (iter1_num, file1), (iter2_num, file2) in pairs:
+            # Calculate all similarity metrics
+            similarity_result = self.similarity_calc.calculate_all_similarities(file1, file2)
+
+            # Extract clean metrics
+            clean_metrics = self._extract_clean_metrics(similarity_result)
+
+            # Add iteration indices to metrics
+            comparison = {
+                "i": iter1_num,
+                "j": iter2_num,
+                **clean_metrics
+            }
+            pairwise_data.append(comparison)
+        
+        # Store clean data
+        return self._store_similarity_data(model, challenge, prompt, temperature_folder, pairwise_data)
+    
+    def _find_pairs(self, model: str, challenge: str, prompt: str,
+                    temperature_folder: str) -> Tuple[List[Tuple[Tuple[int, str], Tuple[int, str]]], Optional[str]]:
+        """
+        Find the model's files in a temperature directory.
+        
+        Returns:
+            ((iteration, path) of both files of every pair in comparison order, error); the
+            error is set if the directory is missing or has fewer than 2 iterations
+        """
         # Path to temperature directory
         temp_path = self.base_dir / "code" / challenge / prompt / temperature_folder
         
         if not temp_path.exists():
-            return self._store_error(model, challenge, prompt, temperature_folder, 
-                                   f"Temperature directory not found: {temp_path}")
+            return [], f"Temperature directory not found: {temp_path}"
         
         # Find iteration directories and model files
         iterations = []
@@ -52,38 +122,17 @@ class SimilarityStorage:
                     iterations.append((iter_num, str(model_file)))
         
         if len(iterations) < 2:
-            return self._store_error(model, challenge, prompt, temperature_folder, 
-                                   f"Need at least 2 iterations, found {len(iterations)}")
+            return [], f"Need at least 2 iterations, found {len(iterations)}"
         
         # Sort by iteration number
         iterations.sort()
         
-        # Calculate pairwise similarities
-        pairwise_data = []
-
-        for i in range(len(iterations)):
-            for j in range(i + 1, len(iterations)):
-                iter1_num, file1 = iterations[i]
-                iter2_num, file2 = iterations[j]
-
-                # Calculate all similarity metrics
-                similarity_result = self.similarity_calc.calculate_all_similarities(file1, file2)
-
-                # Extract clean metrics
-                clean_metrics = self._extract_clean_metrics(similarity_result)
-
-                # Add iteration indices to metrics
-                comparison = {
-                    "i": iter1_num,
-                    "j": iter2_num,
-                    **clean_metrics
-                }
-                pairwise_data.append(comparison)
-        
-        # Store clean data
-        return self._store_similarity_data(model, challenge, prompt, temperature_folder, pairwise_data)
+        pairs = [(iterations[i], iterations[j])
+                 for i in range(len(iterations)) for j in range(i + 1, len(iterations))]
+        return pairs, None
     
-    def _extract_clean_metrics(self, similarity_result: Dict[str, Any]) -> Dict[str, float]:
+    @staticmethod
+    def _extract_clean_metrics(similarity_result: Dict[str, Any]) -> Dict[str, float]:
         """Extract only the core similarity metrics without statistical noise."""
         clean_metrics = {}
 
@@ -104,10 +153,15 @@ class SimilarityStorage:
         # AST metrics
         if "ast" in similarity_result.get("metrics", {}):
             ast_data = similarity_result["metrics"]["ast"]
+            # Exact distances are None where they were not computed and stay null
             if "ast_edit_distance" in ast_data and not isinstance(ast_data["ast_edit_distance"], str):
                 clean_metrics["ast_edit_distance"] = ast_data["ast_edit_distance"]
             if "tsed" in ast_data and not isinstance(ast_data["tsed"], str):
-                clean_metrics["tsed"] = round(ast_data["tsed"], 4)
+                clean_metrics["tsed"] = round(ast_data["tsed"], 4) if ast_data["tsed"] is not None else None
+            if "ast_edit_distance_upper_bound" in ast_data and not isinstance(ast_data["ast_edit_distance_upper_bound"], str):
+                clean_metrics["ast_edit_distance_upper_bound"] = ast_data["ast_edit_distance_upper_bound"]
+            if "tsed_upper_bound" in ast_data and not isinstance(ast_data["tsed_upper_bound"], str):
+                clean_metrics["tsed_upper_bound"] = round(ast_data["tsed_upper_bound"], 4)
             if "node_histogram_distance" in ast_data and not isinstance(ast_data["node_histogram_distance"], str):
                 clean_metrics["node_histogram_distance"] = round(ast_data["node_histogram_distance"], 4)
             if "subtree_overlap_ratio" in ast_data and not isinstance(ast_data["subtree_overlap_ratio"], str):
@@ -149,6 +203,8 @@ class SimilarityStorage:
         data = {
             "metadata": {
                 "analysis_type": "pairwise_within_temperature",
+                "format_version": SIMILARITY_FORMAT_VERSION,
+                "metric_notes": METRIC_NOTES,
                 "challenge": challenge,
                 "model": model,
                 "temperature": temp_params.get("temperature"),
@@ -188,6 +244,7 @@ class SimilarityStorage:
         data = {
             "metadata": {
                 "analysis_type": "pairwise_within_temperature",
+                "format_version": SIMILARITY_FORMAT_VERSION,
                 "challenge": challenge,
                 "model": model,
                 "temperature": temp_params.get("temperature"),
@@ -232,12 +289,15 @@ class SimilarityStorage:
         
         return params
     
-    def batch_analyze_all(self, force_recompute: bool = False) -> Dict[str, Any]:
+    def batch_analyze_all(self, force_recompute: bool = False, workers: int = 1) -> Dict[str, Any]:
         """
         Analyze all available model/challenge/prompt/temperature combinations.
         
         Args:
             force_recompute: Whether to recompute existing analyses
+            workers: Number of worker processes; with more than one, the combinations
+                are compared in parallel and every file is stored exactly
+                as a sequential run would store it
             
         Returns:
             Dict with analysis results
@@ -252,6 +312,9 @@ class SimilarityStorage:
             "errors": []
         }
         
+        # (model, challenge, prompt, temperature folder) of every combination to analyze
+        cells = []
+        
         # Find all combinations
         for challenge_dir in code_dir.iterdir():
             if not challenge_dir.is_dir():
@@ -284,28 +347,107 @@ class SimilarityStorage:
                                 if code_file.stem != "generation_params":
                                     models.add(code_file.stem)
                 
-                # Analyze each model/temperature combination
                 for model in models:
                     for temp_folder in temp_folders:
-                        try:
-                            # Check if file already exists in new structure
-                            filepath_check = self.similarity_dir / challenge / model / f"{temp_folder}.json"
-                            if not force_recompute and filepath_check.exists():
+                        # Check if file already exists in new structure
+                        filepath_check = self.similarity_dir / challenge / model / f"{temp_folder}.json"
+                        if not force_recompute and filepath_check.exists():
+                            if self._stored_format_version(filepath_check) == SIMILARITY_FORMAT_VERSION:
                                 print(f"Skipping {model}/{challenge}/{prompt}/{temp_folder} (already exists)")
                                 results["files_skipped"].append(str(filepath_check))
                                 continue
+                            # Files of an older format are replaced, so they are never mixed with current ones
+                            print(f"Recomputing {model}/{challenge}/{prompt}/{temp_folder} (outdated format)")
+                        cells.append((model, challenge, prompt, temp_folder))
+        
+        if workers > 1:
+            self._analyze_cells_parallel(cells, workers, results)
+            return results
+        
+        # Analyze each model/temperature combination
+        for model, challenge, prompt, temp_folder in cells:
+            try:
+                print(f"Analyzing {model}/{challenge}/{prompt}/{temp_folder}")
+                filepath = self.analyze_and_store_temperature(model, challenge, prompt, temp_folder)
+                results["files_created"].append(filepath)
 
-                            print(f"Analyzing {model}/{challenge}/{prompt}/{temp_folder}")
-                            filepath = self.analyze_and_store_temperature(model, challenge, prompt, temp_folder)
-                            results["files_created"].append(filepath)
-
-                        except Exception as e:
-                            error_msg = f"Error analyzing {model}/{challenge}/{prompt}/{temp_folder}: {str(e)}"
-                            results["errors"].append(error_msg)
-                            print(error_msg)
+            except Exception as e:
+                error_msg = f"Error analyzing {model}/{challenge}/{prompt}/{temp_folder}: {str(e)}"
+                results["errors"].append(error_msg)
+                print(error_msg)
         
         return results
     
+    def _analyze_cells_parallel(self, cells: List[Tuple[str, str, str, str]], workers: int,
+                                results: Dict[str, Any]) -> None:
+        """
+        Compare the pairs of all cells on a process pool and store every cell once its last pair is done.
+        
+        Every task compares a whole cell in one worker, so each file's features are extracted once
+        (see `FileFeatureCache`). With fewer cells than workers, cells are split into blocks of
+        consecutive rows (all pairs with the same first file), which extract shared files again.
+        Results are merged by pair position, so stored files and the created/error lists are in
+        the same order as in a sequential run.
+        """
+        # Files created per cell and the first error of a cell that couldn't be analyzed
+        stored: List[Optional[str]] = [None] * len(cells)
+        errors: List[Optional[str]] = [None] * len(cells)
+        cell_pairs = []
+        for index, cell in enumerate(cells):
+            try:
+                pairs, error = self._find_pairs(*cell)
+                if error:
+                    stored[index] = self._store_error(*cell, error)
+            except Exception as e:
+                pairs = []
+                errors[index] = str(e)
+            cell_pairs.append(pairs)
+        
+        comparisons: List[List[Optional[Dict[str, float]]]] = [[None] * len(pairs) for pairs in cell_pairs]
+        remaining = [len(pairs) for pairs in cell_pairs]
+        cells_with_pairs = sum(1 for pairs in cell_pairs if pairs)
+        blocks_per_cell = -(-workers // cells_with_pairs) if cells_with_pairs else 1
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_similarity_worker,
+                                 initargs=(self.compile_index.db_path,)) as executor:
+            futures = {}
+            for index, pairs in enumerate(cell_pairs):
+                for block in _row_blocks(pairs, blocks_per_cell):
+                    file_pairs = [(pairs[position][0][1], pairs[position][1][1]) for position in block]
+                    futures[executor.submit(_compare_file_pairs, file_pairs)] = (index, block)
+            
+            with tqdm(total=sum(remaining), desc="Comparing pairs", unit="pair") as progress:
+                for future in as_completed(futures):
+                    index, block = futures[future]
+                    try:
+                        for position, clean_metrics in zip(block, future.result()):
+                            comparisons[index][position] = clean_metrics
+                    except Exception as e:
+                        # A crashed worker loses the block, and the cell isn't stored incomplete
+                        if errors[index] is None:
+                            errors[index] = str(e)
+                    remaining[index] -= len(block)
+                    
+                    if remaining[index] == 0 and errors[index] is None:
+                        pairwise_data = [
+                            {"i": iter1_num, "j": iter2_num, **clean_metrics}
+                            for ((iter1_num, _), (iter2_num, _)), clean_metrics
+                            in zip(cell_pairs[index], comparisons[index])
+                        ]
+                        try:
+                            stored[index] = self._store_similarity_data(*cells[index], pairwise_data)
+                        except Exception as e:
+                            errors[index] = str(e)
+                    progress.update(len(block))
+        
+        for (model, challenge, prompt, temp_folder), filepath, error in zip(cells, stored, errors):
+            if error is not None:
+                error_msg = f"Error analyzing {model}/{challenge}/{prompt}/{temp_folder}: {error}"
+                results["errors"].append(error_msg)
+                print(error_msg)
+            elif filepath is not None:
+                results["files_created"].append(filepath)
+    
     def load_similarity_data(self, model: str, challenge: str,
                            temperature_folder: str) -> Optional[Dict[str, Any]]:
         """
@@ -327,10 +469,26 @@ class SimilarityStorage:
 
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
         except Exception as e:
             print(f"Error loading {filepath}: {e}")
             return None
+
+        version = data.get("metadata", {}).get("format_version", 1)
+        if version != SIMILARITY_FORMAT_VERSION:
+            print(f"Ignoring {filepath}: format version {version}, expected {SIMILARITY_FORMAT_VERSION} "
+                  f"(rerun the comparison to update it)")
+            return None
+        return data
+    
+    @staticmethod
+    def _stored_format_version(filepath: Path) -> Optional[int]:
+        """Format version of a stored file (1 if it predates versioning, None if it can't be read)."""
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f).get("metadata", {}).get("format_version", 1)
+        except (OSError, ValueError, AttributeError):
+            return None
     
     def list_available_data(self) -> List[str]:
         """List all available similarity data files in new hierarchical structure."""
@@ -346,6 +504,38 @@ class SimilarityStorage:
         return sorted(files)
 
 
+# Per-process SimilarityCalculator, created once by the pool initializer and kept warm
+# (parsers, CodeBLEU, extracted file features) for all pairs the worker compares
+_worker_similarity_calc: Optional[SimilarityCalculator] = None
+
+
+def _init_similarity_worker(compile_index_path: Optional[Path]) -> None:
+    global _worker_similarity_calc
+    # SQLite connections must not cross fork(), so each worker opens its own
+    _worker_similarity_calc = SimilarityCalculator(enable_codebleu=True,
+                                                   compile_index=CompileIndex(compile_index_path))
+
+
+def _compare_file_pairs(file_pairs: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+    """Clean metrics of consecutive pairs, computed inside a worker process."""
+    return [SimilarityStorage._extract_clean_metrics(_worker_similarity_calc.calculate_all_similarities(file1, file2))
+            for file1, file2 in file_pairs]
+
+
+def _row_blocks(pairs: List[Tuple[Tuple[int, str], Tuple[int, str]]], count: int) -> List[range]:
+    """Split pair positions into up to `count` ranges of similar size, only where the first file changes."""
+    target = len(pairs) / count
+    blocks = []
+    start = 0
+    for position in range(1, len(pairs)):
+        if pairs[position][0] != pairs[position - 1][0] and position - start >= target:
+            blocks.append(range(start, position))
+            start = position
+    if pairs:
+        blocks.append(range(start, len(pairs)))
+    return blocks
+
+
 if __name__ == "__main__":
     # Test the clean storage system
     storage = SimilarityStorage("dry_run_output")
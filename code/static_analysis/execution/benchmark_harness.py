@@ -0,0 +1,312 @@
+"""
+Micro-benchmark harness for the time behaviour and RAM tests.
+
+Every operation is calibrated to a number of calls per sample that takes at
+least `TARGET_SAMPLE_TIME`, warmed up, and then timed over `REPEATS` samples
+with `perf_counter_ns` while the garbage collector is disabled. Results report
+the median and interquartile range of the time per call, which hold up against
+the odd sample disturbed by the rest of the machine, plus the median CPU time.
+
+Memory is measured with `tracemalloc` in one forked child per operation, so
+operations never see each other's allocations: the peak of a single call,
+the peak over `MEMORY_CALLS` calls and the memory and number of blocks still
+allocated by the generated code afterwards.
+
+The test runner copies this file next to the test script in the scratch
+workspace, so it only depends on the standard library. Results are printed
+as a single JSON line starting with `RESULT_PREFIX`.
+"""
+
+import contextlib
+import gc
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+# Seconds a calibrated sample should take at least
+TARGET_SAMPLE_TIME = 0.02
+# Untimed samples run after calibration, before measuring
+WARMUP_SAMPLES = 1
+REPEATS = 15
+# Calls per sample are picked from 1, 2, 5, 10, 20, 50, ... up to this many
+MAX_CALLS_PER_SAMPLE = 10_000_000
+# Measuring one operation stops after this many seconds, so slow code stays within the test timeout
+MAX_OPERATION_TIME = 2.0
+# Calls per operation while memory is traced (operations with a fixed `number` use that);
+# tracing slows every allocation, and retained memory per call shows long before 100,000 calls
+MEMORY_CALLS = 1_000
+
+# Allocations made by the harness itself are not counted as retained
+_MEMORY_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+@dataclass
+class Operation:
+    """
+    One benchmarked operation.
+
+    `call(state, i)` is timed for every call index `i` of a sample; `setup(number)`
+    runs untimed before every sample and returns the state, e.g. a fresh instance.
+    Operations whose cost depends on how often they already ran (adding or removing
+    tasks) fix `number` instead of having it calibrated.
+    """
+    name: str
+    call: Callable[[Any, int], Any]
+    setup: Callable[[int], Any]
+    number: Optional[int] = None
+
+
+def _time_sample(operation: Operation, number: int) -> Tuple[int, int]:
+    """Wall-clock and CPU nanoseconds of `number` calls."""
+    state = operation.setup(number)
+    call = operation.call
+
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        cpu_start = time.process_time_ns()
+        start = time.perf_counter_ns()
+        for i in range(number):
+            call(state, i)
+        wall = time.perf_counter_ns() - start
+        cpu = time.process_time_ns() - cpu_start
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return wall, cpu
+
+
+def _calibrate(operation: Operation) -> int:
+    """Smallest number of calls per sample in the 1-2-5 sequence that takes `TARGET_SAMPLE_TIME`."""
+    target = TARGET_SAMPLE_TIME * 1e9
+    base = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            number = base * multiplier
+            wall, _ = _time_sample(operation, number)
+            if wall >= target or number >= MAX_CALLS_PER_SAMPLE:
+                return number
+        base *= 10
+
+
+def _summarize(walls: List[int], cpus: List[int], number: int) -> Dict[str, Any]:
+    per_call = [wall / number for wall in walls]
+    if len(per_call) > 1:
+        q1, median, q3 = statistics.quantiles(per_call, n=4, method="inclusive")
+        stdev = statistics.stdev(per_call)
+    else:
+        q1 = median = q3 = per_call[0]
+        stdev = 0.0
+
+    return {
+        "status": "success",
+        "number": number,
+        "samples": len(per_call),
+        "median_ns": round(median, 1),
+        "q1_ns": round(q1, 1),
+        "q3_ns": round(q3, 1),
+        "iqr_ns": round(q3 - q1, 1),
+        "min_ns": round(min(per_call), 1),
+        "mean_ns": round(statistics.fmean(per_call), 1),
+        "stdev_ns": round(stdev, 1),
+        "cpu_median_ns": round(statistics.median(cpu / number for cpu in cpus), 1),
+    }
+
+
+def benchmark(operation: Operation) -> Dict[str, Any]:
+    """
+    Calibrate, warm up and time one operation.
+
+    Args:
+        operation: Operation to time
+
+    Returns:
+        Dict with the calls per sample, number of samples and per-call time
+        statistics in nanoseconds, or status "error" if the operation raised
+    """
+    try:
+        number = operation.number or _calibrate(operation)
+        for _ in range(WARMUP_SAMPLES):
+            _time_sample(operation, number)
+
+        walls, cpus = [], []
+        deadline = time.perf_counter() + MAX_OPERATION_TIME
+        for _ in range(REPEATS):
+            wall, cpu = _time_sample(operation, number)
+            walls.append(wall)
+            cpus.append(cpu)
+            if time.perf_counter() >= deadline:
+                break
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    return _summarize(walls, cpus, number)
+
+
+def _trace_memory(operation: Operation, number: int) -> Dict[str, Any]:
+    """Traced memory of `number` calls on a fresh state, after one untraced call on another."""
+    call = operation.call
+    # Lazily created module state (caches, compiled patterns) is not charged to the calls
+    call(operation.setup(1), 0)
+    state = operation.setup(number)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+
+        call(state, 0)
+        _, first_peak = tracemalloc.get_traced_memory()
+        for i in range(1, number):
+            call(state, i)
+        _, peak = tracemalloc.get_traced_memory()
+
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    # Filtered once tracing stopped, so the filtering itself isn't traced
+    diff = after.filter_traces(_MEMORY_FILTERS).compare_to(before.filter_traces(_MEMORY_FILTERS), "filename")
+    retained = sum(stat.size_diff for stat in diff)
+    return {
+        "status": "success",
+        "number": number,
+        "call_peak_bytes": first_peak - base,
+        "peak_bytes": peak - base,
+        "retained_bytes": retained,
+        "retained_bytes_per_call": round(retained / number, 1),
+        "retained_blocks": sum(stat.count_diff for stat in diff),
+    }
+
+
+def measure_memory(operation: Operation) -> Dict[str, Any]:
+    """
+    Trace the memory used by one operation, in a forked child where available.
+
+    Args:
+        operation: Operation to measure
+
+    Returns:
+        Dict with the number of calls, peak and retained bytes and retained
+        blocks, or status "error" if the operation raised or the child died
+    """
+    number = operation.number or MEMORY_CALLS
+
+    def measure() -> Dict[str, Any]:
+        try:
+            return _trace_memory(operation, number)
+        except Exception as e:
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    if not hasattr(os, "fork"):
+        return measure()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            with open(write_fd, "w", encoding="utf-8") as pipe:
+                json.dump(measure(), pipe)
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with open(read_fd, encoding="utf-8") as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+
+    if not output:
+        return {"status": "error", "error": f"Measuring process died (wait status {status})"}
+    return json.loads(output)
+
+
+def _run_operations(measure: Callable[[Operation], Dict[str, Any]],
+                    operations: List[Operation]) -> Tuple[str, Dict[str, Any]]:
+    """Overall status and per-operation results keyed by operation name."""
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for operation in operations:
+            results[operation.name] = measure(operation)
+
+    succeeded = sum(1 for result in results.values() if result["status"] == "success")
+    if succeeded == len(results):
+        status = "success"
+    elif succeeded:
+        status = "partial"
+    else:
+        status = "failed"
+    return status, results
+
+
+def run_benchmarks(model: str, operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Benchmark every operation of a generated module.
+
+    Output of the generated code is discarded while it is timed, so printing
+    implementations don't flood the captured test output.
+
+    Args:
+        model: Name of the benchmarked module
+        operations: Operations to time, in order
+
+    Returns:
+        Dict with per-operation results keyed by operation name, an overall
+        status (success, partial or failed) and the harness settings
+    """
+    status, results = _run_operations(benchmark, operations)
+
+    return {
+        "status": status,
+        "model": model,
+        "operations": results,
+        "harness": {
+            "target_sample_time": TARGET_SAMPLE_TIME,
+            "warmup_samples": WARMUP_SAMPLES,
+            "repeats": REPEATS,
+            "max_operation_time": MAX_OPERATION_TIME,
+        },
+    }
+
+
+def run_memory_benchmarks(model: str, operations: List[Operation]) -> Dict[str, Any]:
+    """
+    Measure the memory used by every operation of a generated module.
+
+    Args:
+        model: Name of the measured module
+        operations: Operations to measure, in order
+
+    Returns:
+        Dict shaped like the result of `run_benchmarks`, with the results of
+        `measure_memory` per operation
+    """
+    status, results = _run_operations(measure_memory, operations)
+
+    return {
+        "status": status,
+        "model": model,
+        "operations": results,
+        "harness": {
+            "memory_calls": MEMORY_CALLS,
+        },
+    }
+
+
+def emit_result(result: Dict[str, Any]) -> None:
+    """Print a result in the format parsed by the test runner."""
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
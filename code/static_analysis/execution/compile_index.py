@@ -0,0 +1,143 @@
+"""
+Shared index of compile and parse results for generated code.
+
+Every file is compiled once in-process and the outcome is stored in a SQLite
+file keyed by a hash of its content and the interpreter, so the compilability
+test no longer needs a subprocess and later stages (functional tests, quality
+metrics, similarity) can skip files that don't compile or parse without
+re-reading them through the parser.
+"""
+
+import ast
+import hashlib
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Index location relative to the output directory
+COMPILE_INDEX_FILE = "cache/compile_index.sqlite"
+
+
+@dataclass
+class CompileStatus:
+    """
+    Compile and parse outcome of one source file.
+
+    `compiles` matches `py_compile` on the current interpreter; `parses` tells
+    whether the UTF-8 decoded text is accepted by `ast.parse`, which is what the
+    AST-based metrics need (some code parses but is rejected by the compiler,
+    e.g. `return` outside a function).
+    """
+    compiles: bool
+    parses: bool
+    error: Optional[str] = None
+
+
+def check_source(source: bytes, filename: str) -> CompileStatus:
+    """
+    Compile and parse source code without executing it.
+
+    Args:
+        source: Raw file content (the encoding cookie is honoured like `py_compile`)
+        filename: File name used in error messages
+
+    Returns:
+        CompileStatus with the first compiler error, if any
+    """
+    try:
+        compile(source, filename, "exec", dont_inherit=True)
+        return CompileStatus(compiles=True, parses=True)
+    except Exception as e:
+        # py_compile reports any failure, e.g. null bytes raise ValueError
+        error = f"{type(e).__name__}: {e}"
+
+    try:
+        # Decoded like `open(path, encoding="utf-8")` in text mode, as the metric calculators read files
+        text = source.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        ast.parse(text)
+        parses = True
+    except Exception:
+        parses = False
+    return CompileStatus(compiles=False, parses=parses, error=error)
+
+
+class CompileIndex:
+    """SQLite-backed index of `CompileStatus` per file content; safe to share between threads."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Args:
+            db_path: Path to the SQLite database file (created if missing); None keeps
+                the index in memory for the lifetime of this object
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Parallel test workers share the file, so wait for locks instead of failing
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS compile_results ("
+            "key TEXT PRIMARY KEY, compiles INTEGER, parses INTEGER, error TEXT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(source: bytes) -> str:
+        """Hash file content together with the interpreter, whose grammar decides the result."""
+        digest = hashlib.sha256(sys.implementation.cache_tag.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def check(self, path: Path) -> CompileStatus:
+        """
+        Compile status of a file, computed on first sight of its content.
+
+        Raises:
+            OSError: If the file can't be read
+        """
+        with open(path, "rb") as f:
+            source = f.read()
+        return self.check_bytes(source, Path(path).name)
+
+    def check_bytes(self, source: bytes, filename: str) -> CompileStatus:
+        """
+        Compile status of already read file content, computed on first sight of it.
+
+        Args:
+            source: Raw file content
+            filename: File name used in error messages
+        """
+        key = self.make_key(source)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT compiles, parses, error FROM compile_results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None:
+            self.hits += 1
+            return CompileStatus(compiles=bool(row[0]), parses=bool(row[1]), error=row[2])
+
+        self.misses += 1
+        status = check_source(source, filename)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO compile_results (key, compiles, parses, error) VALUES (?, ?, ?, ?)",
+                (key, int(status.compiles), int(status.parses), status.error)
+            )
+            self._conn.commit()
+        return status
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
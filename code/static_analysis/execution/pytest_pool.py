@@ -0,0 +1,392 @@
+"""
+Warm pytest worker pool for functional correctness tests.
+
+Each worker is a long-lived interpreter that imports pytest once and then, for
+every submitted test file, forks a child that runs `pytest.main` in the test's
+directory. The child starts with pytest already loaded and exits afterwards, so
+generated modules never leak between runs while the per-file cost drops to
+roughly the tests themselves. A small plugin in the child records the outcome
+and duration of every test, so callers don't have to parse terminal output.
+
+The same plugin enforces time limits: a test using more than its CPU time
+limit, or running past the file's wall-clock budget, is interrupted and
+recorded as "timeout", and the session stops early once the budget is spent
+or too many tests timed out. Tests finished before that keep their outcomes; the
+worker only kills a child that stops responding to the interrupt (e.g. stuck
+in a C call). Children run under the resource limits of `sandbox.py` and
+report their CPU time and peak memory.
+
+This file is also the worker entry point; it only depends on the standard
+library and pytest so it can be started directly with `sys.executable`.
+"""
+
+import importlib.util
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import queue
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Forked children are only available on POSIX; callers fall back to subprocesses elsewhere
+POOL_SUPPORTED = hasattr(os, "fork")
+
+# Seconds past the file budget before an unresponsive child is killed
+KILL_GRACE = 2.0
+# Seconds between repeated interrupts of a test that swallows the first one
+TIMEOUT_RETRY_INTERVAL = 1.0
+
+
+class PytestWorkerPool:
+    """Pool of warm pytest workers; `run` is safe to call from multiple threads."""
+
+    def __init__(self, size: int = 1):
+        if not POOL_SUPPORTED:
+            raise RuntimeError("PytestWorkerPool requires os.fork")
+        self.size = max(1, size)
+        self._idle: "queue.Queue[Optional[subprocess.Popen]]" = queue.Queue()
+        self._workers: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # Workers are started lazily on first use
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def _start_worker(self) -> subprocess.Popen:
+        worker = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _stop_worker(self, worker: subprocess.Popen) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if worker.poll() is None:
+            worker.kill()
+        worker.wait()
+
+    def run(self, test_file: Path, cwd: Path, args: List[str], timeout: float,
+            limits: Optional[Dict[str, Any]] = None, per_test_timeout: Optional[float] = None,
+            max_timeouts: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run pytest on one test file.
+
+        Args:
+            test_file: Test module to run
+            cwd: Working directory for the run (the generated code's directory)
+            args: Extra pytest command line arguments
+            timeout: Time budget of the whole file in seconds
+            limits: Sandbox limits (`SandboxLimits` as a dict) applied to the child
+            per_test_timeout: CPU seconds before a single test is interrupted and recorded as "timeout"
+            max_timeouts: Stop the session after this many timed out tests
+
+        Returns:
+            Dict with returncode, stdout, stderr, timed_out (the child had to be
+            killed), tests (per-test outcome and duration keyed by test name,
+            None if the run crashed), stopped (why the session ended early, if
+            it did) and resources (CPU time and peak memory of the child)
+        """
+        if self._closed:
+            raise RuntimeError("PytestWorkerPool is closed")
+
+        worker = self._idle.get()
+        try:
+            if worker is None or worker.poll() is not None:
+                worker = self._start_worker()
+
+            request = {"test_file": str(test_file), "cwd": str(cwd), "args": args, "timeout": timeout,
+                       "limits": limits, "per_test_timeout": per_test_timeout, "max_timeouts": max_timeouts}
+            worker.stdin.write(json.dumps(request) + "\n")
+            worker.stdin.flush()
+
+            # The worker enforces the timeout itself; this only guards against a wedged worker
+            ready, _, _ = select.select([worker.stdout], [], [], timeout + KILL_GRACE + 10)
+            line = worker.stdout.readline() if ready else ""
+            if not line:
+                self._stop_worker(worker)
+                worker = None
+                return {"returncode": -1, "stdout": "", "stderr": "pytest worker did not respond",
+                        "timed_out": not ready, "tests": None}
+            return json.loads(line)
+
+        except (BrokenPipeError, OSError, ValueError) as e:
+            if worker is not None:
+                self._stop_worker(worker)
+                worker = None
+            return {"returncode": -1, "stdout": "", "stderr": f"pytest worker failed: {e}", "timed_out": False,
+                    "tests": None}
+
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.stdin.close()
+                worker.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self._stop_worker(worker)
+
+
+# ---------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------
+class TestTimeout(BaseException):
+    """Raised inside a test that ran out of time; not an `Exception`, so generated code rarely catches it."""
+
+
+class _OutcomeRecorder:
+    """pytest plugin collecting the outcome and total duration of every test and enforcing time limits."""
+
+    def __init__(self, budget: Optional[float] = None, per_test_timeout: Optional[float] = None,
+                 max_timeouts: Optional[int] = None, on_abort: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            budget: Wall-clock seconds from now until the session stops
+            per_test_timeout: CPU seconds a single test may use before it is interrupted;
+                CPU time keeps outcomes independent of how loaded the machine is
+            max_timeouts: Stop the session after this many timed out tests
+            on_abort: Called (and expected not to return) when a test keeps
+                ignoring interrupts after the budget is used up
+        """
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self.timed_out: Set[str] = set()
+        self.stop_reason: Optional[str] = None
+        self._deadline = time.monotonic() + budget if budget else None
+        self._per_test_timeout = per_test_timeout
+        self._max_timeouts = max_timeouts
+        self._on_abort = on_abort
+        self._session = None
+        self._current: Optional[str] = None
+
+    def install(self) -> None:
+        # SIGPROF: the test's CPU time limit, SIGALRM: the file's wall-clock budget
+        signal.signal(signal.SIGPROF, self._on_alarm)
+        signal.signal(signal.SIGALRM, self._on_alarm)
+
+    @staticmethod
+    def _disarm() -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    def _remaining_budget(self) -> float:
+        return max(self._deadline - time.monotonic(), 0.001)
+
+    def _on_alarm(self, signum, frame) -> None:
+        if self._current is None:
+            return
+        if frame is not None and frame.f_code.co_filename == __file__:
+            # Never interrupt this plugin's own bookkeeping
+            signal.setitimer(signal.ITIMER_REAL, 0.01)
+            return
+        if self._current in self.timed_out and self._on_abort is not None \
+                and self._deadline is not None and time.monotonic() >= self._deadline:
+            # The test swallowed every interrupt and the budget is gone; keep what was recorded
+            self.stop_reason = "Stopped after using up the time budget"
+            self._on_abort()
+
+        self.timed_out.add(self._current)
+        self.tests.setdefault(self._current, {"outcome": None, "duration": 0.0})
+        # Interrupt again if the generated code swallows the exception
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        retry = TIMEOUT_RETRY_INTERVAL if self._deadline is None else min(TIMEOUT_RETRY_INTERVAL,
+                                                                            self._remaining_budget())
+        signal.setitimer(signal.ITIMER_REAL, retry)
+        if signum == signal.SIGPROF:
+            raise TestTimeout(f"Test used more than {self._per_test_timeout:.1f}s of CPU time")
+        raise TestTimeout("Test ran past the time budget of the test file")
+
+    def pytest_sessionstart(self, session) -> None:
+        self._session = session
+
+    def pytest_runtest_logstart(self, nodeid: str, location) -> None:
+        self._current = nodeid.split("::", 1)[-1]
+        if self._per_test_timeout:
+            signal.setitimer(signal.ITIMER_PROF, self._per_test_timeout)
+        if self._deadline is not None:
+            signal.setitimer(signal.ITIMER_REAL, self._remaining_budget())
+
+    def pytest_runtest_logfinish(self, nodeid: str, location) -> None:
+        self._disarm()
+        self._current = None
+
+        if self.stop_reason is None:
+            if self._max_timeouts and len(self.timed_out) >= self._max_timeouts:
+                self.stop_reason = f"Stopped after {len(self.timed_out)} timed out tests"
+            elif self._deadline is not None and time.monotonic() >= self._deadline:
+                self.stop_reason = "Stopped after using up the time budget"
+        if self.stop_reason and self._session is not None:
+            # Checked by pytest after every test
+            self._session.shouldstop = self.stop_reason
+
+    def pytest_runtest_logreport(self, report) -> None:
+        name = report.nodeid.split("::", 1)[-1]
+        if name in self.timed_out:
+            # The interrupt reached pytest; stop repeating it
+            self._disarm()
+        entry = self.tests.setdefault(name, {"outcome": None, "duration": 0.0})
+        entry["duration"] += report.duration
+
+        if report.when == "call":
+            # Same buckets as the pytest summary line
+            if hasattr(report, "wasxfail"):
+                entry["outcome"] = "xfailed" if report.skipped else "xpassed"
+            else:
+                entry["outcome"] = report.outcome
+        elif entry["outcome"] is None and (report.failed or report.skipped):
+            # Setup failures are reported by pytest as errors, not failures
+            entry["outcome"] = "error" if report.failed else "skipped"
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "outcome": "timeout" if name in self.timed_out else entry["outcome"] or "error",
+                "duration": round(entry["duration"], 6)
+            }
+            for name, entry in self.tests.items()
+        }
+
+
+def _run_forked(pytest_module, sandbox, test_file: str, cwd: str, args: List[str], timeout: float,
+                limits: Optional[Dict[str, Any]], per_test_timeout: Optional[float],
+                max_timeouts: Optional[int]) -> Dict[str, Any]:
+    stdout_fd, stdout_path = tempfile.mkstemp(prefix="pytest_out_")
+    stderr_fd, stderr_path = tempfile.mkstemp(prefix="pytest_err_")
+    outcomes_fd, outcomes_path = tempfile.mkstemp(prefix="pytest_outcomes_")
+
+    def write_outcomes(recorder: _OutcomeRecorder) -> None:
+        with open(outcomes_fd, "w", encoding="utf-8", closefd=False) as f:
+            json.dump({"tests": recorder.results(), "stopped": recorder.stop_reason}, f)
+
+    def abort(recorder: _OutcomeRecorder) -> None:
+        write_outcomes(recorder)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Same exit code as a session interrupted by shouldstop
+        os._exit(int(pytest_module.ExitCode.INTERRUPTED))
+
+    pid = os.fork()
+    if pid == 0:
+        code = 3
+        try:
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.dup2(stdout_fd, 1)
+            os.dup2(stderr_fd, 2)
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False)
+            os.chdir(cwd)
+            sys.path.insert(0, cwd)
+            if limits is not None:
+                sandbox.apply_limits(sandbox.SandboxLimits.from_dict(limits))
+            recorder = _OutcomeRecorder(timeout, per_test_timeout, max_timeouts,
+                                        on_abort=lambda: abort(recorder))
+            recorder.install()
+            code = int(pytest_module.main([test_file, *args], plugins=[recorder]))
+            write_outcomes(recorder)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(code)
+
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    os.close(outcomes_fd)
+    status, rusage, killed = sandbox.wait_for_exit(pid, timeout + KILL_GRACE)
+
+    # Running out of CPU time is reported like a wall-clock timeout
+    timed_out = killed or (os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXCPU)
+    if os.WIFEXITED(status):
+        returncode = os.WEXITSTATUS(status)
+    else:
+        returncode = -os.WTERMSIG(status)
+
+    try:
+        with open(stdout_path, "r", encoding="utf-8", errors="replace") as f:
+            stdout = f.read()
+        with open(stderr_path, "r", encoding="utf-8", errors="replace") as f:
+            stderr = f.read()
+        with open(outcomes_path, "r", encoding="utf-8") as f:
+            outcomes = f.read()
+    finally:
+        os.unlink(stdout_path)
+        os.unlink(stderr_path)
+        os.unlink(outcomes_path)
+
+    # The outcomes file stays empty if the child died before pytest finished
+    outcomes = json.loads(outcomes) if outcomes else {"tests": None, "stopped": None}
+    return {"returncode": returncode, "stdout": stdout, "stderr": stderr, "timed_out": timed_out,
+            "tests": outcomes["tests"], "stopped": outcomes["stopped"], "resources": sandbox.resource_usage(rusage)}
+
+
+def _load_sandbox():
+    # Loaded by path under a private name so generated code can't import it as `sandbox`
+    spec = importlib.util.spec_from_file_location("_test_sandbox", Path(__file__).with_name("sandbox.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _worker_main() -> None:
+    # Running this file by path puts the execution package first on sys.path;
+    # generated code must not be able to import its siblings
+    script_dir = str(Path(__file__).resolve().parent)
+    sys.path[:] = [p for p in sys.path if p and Path(p).resolve() != Path(script_dir)]
+
+    import pytest
+    sandbox = _load_sandbox()
+
+    # Keep the protocol channel private; stray writes to fd 1 go to /dev/null
+    protocol_out = os.fdopen(os.dup(1), "w", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    # One throwaway session imports the builtin and installed plugins here, so
+    # forked children inherit them instead of paying for it on every file
+    with tempfile.TemporaryDirectory(prefix="pytest_warmup_") as warmup_dir:
+        try:
+            pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", warmup_dir])
+        except Exception:
+            pass
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            result = _run_forked(pytest, sandbox, request["test_file"], request["cwd"], request["args"],
+                                 request["timeout"], request.get("limits"), request.get("per_test_timeout"),
+                                 request.get("max_timeouts"))
+        except Exception as e:
+            result = {"returncode": -1, "stdout": "", "stderr": f"pytest worker error: {e}", "timed_out": False,
+                      "tests": None}
+        protocol_out.write(json.dumps(result) + "\n")
+        protocol_out.flush()
+
+
+if __name__ == "__main__":
+    _worker_main()
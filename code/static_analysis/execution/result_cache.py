@@ -0,0 +1,86 @@
+"""
+Content-addressed cache for parsed test results.
+
+Results are keyed by a hash of the generated code, the test definition, the
+test name, the model and the challenge, and stored as JSON in a single SQLite
+file, so re-running `main.py test` over an unchanged corpus only has to test
+new or modified files.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Cache location relative to the output directory
+TEST_RESULT_CACHE_FILE = "cache/test_results.sqlite"
+
+# Part of every key; bump when the shape of stored results changes
+RESULT_FORMAT_VERSION = 3
+
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class TestResultCache:
+    """SQLite-backed cache of parsed test results; one connection per process."""
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # Parallel test workers share the file, so wait for locks instead of failing
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS test_results ("
+            "key TEXT PRIMARY KEY, test_name TEXT, model TEXT, payload TEXT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(test_name: str, model: str, challenge: str, code_hash: str, test_hash: str) -> str:
+        """Hash the inputs that determine a test result into a stable cache key."""
+        key_data = {
+            "version": RESULT_FORMAT_VERSION,
+            "test_name": test_name,
+            "model": model,
+            "challenge": challenge,
+            "code": code_hash,
+            "test": test_hash,
+        }
+        canonical = json.dumps(key_data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM test_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, test_name: str, model: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO test_results (key, test_name, model, payload) VALUES (?, ?, ?, ?)",
+                (key, test_name, model, payload)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,212 @@
+"""
+Resource-limited execution of generated code under test.
+
+Tests run in child processes with rlimits on CPU time, address space, new
+processes and file size, and with network access blocked by an audit hook in
+the child interpreter. The parent reaps children with `wait4`, so every test
+records the CPU time and peak memory it used.
+
+This file is also the bootstrap that applies the limits inside a fresh
+interpreter (`python sandbox.py script.py args...` or
+`python sandbox.py -m module args...`); it only depends on the standard library.
+"""
+
+import json
+import os
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SANDBOX_SUPPORTED = resource is not None and hasattr(os, "wait4")
+SANDBOX_SCRIPT = str(Path(__file__).resolve())
+LIMITS_ENV = "TEST_SANDBOX_LIMITS"
+
+_NETWORK_FAMILIES = {socket.AF_INET, socket.AF_INET6}
+_NETWORK_EVENTS = {"socket.connect", "socket.bind", "socket.sendto", "socket.sendmsg"}
+
+
+@dataclass
+class SandboxLimits:
+    """Per-test resource limits."""
+    cpu_seconds: int = 30
+    memory_mb: int = 1024
+    max_processes: int = 32
+    max_file_size_mb: int = 16
+    block_network: bool = True
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SandboxLimits":
+        return cls(**data)
+
+
+@dataclass
+class SandboxResult:
+    """Outcome of a sandboxed command, shaped like `subprocess.CompletedProcess`."""
+    returncode: int
+    stdout: str
+    stderr: str
+    timed_out: bool
+    resources: Optional[Dict[str, float]] = None
+
+
+def resource_usage(rusage) -> Dict[str, float]:
+    """Convert a `struct rusage` of a finished child into the recorded usage dict."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "cpu_user": round(rusage.ru_utime, 4),
+        "cpu_system": round(rusage.ru_stime, 4),
+        "max_rss_mb": round(rusage.ru_maxrss / rss_unit, 2),
+    }
+
+
+def _user_task_count(uid: int) -> Optional[int]:
+    # RLIMIT_NPROC counts every thread of the user, not only the sandboxed child
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+
+    count = 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            if os.stat(f"/proc/{entry}").st_uid == uid:
+                count += len(os.listdir(f"/proc/{entry}/task"))
+        except OSError:
+            continue
+    return count
+
+
+def _set_limit(kind: int, soft: int, hard: Optional[int] = None) -> None:
+    current_soft, current_hard = resource.getrlimit(kind)
+    hard = soft if hard is None else hard
+    if current_hard != resource.RLIM_INFINITY:
+        hard = min(hard, current_hard)
+        soft = min(soft, hard)
+    resource.setrlimit(kind, (soft, hard))
+
+
+def _block_network(event: str, args: tuple) -> None:
+    if event in _NETWORK_EVENTS and getattr(args[0], "family", None) in _NETWORK_FAMILIES:
+        raise PermissionError("Network access is disabled in the test sandbox")
+
+
+def apply_limits(limits: SandboxLimits) -> None:
+    """Restrict the current process; call in the child right before running the test."""
+    if resource is not None:
+        # SIGXCPU at the soft limit, SIGKILL one second later
+        _set_limit(resource.RLIMIT_CPU, limits.cpu_seconds, limits.cpu_seconds + 1)
+        _set_limit(resource.RLIMIT_AS, limits.memory_mb * 1024 * 1024)
+        _set_limit(resource.RLIMIT_FSIZE, limits.max_file_size_mb * 1024 * 1024)
+
+        # The process limit is per user and not enforced for root; only Linux exposes the current count
+        uid = os.getuid()
+        tasks = _user_task_count(uid) if uid != 0 and hasattr(resource, "RLIMIT_NPROC") else None
+        if tasks is not None:
+            _set_limit(resource.RLIMIT_NPROC, tasks + limits.max_processes)
+
+    if limits.block_network:
+        sys.addaudithook(_block_network)
+
+
+def wait_for_exit(pid: int, timeout: float) -> Tuple[int, Any, bool]:
+    """
+    Reap a child process, killing it once `timeout` seconds have passed.
+
+    Returns:
+        Tuple of wait status, `struct rusage` and whether the child was killed
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+
+    while True:
+        reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+        if reaped:
+            return status, rusage, False
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage, True
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+
+
+def run_sandboxed(cmd: List[str], cwd: Path, timeout: float, limits: SandboxLimits) -> SandboxResult:
+    """
+    Run a command started through the sandbox bootstrap and collect its resource usage.
+
+    Args:
+        cmd: Command whose Python interpreter runs `SANDBOX_SCRIPT` (see `sandbox_command`)
+        cwd: Working directory
+        timeout: Wall-clock seconds before the process is killed
+        limits: Limits applied by the bootstrap inside the child
+
+    Returns:
+        SandboxResult with the captured output and resource usage
+    """
+    env = dict(os.environ)
+    env[LIMITS_ENV] = limits.to_json()
+
+    # Output goes to files so the parent can reap the child itself without pipe deadlocks
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, cwd=str(cwd), stdin=subprocess.DEVNULL,
+                                   stdout=stdout_file, stderr=stderr_file, env=env)
+        status, rusage, timed_out = wait_for_exit(process.pid, timeout)
+
+        # Tell Popen the child is gone so it doesn't try to reap it again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # Running out of CPU time is reported like a wall-clock timeout
+        timed_out = timed_out or process.returncode == -signal.SIGXCPU
+
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        return SandboxResult(
+            returncode=process.returncode,
+            stdout=stdout_file.read().decode("utf-8", errors="replace"),
+            stderr=stderr_file.read().decode("utf-8", errors="replace"),
+            timed_out=timed_out,
+            resources=resource_usage(rusage),
+        )
+
+
+def sandbox_command(python: List[str], args: List[str]) -> List[str]:
+    """Command running `args` (a script path or `-m module`, plus arguments) through the bootstrap."""
+    return [*python, SANDBOX_SCRIPT, *args]
+
+
+def _bootstrap() -> None:
+    limits = SandboxLimits.from_dict(json.loads(os.environ.pop(LIMITS_ENV, "{}")))
+    args = sys.argv[1:]
+    apply_limits(limits)
+
+    if args[:1] == ["-m"]:
+        # Same sys.path and argv as `python -m module`
+        sys.path[0] = os.getcwd()
+        sys.argv = [args[1], *args[2:]]
+        runpy.run_module(args[1], run_name="__main__", alter_sys=True)
+    else:
+        # Same sys.path and argv as `python script.py`
+        sys.path[0] = os.path.dirname(os.path.abspath(args[0]))
+        sys.argv = args
+        runpy.run_path(args[0], run_name="__main__")
+
+
+if __name__ == "__main__":
+    _bootstrap()
@@ -12,6 +12,7 @@ class TestGroupType(Enum):
     LEGACY = "legacy"      # Original Renner's tests (compilability, functional_correctness)  
     QUALITY = "quality"    # Advanced quality metrics (complexity, maintainability, etc.)
     STRUCTURE = "structure" # AST-based structural analysis
+    PERFORMANCE = "performance" # Runtime benchmarks of the generated code
 
 
 @dataclass
@@ -255,6 +256,8 @@ class TestMetrics:
     # Advanced test group results
     quality: Optional[Dict[str, Any]] = None
     structure: Optional[Dict[str, Any]] = None
+    time_behaviour: Optional[Dict[str, Any]] = None
+    memory_usage: Optional[Dict[str, Any]] = None
     
     # New advanced metrics for temperature research
     advanced: Optional[AdvancedMetrics] = None
@@ -411,7 +414,7 @@ class TestGroup:
     name: str
     description: str
     tests: List[str]
-    category: str  # "legacy", "quality", "similarity", "structure"
+    category: str  # "legacy", "quality", "similarity", "structure", "performance"
 
 
 # Predefined test groups
@@ -450,5 +453,14 @@ TEST_GROUPS = {
             "operator_distribution"
         ],
         category="structure"
+    ),
+    "performance": TestGroup(
+        name="performance",
+        description="Runtime benchmarks of the generated code's operations",
+        tests=[
+            "6_time_behaviour",
+            "8_performance_efficiency-RAM"
+        ],
+        category="performance"
     )
 }
@@ -79,6 +79,8 @@ class ExperimentManager:
             functional_correctness=metrics_data.get("functional_correctness"),
             quality=metrics_data.get("quality"),
             structure=metrics_data.get("structure"),
+            time_behaviour=metrics_data.get("time_behaviour"),
+            memory_usage=metrics_data.get("memory_usage"),
             test_groups_run=metrics_data.get("test_groups_run")
         )
     
@@ -1,19 +1,42 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import json
+import os
+
+from tqdm import tqdm
 
 from .results.experiment_manager import ExperimentManager
 from .results.data_models import ExperimentConfig, ModelInfo
 from .execution.test_runner import TestRunner
+from .execution.result_cache import TestResultCache, TEST_RESULT_CACHE_FILE
+from .execution.compile_index import CompileIndex, COMPILE_INDEX_FILE
+
+# Parallel workers for test_existing_code; each tests one iteration directory at a time
+DEFAULT_TEST_WORKERS = os.cpu_count() or 1
+
 
+def test_existing_code(base_dir: str = "dry_run_output", test_groups: List[str] = None,
+                       workers: int = DEFAULT_TEST_WORKERS, use_cache: bool = True) -> None:
+    """
+    Test generated code in the specified directory.
 
-def test_existing_code(base_dir: str = "dry_run_output", test_groups: List[str] = None) -> None:
-    """Test generated code in the specified directory."""
+    Args:
+        base_dir: Output directory containing the `code` tree
+        test_groups: Test groups to run (defaults to legacy)
+        workers: Number of worker processes; iteration directories are tested in
+            parallel and results are recorded in walk order regardless of completion order
+        use_cache: Reuse parsed results of unchanged code files and test definitions
+            from `<base_dir>/cache/test_results.sqlite`, and compile results shared with
+            the similarity stage from `<base_dir>/cache/compile_index.sqlite`
+    """
     print(f"🧪 Testing generated code in: {base_dir}")
+    print(f"⚡ Workers: {workers}")
+    print(f"💾 Result cache: {'enabled' if use_cache else 'disabled'}")
     print("-" * 50)
     
     project_root = Path(__file__).parent.parent.parent
-    test_runner = TestRunner(project_root / "code" / "static_analysis" / "test_definitions")
+    tests_dir = project_root / "code" / "static_analysis" / "test_definitions"
     base_path = project_root / base_dir
     
     if not base_path.exists():
@@ -36,70 +59,32 @@ def test_existing_code(base_dir: str = "dry_run_output", test_groups: List[str]
         iterations=0
     )
     
-    models_found = []
-    results_summary = []
+    work_units = _collect_work_units(code_base)
+    cache_path = base_path / TEST_RESULT_CACHE_FILE if use_cache else None
+    compile_index_path = base_path / COMPILE_INDEX_FILE if use_cache else None
     
-    for challenge_dir in code_base.iterdir():
-        if not challenge_dir.is_dir():
-            continue
-            
-        challenge_name = challenge_dir.name
-        print(f"🎯 Testing challenge: {challenge_name}")
-        
-        for prompt_dir in challenge_dir.iterdir():
-            if not prompt_dir.is_dir():
-                continue
-                
-            prompt_name = prompt_dir.name
-            print(f"  📝 Prompt: {prompt_name}")
-            
-            # Handle temperature folder structure: prompt_dir/temp_X.X/iteration_Y
-            for temp_or_iter_dir in prompt_dir.iterdir():
-                if not temp_or_iter_dir.is_dir():
-                    continue
-                
-                # Check if this is a temperature folder (temp_X.X) or direct iteration folder
-                if temp_or_iter_dir.name.startswith("temp_"):
-                    temp_folder_name = temp_or_iter_dir.name
-                    print(f"    🌡️  Temperature: {temp_folder_name}")
-                    
-                    # Look for iterations inside temperature folder
-                    for iteration_dir in temp_or_iter_dir.iterdir():
-                        if not iteration_dir.is_dir() or not iteration_dir.name.startswith("iteration_"):
-                            continue
-                            
-                        iteration_num = int(iteration_dir.name.split("_")[1])
-                        iteration = iteration_dir.name
-                        print(f"      🔄 {iteration}")
-                        
-                        # Extract temperature parameters from generation_params.json
-                        generation_params = {}
-                        params_file = iteration_dir / "generation_params.json"
-                        if params_file.exists():
-                            try:
-                                with open(params_file, 'r') as f:
-                                    generation_params = json.load(f)
-                            except Exception:
-                                pass
-                        
-                        results_summary.extend(_test_iteration_files(
-                            iteration_dir, challenge_name, prompt_name, 
-                            iteration_num, temp_folder_name, generation_params, 
-                            test_runner, test_groups, models_found
-                        ))
-                
-                elif temp_or_iter_dir.name.startswith("iteration_"):
-                    # Legacy structure: direct iteration folders under prompt
-                    iteration_dir = temp_or_iter_dir
-                    iteration_num = int(iteration_dir.name.split("_")[1])
-                    iteration = iteration_dir.name
-                    print(f"    🔄 {iteration}")
-                    
-                    results_summary.extend(_test_iteration_files(
-                        iteration_dir, challenge_name, prompt_name, 
-                        iteration_num, None, {}, 
-                        test_runner, test_groups, models_found
-                    ))
+    if workers <= 1:
+        test_runner = TestRunner(tests_dir, result_cache=TestResultCache(cache_path) if cache_path else None,
+                                 compile_index=CompileIndex(compile_index_path))
+        models_found = []
+        results_summary = []
+        previous = {}
+        try:
+            for unit in work_units:
+                _print_unit_headers(unit, previous)
+                results_summary.extend(_test_iteration_files(
+                    unit["iteration_dir"], unit["challenge"], unit["prompt"],
+                    unit["iteration"], unit["temperature_folder"], unit["generation_params"],
+                    test_runner, test_groups, models_found
+                ))
+        finally:
+            test_runner.close()
+            test_runner.compile_index.close()
+            if test_runner.result_cache:
+                test_runner.result_cache.close()
+    else:
+        results_summary = _run_work_units_parallel(work_units, tests_dir, test_groups, workers,
+                                                   cache_path, compile_index_path)
     
     # Update config with found data - extract unique model+temperature combinations
     unique_models = _build_unique_models_config(results_summary)
@@ -129,23 +114,186 @@ def test_existing_code(base_dir: str = "dry_run_output", test_groups: List[str]
     
     # Save experiment results
     results_path = experiment_manager.finish_experiment()
+    matrix_path = _write_test_outcome_matrix(results_summary, results_path.parent)
+    if matrix_path:
+        print(f"🧮 Per-test outcomes saved to: {matrix_path}")
     
     _print_test_summary(results_summary, results_path, metadata.experiment_id)
 
 
+def _iteration_number(iteration_dir: Path) -> int:
+    return int(iteration_dir.name.split("_")[1])
+
+
+def _collect_work_units(code_base: Path) -> List[Dict[str, Any]]:
+    """
+    Walk challenge -> prompt -> temperature -> iteration and return one work unit per iteration directory.
+
+    Directories are visited in sorted order (iterations numerically), so the
+    resulting order is stable across runs and file systems.
+    """
+    work_units = []
+    
+    for challenge_dir in sorted(code_base.iterdir()):
+        if not challenge_dir.is_dir():
+            continue
+            
+        challenge_name = challenge_dir.name
+        
+        for prompt_dir in sorted(challenge_dir.iterdir()):
+            if not prompt_dir.is_dir():
+                continue
+                
+            prompt_name = prompt_dir.name
+            
+            # Handle temperature folder structure: prompt_dir/temp_X.X/iteration_Y
+            temp_dirs = [d for d in sorted(prompt_dir.iterdir()) if d.is_dir() and d.name.startswith("temp_")]
+            # Legacy structure: direct iteration folders under prompt
+            legacy_iterations = [d for d in prompt_dir.iterdir() if d.is_dir() and d.name.startswith("iteration_")]
+            
+            for temp_dir in temp_dirs:
+                iterations = [d for d in temp_dir.iterdir() if d.is_dir() and d.name.startswith("iteration_")]
+                for iteration_dir in sorted(iterations, key=_iteration_number):
+                    # Extract temperature parameters from generation_params.json
+                    generation_params = {}
+                    params_file = iteration_dir / "generation_params.json"
+                    if params_file.exists():
+                        try:
+                            with open(params_file, 'r') as f:
+                                generation_params = json.load(f)
+                        except Exception:
+                            pass
+                    
+                    work_units.append({
+                        "iteration_dir": iteration_dir,
+                        "challenge": challenge_name,
+                        "prompt": prompt_name,
+                        "iteration": _iteration_number(iteration_dir),
+                        "temperature_folder": temp_dir.name,
+                        "generation_params": generation_params
+                    })
+            
+            for iteration_dir in sorted(legacy_iterations, key=_iteration_number):
+                work_units.append({
+                    "iteration_dir": iteration_dir,
+                    "challenge": challenge_name,
+                    "prompt": prompt_name,
+                    "iteration": _iteration_number(iteration_dir),
+                    "temperature_folder": None,
+                    "generation_params": {}
+                })
+    
+    return work_units
+
+
+def _print_unit_headers(unit: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    """Print challenge/prompt/temperature headers whenever they change between consecutive units."""
+    if unit["challenge"] != previous.get("challenge"):
+        print(f"🎯 Testing challenge: {unit['challenge']}")
+        previous.clear()
+    if unit["prompt"] != previous.get("prompt"):
+        print(f"  📝 Prompt: {unit['prompt']}")
+        previous.pop("temperature_folder", None)
+    if unit["temperature_folder"] and unit["temperature_folder"] != previous.get("temperature_folder"):
+        print(f"    🌡️  Temperature: {unit['temperature_folder']}")
+    
+    indent = "      " if unit["temperature_folder"] else "    "
+    print(f"{indent}🔄 {unit['iteration_dir'].name}")
+    previous.update(unit)
+
+
+# Per-process TestRunner, created once by the pool initializer
+_worker_test_runner: Optional[TestRunner] = None
+
+
+def _init_test_worker(tests_dir: Path, cache_path: Optional[Path], compile_index_path: Optional[Path]) -> None:
+    global _worker_test_runner
+    # SQLite connections must not cross fork(), so each worker opens its own
+    result_cache = TestResultCache(cache_path) if cache_path else None
+    _worker_test_runner = TestRunner(tests_dir, result_cache=result_cache,
+                                     compile_index=CompileIndex(compile_index_path))
+
+
+def _test_work_unit(unit: Dict[str, Any], test_groups: List[str]) -> List[Dict[str, Any]]:
+    """Test one iteration directory inside a worker process."""
+    # Tests run in scratch workspaces, so units only set the scheduling granularity
+    return _test_iteration_files(
+        unit["iteration_dir"], unit["challenge"], unit["prompt"],
+        unit["iteration"], unit["temperature_folder"], unit["generation_params"],
+        _worker_test_runner, test_groups, [], verbose=False
+    )
+
+
+def _run_work_units_parallel(work_units: List[Dict[str, Any]], tests_dir: Path,
+                             test_groups: List[str], workers: int,
+                             cache_path: Optional[Path] = None,
+                             compile_index_path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Run work units on a process pool, returning results in work unit order."""
+    unit_results: List[Optional[List[Dict[str, Any]]]] = [None] * len(work_units)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_test_worker,
+                             initargs=(tests_dir, cache_path, compile_index_path)) as executor:
+        futures = {
+            executor.submit(_test_work_unit, unit, test_groups): index
+            for index, unit in enumerate(work_units)
+        }
+        
+        with tqdm(total=len(work_units), desc="Testing iterations", unit="iter") as progress:
+            for future in as_completed(futures):
+                index = futures[future]
+                unit = work_units[index]
+                try:
+                    unit_results[index] = future.result()
+                except Exception as e:
+                    # A crashed worker loses the whole unit; record its files as failed
+                    tqdm.write(f"❌ Error in {unit['iteration_dir']}: {str(e)}")
+                    unit_results[index] = _failed_unit_results(unit, str(e))
+                progress.update(1)
+    
+    return [result for results in unit_results for result in results]
+
+
+def _failed_unit_results(unit: Dict[str, Any], error: str) -> List[Dict[str, Any]]:
+    results = []
+    for code_file in sorted(unit["iteration_dir"].glob("*.py")):
+        result = {
+            "model": code_file.stem,
+            "challenge": unit["challenge"],
+            "prompt": unit["prompt"],
+            "iteration": unit["iteration"],
+            "metrics": {},
+            "status": "failed",
+            "error": error,
+            "code_path": str(code_file)
+        }
+        if unit["temperature_folder"]:
+            model_params = unit["generation_params"].get("models", {}).get(code_file.stem, {})
+            result["temperature_folder"] = unit["temperature_folder"]
+            result["generation_params"] = {
+                "temperature": model_params.get("temperature"),
+                "top_k": model_params.get("top_k"),
+                "top_p": model_params.get("top_p"),
+                "model_id": model_params.get("model_id"),
+                "provider": model_params.get("provider")
+            }
+        results.append(result)
+    return results
+
+
 def _test_iteration_files(iteration_dir: Path, challenge_name: str, prompt_name: str, iteration_num: int,
                          temp_folder_name: Optional[str], generation_params: Dict[str, Any],
                          test_runner: TestRunner, test_groups: List[str], 
-                         models_found: List[str]) -> List[Dict[str, Any]]:
+                         models_found: List[str], verbose: bool = True) -> List[Dict[str, Any]]:
     """Test all Python files in an iteration directory."""
     results = []
     
-    for code_file in iteration_dir.glob("*.py"):
+    for code_file in sorted(iteration_dir.glob("*.py")):
         if code_file.name == "generation_params.json":
             continue
             
         model_name = code_file.stem
-        print(f"        🤖 Testing {model_name}...")
+        if verbose:
+            print(f"        🤖 Testing {model_name}...")
         
         if model_name not in models_found:
             models_found.append(model_name)
@@ -157,8 +305,9 @@ def _test_iteration_files(iteration_dir: Path, challenge_name: str, prompt_name:
             
             metrics_data = _extract_metrics_from_tests(test_results, test_groups)
             
-            print(f"          ✅ Tests completed")
-            print(f"             📊 Metrics: {len([k for k, v in metrics_data.items() if v])} categories analyzed")
+            if verbose:
+                print(f"          ✅ Tests completed")
+                print(f"             📊 Metrics: {len([k for k, v in metrics_data.items() if v])} categories analyzed")
             
             # Extract model-specific temperature params
             model_params = generation_params.get("models", {}).get(model_name, {})
@@ -186,7 +335,8 @@ def _test_iteration_files(iteration_dir: Path, challenge_name: str, prompt_name:
             results.append(result)
             
         except Exception as e:
-            print(f"          ❌ Error: {str(e)}")
+            if verbose:
+                print(f"          ❌ Error: {str(e)}")
             
             model_params = generation_params.get("models", {}).get(model_name, {})
             
@@ -238,9 +388,70 @@ def _extract_metrics_from_tests(test_results: Dict[str, Any], test_groups: List[
     if "structure" in (test_groups or []):
         metrics_data["structure"] = test_results.get("structure", {})
     
+    if "performance" in (test_groups or []):
+        performance_results = test_results.get("performance", {})
+        metrics_data["time_behaviour"] = performance_results.get("6_time_behaviour", {})
+        metrics_data["memory_usage"] = performance_results.get("8_performance_efficiency-RAM", {})
+    
     return metrics_data
 
 
+# One character per test in the outcome matrix rows
+OUTCOME_CODES = {"passed": "P", "failed": "F", "error": "E", "skipped": "S", "xfailed": "X", "xpassed": "x",
+                 "timeout": "T"}
+MISSING_OUTCOME = "-"
+
+
+def _write_test_outcome_matrix(results_summary: List[Dict[str, Any]], output_dir: Path) -> Optional[Path]:
+    """
+    Save per-test functional correctness outcomes of the whole corpus as a compact matrix.
+
+    Per challenge, `tests` lists the test names in collection order and every
+    row holds one character per test (see `outcome_codes`), so pass/fail
+    patterns can be compared across models, temperatures and iterations.
+
+    Returns:
+        Path of the matrix file, or None if no per-test outcomes were recorded
+    """
+    challenges: Dict[str, Dict[str, Any]] = {}
+    
+    for result in results_summary:
+        tests = (result["metrics"].get("functional_correctness") or {}).get("tests")
+        if not tests:
+            continue
+        
+        challenge = challenges.setdefault(result["challenge"], {"tests": [], "rows": []})
+        known = set(challenge["tests"])
+        challenge["tests"].extend(name for name in tests if name not in known)
+        challenge["rows"].append({
+            "model": result["model"],
+            "prompt": result["prompt"],
+            "temperature_folder": result.get("temperature_folder"),
+            "iteration": result["iteration"],
+            "outcomes": tests
+        })
+    
+    if not challenges:
+        return None
+    
+    for challenge in challenges.values():
+        for row in challenge["rows"]:
+            tests = row["outcomes"]
+            row["outcomes"] = "".join(
+                OUTCOME_CODES.get(tests[name]["outcome"], MISSING_OUTCOME) if name in tests else MISSING_OUTCOME
+                for name in challenge["tests"]
+            )
+    
+    matrix_path = output_dir / "test_outcome_matrix.json"
+    with open(matrix_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "outcome_codes": {**{code: outcome for outcome, code in OUTCOME_CODES.items()},
+                              MISSING_OUTCOME: "not run"},
+            "challenges": challenges
+        }, f, indent=2)
+    return matrix_path
+
+
 def _build_unique_models_config(results_summary: List[Dict[str, Any]]) -> Dict[str, ModelInfo]:
     """Build unique model configurations from results."""
     unique_models = {}
@@ -1,65 +1,57 @@
 """
 Test of average operation execution time
-Output: average run time of the individual shape rendering operations
+Output: JSON benchmark result with the time per call of the individual shape rendering operations
 """
 
-import time
 import sys
 
+from benchmark_harness import Operation, emit_result, run_benchmarks
 
 from chatgpt import AsciiArt as ChatGPTAsciiArt
 from claude import AsciiArt as ClaudeAsciiArt
 from gemini import AsciiArt as GeminiAsciiArt
 
 
-def time_operation(instance, method, iterations, *args) -> None:
+def draw_operation(AsciiArt, method, *args) -> Operation:
     """
-    Times the execution of a specified method on a given instance over a number of iterations.
+    Creates a benchmark of a drawing method called with fixed arguments.
 
     Args:
-        instance (object): The object instance on which the method will be called.
+        AsciiArt (class): The class containing the method to be tested.
         method (str): The name of the method to be timed.
-        iterations (int): The number of times the method will be called.
         *args: Additional arguments to be passed to the method.
 
     Returns:
-        None
+        Operation: Benchmark on a fresh instance per sample
     """
-    try:
-        start_time = time.time()
-        for _ in range(iterations):
-            getattr(instance, method)(*args)
-        end_time = time.time()
+    return Operation(
+        name=method,
+        call=lambda instance, _: getattr(instance, method)(*args),
+        setup=lambda _: AsciiArt(),
+    )
 
-        print(
-            f"Average time for {method}: {((end_time - start_time) / iterations):.20f} seconds"
-        )
-    except Exception as _:
-        print(f"Method {method} failed with error.")
 
-
-def test_operations(instance, iterations):
+def test_operations(AsciiArt) -> list:
     """
-    Tests various drawing operations on the given instance for a specified number of iterations.
+    Lists the benchmarked drawing operations.
 
     Args:
-        instance (object): The instance on which the drawing operations will be performed.
-        iterations (int): The number of times each drawing operation will be executed.
+        AsciiArt (class): The class containing the drawing methods.
 
     Returns:
-        None
+        list: Operations passed to the benchmark harness
     """
     width = 100
     height = 50
     symbol = "#"
 
-    print(f"Testing {iterations} iterations of each operation\n")
-
-    time_operation(instance, "draw_square", iterations, width, symbol)
-    time_operation(instance, "draw_rectangle", iterations, width, height, symbol)
-    time_operation(instance, "draw_parallelogram", iterations, width, height, symbol)
-    time_operation(instance, "draw_triangle", iterations, width, height, symbol)
-    time_operation(instance, "draw_pyramid", iterations, height, symbol)
+    return [
+        draw_operation(AsciiArt, "draw_square", width, symbol),
+        draw_operation(AsciiArt, "draw_rectangle", width, height, symbol),
+        draw_operation(AsciiArt, "draw_parallelogram", width, height, symbol),
+        draw_operation(AsciiArt, "draw_triangle", width, height, symbol),
+        draw_operation(AsciiArt, "draw_pyramid", height, symbol),
+    ]
 
 
 if __name__ == "__main__":
@@ -72,8 +64,4 @@ if __name__ == "__main__":
     if sys.argv[1] not in modules:
         raise ValueError(f"Invalid module name: {sys.argv[1]}")
 
-    print(f"Testing module: {modules[sys.argv[1]].__module__}")
-    try:
-        test_operations(modules[sys.argv[1]](), 100_000)
-    except Exception as _:
-        print(f"Module {modules[sys.argv[1]].__module__} failed with error.")
+    emit_result(run_benchmarks(sys.argv[1], test_operations(modules[sys.argv[1]])))
@@ -1,128 +1,56 @@
 """
 Test of RAM usage
-Output: RAM capacity allocated at the beginning and end of calculation
+Output: JSON memory result with the peak and retained allocations of each calculated expression
 """
 
-import statistics
-import psutil
-import os
 import sys
-import multiprocessing
 
+from benchmark_harness import Operation, emit_result, run_memory_benchmarks
 
 from chatgpt import Calculator as ChatGPTCalculator
 from claude import Calculator as ClaudeCalculator
 from gemini import Calculator as GeminiCalculator
 
 
-def get_process_memory():
-    """
-    Get the current memory usage of the process in megabytes (MB).
-
-    Returns:
-        float: The memory usage of the current process in MB.
-    """
-    process = psutil.Process(os.getpid())
-    return process.memory_info().rss / (1024 * 1024)  # in MB
+EXPRESSIONS = [
+    "1974349+7972327",
+    "1974349-7972327",
+    "1974349*7972327",
+    "1974349/7972327",
+    "1974349+7972327-1974349*7972327/964",
+]
 
 
-def measure_method_memory_usage(
-    Calculator, method, iterations, shared_manager, *args
-) -> None:
+def calculate_operation(Calculator, expression) -> Operation:
     """
-    Tests the memory usage of a specified method in a Calculator class over a number of iterations.
+    Creates a memory measurement of the calculate method for a single expression.
 
     Args:
-        Calculator (type): The Calculator class to be tested.
-        method (str): The name of the method to be tested.
-        iterations (int): The number of times to call the method.
-        *args: Arguments to pass to the method being tested.
+        Calculator (class): The calculator class to be tested.
+        expression (str): The expression passed to calculate.
 
     Returns:
-        None
-    """
-    try:
-        instance = Calculator()
-
-        mem_before = get_process_memory()
-        for _ in range(iterations):
-            getattr(instance, method)(*args)
-        mem_after = get_process_memory()
-
-        (shared_manager["mem_deltas"]).append(mem_after - mem_before)
-    except Exception as e:
-        (shared_manager["errors"]).append(e)
-
-
-def run_method_memory_test(Calculator, method, iterations, *args) -> None:
+        Operation: Measurement on a fresh calculator instance
     """
-    Calls the memory_usage_test function in a separate process to test the memory usage of a Calculator class.
+    return Operation(
+        name=f"calculate({expression})",
+        call=lambda calculator, _: calculator.calculate(expression),
+        setup=lambda _: Calculator(),
+    )
 
-    Args:
-        Calculator (class): The Calculator class to be tested.
-        method (str): The method name of the Calculator class to be tested.
-        iterations (int): The number of iterations to run the memory usage test.
-        *args: Additional arguments to be passed to the method being tested.
 
-    Returns:
-        None
-    """
-    try:
-        with multiprocessing.Manager() as manager:
-            shared_manager = manager.dict()
-            shared_manager["mem_deltas"] = manager.list()
-            shared_manager["errors"] = manager.list()
-
-            try:
-                for _ in range(100):
-                    process = multiprocessing.Process(
-                        target=measure_method_memory_usage,
-                        args=(Calculator, method, iterations, shared_manager, *args),
-                    )
-                    process.start()
-                    process.join()
-
-                    if shared_manager["errors"]:
-                        raise shared_manager["errors"][0]
-
-                mem_median = statistics.median(shared_manager["mem_deltas"])
-                print(f"Memory deltas for {method} ({args[0]}): {mem_median:.2f} MB")
-            except Exception as _:
-                print(f"Method {method} ({args[0]}) failed with error.")
-
-    except Exception as _:
-        print("Failed to create shared manager.")
-
-
-def benchmark_memory_usage(Calculator, iterations) -> None:
+def test_operations(Calculator) -> list:
     """
-    Runs a memory usage test on a given Calculator class for a specified number of iterations.
+    Lists the measured calculator operations: addition, subtraction,
+    multiplication, division and a complex expression.
 
     Args:
-        Calculator (class): The Calculator class to be tested.
-        iterations (int): The number of iterations to run the memory usage test.
+        Calculator (class): The calculator class to be tested.
 
     Returns:
-        None
+        list: Operations passed to the benchmark harness
     """
-    try:
-        calculator = [
-            ("calculate", "1974349+7972327"),
-            ("calculate", "1974349-7972327"),
-            ("calculate", "1974349*7972327"),
-            ("calculate", "1974349/7972327"),
-            ("calculate", "1974349+7972327-1974349*7972327/964"),
-        ]
-
-        for method, *args in calculator:
-            process = multiprocessing.Process(
-                target=run_method_memory_test,
-                args=(Calculator, method, iterations, *args),
-            )
-            process.start()
-            process.join()
-    except Exception as _:
-        print(f"Module {Calculator.__module__} failed with error.")
+    return [calculate_operation(Calculator, expression) for expression in EXPRESSIONS]
 
 
 if __name__ == "__main__":
@@ -135,12 +63,4 @@ if __name__ == "__main__":
     if sys.argv[1] not in modules:
         raise ValueError(f"Invalid module name: {sys.argv[1]}")
 
-    print(f"Testing module: {modules[sys.argv[1]].__module__}")
-    try:
-        process = multiprocessing.Process(
-            target=benchmark_memory_usage, args=(modules[sys.argv[1]], 100_000)
-        )
-        process.start()
-        process.join()
-    except Exception as _:
-        print(f"Module {modules[sys.argv[1]].__module__} failed with error.")
+    emit_result(run_memory_benchmarks(sys.argv[1], test_operations(modules[sys.argv[1]])))
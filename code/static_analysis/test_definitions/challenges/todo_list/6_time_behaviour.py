@@ -1,70 +1,87 @@
 """
 Test of average operation execution time
-Output: average run time of the individual shape rendering operations
+Output: JSON benchmark result with the time per call of the individual task operations
 """
 
-import time
 import sys
 
+from benchmark_harness import Operation, emit_result, run_benchmarks
 
 from chatgpt import TaskManager as ChatGPTTaskManager
 from claude import TaskManager as ClaudeTaskManager
 from gemini import TaskManager as GeminiTaskManager
 
 
-def time_operation(instance, method, iterations, flag, *args) -> None:
+# Tasks in the list while it is read, searched, finished or emptied
+TASK_COUNT = 1_000
+
+
+def filled_manager(TaskManager, count) -> tuple:
     """
-    Times the execution of a specified method on a given instance over a number of iterations.
+    Creates a task manager holding a number of tasks.
 
     Args:
-        instance (object): The object instance on which the method will be called.
-        method (str): The name of the method to be timed.
-        iterations (int): The number of times the method will be called.
-        *args: Additional arguments to be passed to the method.
+        TaskManager (class): The task manager class to be tested.
+        count (int): The number of tasks to add.
 
     Returns:
-        None
+        tuple: The task manager and the ids returned when adding the tasks
     """
-    try:
-        start_time = time.time()
-        for i in range(iterations):
-            if flag:
-                formated_args = [arg.format(i=i + 1) for arg in args]
-                if method in ("finish", "remove"):
-                    formated_args = [int(arg) for arg in formated_args]
-                getattr(instance, method)(*formated_args)
-            else:
-                getattr(instance, method)()
-        end_time = time.time()
-
-        print(
-            f"Average time for {method}: {((end_time - start_time) / iterations):.20f} seconds"
-        )
-    except Exception as _:
-        print(f"Method {method} failed with error.")
-
-
-def test_operations(instance, iterations) -> None:
+    manager = TaskManager()
+    ids = [manager.add(f"task_name_{i + 1}", f"task_description_{i + 1}") for i in range(count)]
+    return manager, ids
+
+
+def test_operations(TaskManager) -> list:
     """
-    Tests various operations on a given instance for a specified number of iterations.
+    Lists the benchmarked task operations. Adding, finishing and removing change
+    the list, so they run exactly TASK_COUNT times per sample; reading and
+    searching run on a list of TASK_COUNT tasks.
 
     Args:
-        instance: The instance on which the operations will be performed.
-        iterations (int): The number of times each operation will be performed.
+        TaskManager (class): The task manager class to be tested.
 
     Returns:
-        None
+        list: Operations passed to the benchmark harness
     """
-    print(f"Testing {iterations} iterations of each operation\n")
-
-    time_operation(
-        instance, "add", iterations, True, "task_name_{i}", "task_description_{i}"
-    )
-    time_operation(instance, "get_all", iterations, False)
-    time_operation(instance, "search", iterations, True, "task_name_{i}")
-    time_operation(instance, "search", iterations, True, "task_description_{i}")
-    time_operation(instance, "finish", iterations, True, "{i}")
-    time_operation(instance, "remove", iterations, True, "{i}")
+    names = [f"task_name_{i + 1}" for i in range(TASK_COUNT)]
+    descriptions = [f"task_description_{i + 1}" for i in range(TASK_COUNT)]
+
+    return [
+        Operation(
+            name="add",
+            call=lambda manager, i: manager.add(names[i], descriptions[i]),
+            setup=lambda _: TaskManager(),
+            number=TASK_COUNT,
+        ),
+        Operation(
+            name="get_all",
+            call=lambda state, _: state[0].get_all(),
+            setup=lambda _: filled_manager(TaskManager, TASK_COUNT),
+        ),
+        Operation(
+            name="search_name",
+            call=lambda state, i: state[0].search(names[i % TASK_COUNT]),
+            setup=lambda _: filled_manager(TaskManager, TASK_COUNT),
+        ),
+        Operation(
+            name="search_description",
+            call=lambda state, i: state[0].search(descriptions[i % TASK_COUNT]),
+            setup=lambda _: filled_manager(TaskManager, TASK_COUNT),
+        ),
+        Operation(
+            name="finish",
+            call=lambda state, i: state[0].finish(state[1][i]),
+            setup=lambda _: filled_manager(TaskManager, TASK_COUNT),
+            number=TASK_COUNT,
+        ),
+        Operation(
+            name="remove",
+            call=lambda state, i: state[0].remove(state[1][i]),
+            setup=lambda _: filled_manager(TaskManager, TASK_COUNT),
+            number=TASK_COUNT,
+        ),
+    ]
 
 
 if __name__ == "__main__":
@@ -77,8 +94,4 @@ if __name__ == "__main__":
     if sys.argv[1] not in modules:
         raise ValueError(f"Invalid module name: {sys.argv[1]}")
 
-    print(f"Testing module: {modules[sys.argv[1]].__module__}")
-    try:
-        test_operations(modules[sys.argv[1]](), 10_000)
-    except Exception as _:
-        print(f"Module {modules[sys.argv[1]].__module__} failed with error.")
+    emit_result(run_benchmarks(sys.argv[1], test_operations(modules[sys.argv[1]])))
@@ -4,6 +4,7 @@ Shared utility functions used across multiple modules.
 
 import re
 from pathlib import Path
+from typing import Callable, List, Optional
 
 
 def extract_python_code(text: str) -> str:
@@ -25,6 +26,53 @@ def extract_python_code(text: str) -> str:
     return "\n".join(code_blocks) if code_blocks else ""
 
 
+class StreamingCodeExtractor:
+    """
+    Incremental equivalent of `extract_python_code` for streamed responses.
+
+    Text is fed chunk by chunk; only the current code block and a few characters
+    of lookahead are buffered. Each ```python block is reported through
+    `on_block` as soon as its closing fence arrives, and `code` returns the same
+    string `extract_python_code` would produce for the full text.
+    """
+
+    OPEN_FENCE = "```python"
+    CLOSE_FENCE = "```"
+
+    def __init__(self, on_block: Optional[Callable[[str], None]] = None):
+        self.on_block = on_block
+        self.blocks: List[str] = []
+        self._buffer = ""
+        self._inside = False
+
+    def feed(self, text: str) -> None:
+        # Only the tail of the previous buffer can start a fence that completes in `text`
+        fence = self.CLOSE_FENCE if self._inside else self.OPEN_FENCE
+        start = max(0, len(self._buffer) - (len(fence) - 1))
+        self._buffer += text
+        while True:
+            fence = self.CLOSE_FENCE if self._inside else self.OPEN_FENCE
+            index = self._buffer.find(fence, start)
+            start = 0
+            if index == -1:
+                if not self._inside:
+                    # Outside a block only a possible partial opening fence must be kept
+                    self._buffer = self._buffer[-(len(fence) - 1):]
+                return
+
+            if self._inside:
+                block = self._buffer[:index]
+                self.blocks.append(block)
+                if self.on_block:
+                    self.on_block(block)
+            self._buffer = self._buffer[index + len(fence):]
+            self._inside = not self._inside
+
+    @property
+    def code(self) -> str:
+        return "\n".join(self.blocks)
+
+
 def load_string_from_file(file_path: str) -> str:
     """
     Reads the entire content of a file and returns it as a string.
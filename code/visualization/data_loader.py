@@ -11,6 +11,14 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.data_filtering import get_non_compilable_iterations, get_exclusion_summary
 
+# First similarity format version whose ast_edit_distance/tsed are exact only (null where not
+# computed); older files store upper bounds under these names
+EXACT_TED_FORMAT_VERSION = 3
+
+# Edit distances that are null where the exact value was too expensive, and their upper bounds
+EXACT_EDIT_DISTANCES = ['ast_edit_distance', 'tsed']
+EDIT_DISTANCE_BOUNDS = ['ast_edit_distance_upper_bound', 'tsed_upper_bound']
+
 
 class SimilarityDataLoader:
     """Load and combine similarity data from all experiments."""
@@ -38,6 +46,7 @@ class SimilarityDataLoader:
             print()
 
         all_data = []
+        format_versions = set()
 
         # Find all JSON files
         for json_file in self.similarity_dir.glob("*/*/*.json"):
@@ -53,6 +62,7 @@ class SimilarityDataLoader:
             challenge = metadata['challenge']
             model = metadata['model']
             temperature = metadata['temperature']
+            format_versions.add(metadata.get('format_version', 1))
 
             # Convert similarities array to DataFrame
             similarities_df = pd.DataFrame(data['similarities'])
@@ -78,8 +88,21 @@ class SimilarityDataLoader:
         if not all_data:
             raise ValueError(f"No similarity data found in {self.similarity_dir}")
 
+        # Edit distances changed meaning between format versions, so they can't be combined
+        if len(format_versions) > 1:
+            raise ValueError(f"Similarity data of format versions {sorted(format_versions)} in "
+                             f"{self.similarity_dir}; rerun the similarity analysis to update older files")
+        if min(format_versions) < EXACT_TED_FORMAT_VERSION:
+            raise ValueError(f"Similarity data of format version {min(format_versions)} in {self.similarity_dir} "
+                             "mixes exact edit distances and upper bounds; rerun the similarity analysis")
+
         combined_df = pd.concat(all_data, ignore_index=True)
 
+        # Null exact distances would leave object columns; make them NaN so means skip them
+        for col in EXACT_EDIT_DISTANCES + EDIT_DISTANCE_BOUNDS:
+            if col in combined_df.columns:
+                combined_df[col] = pd.to_numeric(combined_df[col], errors='coerce')
+
         # Reorder columns: metadata first, then indices, then metrics
         metadata_cols = ['challenge', 'model', 'temperature', 'i', 'j']
         metric_cols = [col for col in combined_df.columns if col not in metadata_cols]
@@ -98,6 +121,29 @@ class SimilarityDataLoader:
             'comparisons_per_temperature': len(df[df['temperature'] == df['temperature'].iloc[0]]),
         }
 
+    def get_exact_share(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Share of pairs with an exact edit distance in every challenge/model/temperature cell.
+
+        Returns:
+            DataFrame with columns: challenge, model, temperature, pairs, and the share of
+            non-null values of every exact edit distance
+        """
+        metrics = [m for m in EXACT_EDIT_DISTANCES if m in df.columns]
+        grouped = df.groupby(['challenge', 'model', 'temperature'])
+        share = grouped[metrics].agg(lambda values: values.notna().mean())
+        share.insert(0, 'pairs', grouped.size())
+        return share.reset_index()
+
+    def print_exact_share(self, df: pd.DataFrame):
+        """Print the share of exact edit distances per cell; the other pairs only have upper bounds."""
+        share = self.get_exact_share(df)
+        print("Share of pairs with exact edit distances (means use only these pairs):")
+        for _, row in share.iterrows():
+            shares = ", ".join(f"{m}={row[m]:.1%}" for m in EXACT_EDIT_DISTANCES if m in share.columns)
+            print(f"  {row['challenge']}/{row['model']}/temp_{row['temperature']}: {shares} (n={row['pairs']})")
+        print()
+
 
 if __name__ == "__main__":
     # Test loading
@@ -114,3 +160,6 @@ if __name__ == "__main__":
     summary = loader.get_summary(df)
     for key, value in summary.items():
         print(f"  {key}: {value}")
+
+    print()
+    loader.print_exact_share(df)
@@ -7,6 +7,10 @@ from data_loader import SimilarityDataLoader
 from statistics import TemperatureStatistics
 from temperature_plots import TemperaturePlotter
 
+# Exact edit distances are averaged over the pairs where they were computed; their
+# upper bounds exist for every pair and are plotted separately
+PRIMARY_METRICS = ['codebleu', 'ast_edit_distance', 'tsed', 'ast_edit_distance_upper_bound', 'tsed_upper_bound']
+
 
 def main():
     print("="*60)
@@ -25,6 +29,7 @@ def main():
     print(f"  Challenges: {', '.join(summary['challenges'])}")
     print(f"  Temperatures: {summary['temperatures']}")
     print()
+    loader.print_exact_share(df)
 
     # Calculate statistics
     print("Calculating statistics...")
@@ -46,13 +51,13 @@ def main():
     plots_generated.append(path)
 
     # 2. Per-challenge plots for each primary metric
-    for metric in ['codebleu', 'ast_edit_distance', 'tsed']:
+    for metric in PRIMARY_METRICS:
         print(f"  2. {metric.upper()} by challenge...")
         path = plotter.plot_single_metric_per_challenge(metric)
         plots_generated.append(path)
 
     # 3. Consistency plots for primary metrics
-    for metric in ['codebleu', 'ast_edit_distance', 'tsed']:
+    for metric in PRIMARY_METRICS:
         print(f"  3. Consistency analysis for {metric.upper()}...")
         path = plotter.plot_consistency(metric)
         plots_generated.append(path)
@@ -6,6 +6,10 @@ Run this script to create all publication-ready tables.
 from data_loader import SimilarityDataLoader
 from latex_export import LaTeXTableExporter
 
+# Exact edit distances are averaged over the pairs where they were computed; their
+# upper bounds exist for every pair and are reported separately
+PRIMARY_METRICS = ['codebleu', 'ast_edit_distance', 'tsed', 'ast_edit_distance_upper_bound', 'tsed_upper_bound']
+
 
 def main():
     print("="*60)
@@ -24,6 +28,7 @@ def main():
     print(f"  Challenges: {', '.join(summary['challenges'])}")
     print(f"  Temperatures: {summary['temperatures']}")
     print()
+    loader.print_exact_share(df)
 
     # Initialize exporter
     print("Generating LaTeX tables...")
@@ -34,18 +39,18 @@ def main():
     # 1. Temperature summary (all metrics)
     print("  1. Temperature summary table...")
     path = exporter.export_temperature_summary(
-        metrics=['codebleu', 'ast_edit_distance', 'tsed']
+        metrics=PRIMARY_METRICS
     )
     tables_generated.append(path)
 
     # 2. Model comparison for each primary metric
-    for metric in ['codebleu', 'ast_edit_distance', 'tsed']:
+    for metric in PRIMARY_METRICS:
         print(f"  2. Model comparison for {metric.upper()}...")
         path = exporter.export_model_comparison(metric)
         tables_generated.append(path)
 
     # 3. Challenge breakdown for each primary metric
-    for metric in ['codebleu', 'ast_edit_distance', 'tsed']:
+    for metric in PRIMARY_METRICS:
         print(f"  3. Challenge breakdown for {metric.upper()}...")
         path = exporter.export_challenge_breakdown(metric)
         tables_generated.append(path)
@@ -53,7 +58,7 @@ def main():
     # 4. Consistency analysis
     print("  4. Consistency analysis table...")
     path = exporter.export_consistency_analysis(
-        metrics=['codebleu', 'ast_edit_distance', 'tsed']
+        metrics=PRIMARY_METRICS
     )
     tables_generated.append(path)
 
@@ -26,7 +26,8 @@ class LaTeXTableExporter:
 
     def export_temperature_summary(
         self,
-        metrics: List[str] = ['codebleu', 'ast_edit_distance', 'tsed'],
+        metrics: List[str] = ['codebleu', 'ast_edit_distance', 'tsed',
+                              'ast_edit_distance_upper_bound', 'tsed_upper_bound'],
         filename: str = "temperature_summary.tex"
     ) -> str:
         """
@@ -54,12 +55,14 @@ class LaTeXTableExporter:
             if results is None:
                 results = stats
             else:
-                results = results.merge(stats, on='Temperature')
+                # Exact edit distances may be missing at some temperatures
+                results = results.merge(stats, on='Temperature', how='outer')
 
         # Format for LaTeX
         latex_table = self._dataframe_to_latex(
             results,
-            caption=f"Mean similarity scores across temperatures",
+            caption=f"Mean similarity scores across temperatures (exact edit distances over the pairs "
+                    f"where they were computed)",
             label="tab:temperature_summary",
             float_format="%.4f"
         )
@@ -128,7 +131,8 @@ class LaTeXTableExporter:
 
     def export_consistency_analysis(
         self,
-        metrics: List[str] = ['codebleu', 'ast_edit_distance', 'tsed'],
+        metrics: List[str] = ['codebleu', 'ast_edit_distance', 'tsed',
+                              'ast_edit_distance_upper_bound', 'tsed_upper_bound'],
         filename: str = "consistency_analysis.tex"
     ) -> str:
         """
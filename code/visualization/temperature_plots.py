@@ -86,10 +86,10 @@ class TemperaturePlotter:
                 # Filter out inf and nan values for this metric
                 df_model = df_model[np.isfinite(df_model[metric])]
 
-                # Calculate mean and std per temperature
+                # Calculate mean and std per temperature; temperatures without values stay gaps
                 grouped = df_model.groupby('temperature')[metric]
-                means = grouped.mean()
-                stds = grouped.std()
+                means = grouped.mean().reindex(temperatures)
+                stds = grouped.std().reindex(temperatures)
 
                 # Plot line with error band
                 ax.plot(temperatures, means, label=model.capitalize(),
@@ -164,8 +164,8 @@ class TemperaturePlotter:
                 df_model = df_model[np.isfinite(df_model[metric])]
 
                 grouped = df_model.groupby('temperature')[metric]
-                means = grouped.mean()
-                stds = grouped.std()
+                means = grouped.mean().reindex(temperatures)
+                stds = grouped.std().reindex(temperatures)
 
                 ax.plot(temperatures, means, label=model.capitalize(),
                        color=COLORS.get(model, 'gray'), marker='o')
@@ -252,8 +252,10 @@ class TemperaturePlotter:
         labels = {
             'codebleu': 'CodeBLEU Score',
             'bleu': 'BLEU Score',
-            'ast_edit_distance': 'AST Edit Distance',
-            'tsed': 'TSED',
+            'ast_edit_distance': 'AST Edit Distance (exact)',
+            'ast_edit_distance_upper_bound': 'AST Edit Distance (upper bound)',
+            'tsed': 'TSED (exact)',
+            'tsed_upper_bound': 'TSED (upper bound)',
             'syntax_match': 'Syntax Match Score',
             'jaccard_tokens': 'Jaccard Similarity (Tokens)',
         }
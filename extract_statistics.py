@@ -15,6 +15,10 @@ QUALITY_JSON = BASE_DIR / "dry_run_output/static_analysis/experiment_1765799714/
 SIMILARITY_DIR = BASE_DIR / "dry_run_output/similarity_analysis/pairwise_within_temperature"
 OUTPUT_FILE = BASE_DIR / "statistics_summary.txt"
 
+# First similarity format version whose ast_edit_distance/tsed are exact only (null where not
+# computed); older files store upper bounds under these names
+EXACT_TED_FORMAT_VERSION = 3
+
 def load_quality_data():
     """Load quality metrics from results_flat.json"""
     with open(QUALITY_JSON) as f:
@@ -89,6 +93,7 @@ def load_quality_data():
 def load_similarity_data():
     """Load similarity metrics from pairwise JSON files"""
     results = []
+    format_versions = set()
 
     for challenge_dir in SIMILARITY_DIR.iterdir():
         if not challenge_dir.is_dir():
@@ -105,6 +110,7 @@ def load_similarity_data():
 
                 with open(json_file) as f:
                     data = json.load(f)
+                format_versions.add(data.get('metadata', {}).get('format_version', 1))
 
                 # Extract pairwise comparisons
                 for comparison in data.get('similarities', []):
@@ -115,11 +121,41 @@ def load_similarity_data():
                         'bleu': comparison.get('bleu'),
                         'codebleu': comparison.get('codebleu'),
                         'ast_edit_distance': comparison.get('ast_edit_distance'),
-                        'tsed': comparison.get('tsed')
+                        'ast_edit_distance_upper_bound': comparison.get('ast_edit_distance_upper_bound'),
+                        'tsed': comparison.get('tsed'),
+                        'tsed_upper_bound': comparison.get('tsed_upper_bound')
                     })
 
+    # Edit distances changed meaning between format versions, so they can't be combined
+    if len(format_versions) > 1:
+        raise ValueError(f"Similarity data of format versions {sorted(format_versions)}; "
+                         "rerun the similarity analysis to update older files")
+    if format_versions and min(format_versions) < EXACT_TED_FORMAT_VERSION:
+        raise ValueError(f"Similarity data of format version {min(format_versions)} mixes exact edit "
+                         "distances and upper bounds; rerun the similarity analysis")
+
     return results
 
+def compute_exact_share(data):
+    """Share of pairs with an exact AST edit distance and TSED, by cell"""
+    by_cell = defaultdict(lambda: {'n': 0, 'ast_edit_distance': 0, 'tsed': 0})
+
+    for entry in data:
+        cell = by_cell[(entry['challenge'], entry['model'], entry['temperature'])]
+        cell['n'] += 1
+        for metric_name in ('ast_edit_distance', 'tsed'):
+            if entry.get(metric_name) is not None:
+                cell[metric_name] += 1
+
+    return {
+        key: {
+            'n': cell['n'],
+            'ast_edit_distance': cell['ast_edit_distance'] / cell['n'],
+            'tsed': cell['tsed'] / cell['n']
+        }
+        for key, cell in by_cell.items()
+    }
+
 def compute_basic_stats(data, metric_name):
     """Compute mean and SD by temperature"""
     by_temp = defaultdict(list)
@@ -305,10 +341,21 @@ def format_output():
     similarity_metrics = [
         ('bleu', 'BLEU'),
         ('codebleu', 'CodeBLEU'),
-        ('ast_edit_distance', 'AST Edit Distance'),
-        ('tsed', 'TSED')
+        ('ast_edit_distance', 'AST Edit Distance (exact pairs only)'),
+        ('ast_edit_distance_upper_bound', 'AST Edit Distance Upper Bound'),
+        ('tsed', 'TSED (exact pairs only)'),
+        ('tsed_upper_bound', 'TSED Upper Bound')
     ]
 
+    # Exact edit distances are only computed where affordable, mostly for similar pairs
+    output.append("Share of pairs with exact AST Edit Distance / TSED by cell:")
+    exact_share = compute_exact_share(similarity_data)
+    for challenge, model, temp in sorted(exact_share.keys()):
+        s = exact_share[(challenge, model, temp)]
+        output.append(f"  {challenge}/{model}/T={temp:.1f}: AST Edit Distance={s['ast_edit_distance']:.1%}, "
+                      f"TSED={s['tsed']:.1%} (n={s['n']})")
+    output.append("")
+
     for metric_key, metric_name in similarity_metrics:
         output.append(f"\n{metric_name}")
         output.append("-" * 80)